@@ -0,0 +1,131 @@
+import math
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Aggregate, Avg, Count, DurationField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDay, TruncHour, TruncWeek
+from django.utils import timezone
+
+from .archive import service_history
+from .caching import make_keys
+
+# Throughput, revenue and duration of completed services in hour/day/week buckets of their completion time.
+# A bucket that is over never changes (completions are stamped with now()), so its rows are cached until
+# a completed service is edited or deleted (see CarWashService.save/delete); only the open bucket and
+# cache misses are read from the database, with one grouped query per run of adjacent missing buckets.
+
+NAMESPACE = "analytics"
+BUCKETS = {
+    "hour": (TruncHour, timedelta(hours=1)),
+    "day": (TruncDay, timedelta(days=1)),
+    "week": (TruncWeek, timedelta(weeks=1)),
+}
+DEFAULT_SPAN = {"hour": timedelta(days=2), "day": timedelta(days=90), "week": timedelta(weeks=52)}
+MAX_BUCKETS = 366 * 24  # A year of hours
+SETTLE = timedelta(minutes=5)  # A bucket is cached only once it ended this long ago (in-flight commits, replica lag)
+CLOSED_TIMEOUT = 30 * 24 * 3600
+
+DURATION = ExpressionWrapper(F("services_end_date") - F("services_start_date"), output_field=DurationField())
+
+
+class PercentileCont(Aggregate):
+    """PostgreSQL's ordered-set percentile_cont aggregate."""
+    function = "percentile_cont"
+    template = "%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)"
+
+    def __init__(self, expression, fraction, **extra):
+        super().__init__(expression, fraction=float(fraction), **extra)
+
+
+def percentile_cont(values, fraction):
+    """percentile_cont with linear interpolation, for databases without the aggregate."""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower, upper = math.floor(position), math.ceil(position)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def bucket_floor(moment, size):
+    moment = timezone.localtime(moment).replace(minute=0, second=0, microsecond=0)
+    if size != "hour":
+        moment = moment.replace(hour=0)
+    if size == "week":
+        moment -= timedelta(days=moment.weekday())  # Weeks start on Monday, like TruncWeek
+    return moment
+
+
+def bucket_starts(size, start, end):
+    step = BUCKETS[size][1]
+    starts, moment = [], bucket_floor(start, size)
+    while moment < end:
+        starts.append(moment)
+        moment += step
+    return starts
+
+
+def seconds(duration):
+    return None if duration is None else round(duration.total_seconds(), 1)
+
+
+def query_buckets(size, start, end, using):
+    """bucket start -> per service type rows, for completions in [start, end)."""
+    trunc = BUCKETS[size][0]
+    services = service_history(start, using).filter(
+        status="completed", services_end_date__gte=start, services_end_date__lt=end,
+    ).annotate(bucket=trunc("services_end_date"))
+
+    aggregates = {"count": Count("id"), "revenue": Sum("final_price"), "avg_duration": Avg(DURATION)}
+    in_database = connections[using].vendor == "postgresql"
+    if in_database:
+        aggregates["p90_duration"] = PercentileCont(DURATION, 0.9)
+    rows = services.values("bucket", "service_type").annotate(**aggregates).order_by("bucket", "service_type")
+
+    durations = {}
+    if not in_database:
+        for bucket, service_type, duration in services.annotate(duration=DURATION).values_list(
+            "bucket", "service_type", "duration"
+        ):
+            durations.setdefault((bucket, service_type), []).append(duration)
+
+    buckets = {}
+    for row in rows:
+        if in_database:
+            p90 = row["p90_duration"]
+        else:
+            p90 = percentile_cont(durations[(row["bucket"], row["service_type"])], 0.9)
+        buckets.setdefault(row["bucket"], []).append({
+            "service_type": row["service_type"],
+            "count": row["count"],
+            "revenue": row["revenue"] or 0,
+            "avg_duration_seconds": seconds(row["avg_duration"]),
+            "p90_duration_seconds": seconds(p90),
+        })
+    return buckets
+
+
+def service_analytics(size, start, end, using="default"):
+    """Every bucket of the given size overlapping [start, end), oldest first."""
+    step = BUCKETS[size][1]
+    starts = bucket_starts(size, start, end)
+    settled = timezone.now() - SETTLE
+    closed = [moment for moment in starts if moment + step <= settled]
+    keys = dict(zip(closed, make_keys(NAMESPACE, [f"{size}:{moment.isoformat()}" for moment in closed])))
+    cached = cache.get_many(list(keys.values()))
+    results = {moment: cached[key] for moment, key in keys.items() if key in cached}
+
+    # One query per run of adjacent buckets that are open or not cached yet
+    missing = [moment for moment in starts if moment not in results]
+    runs = []
+    for moment in missing:
+        if runs and runs[-1][1] == moment:
+            runs[-1][1] = moment + step
+        else:
+            runs.append([moment, moment + step])
+    for run_start, run_end in runs:
+        computed = query_buckets(size, run_start, run_end, using)
+        fresh = {moment: computed.get(moment, []) for moment in bucket_starts(size, run_start, run_end)}
+        results.update(fresh)
+        cache.set_many({keys[moment]: rows for moment, rows in fresh.items() if moment in keys}, CLOSED_TIMEOUT)
+
+    return [{"start": moment, "services": results[moment]} for moment in starts]
@@ -0,0 +1,63 @@
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import ArchivedCarWashService, CarWashService, ServiceHistory
+
+# Hot/archive split of the service table. Completed services older than SERVICE_ARCHIVE_AFTER_DAYS are moved
+# to ArchivedCarWashService by the archive_services command, so the desk queries only scan recent and
+# in-progress rows. Reports go through service_history(), which adds the archive (via the ServiceHistory
+# view) only when their range starts before the newest archived completion.
+
+
+def archive_watermark(using):
+    """Completion time of the newest archived service, None while the archive is empty."""
+    return ArchivedCarWashService.objects.using(using).aggregate(newest=Max("services_end_date"))["newest"]
+
+
+def service_history(since=None, using=None):
+    """
+    Services for a report over the range starting at since (None: all time). An archived service started
+    and ended before the watermark, so for ranges starting after it the hot table alone is complete.
+    """
+    using = using or router.db_for_read(CarWashService)
+    if since is not None:
+        newest = archive_watermark(using)
+        if newest is None or newest < since:
+            return CarWashService.objects.using(using)
+    return ServiceHistory.objects.using(using)
+
+
+def archive_batch(cutoff, batch_size, using=DEFAULT_DB_ALIAS):
+    """
+    Move up to batch_size services completed before cutoff into the archive, oldest ids first, in one short
+    transaction (INSERT ... SELECT and DELETE of the same ids). Returns how many were moved.
+    """
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    source, target = CarWashService._meta, ArchivedCarWashService._meta
+    archived_at = target.get_field("archived_at")
+    columns = ", ".join(
+        qn(field.column) for field in target.concrete_fields if not field.generated and field is not archived_at
+    )
+
+    with transaction.atomic(using=using):
+        # Rows being edited right now are left for the next run instead of waited for
+        ids = list(
+            CarWashService.objects.using(using).select_for_update(skip_locked=True)
+            .filter(status="completed", services_end_date__lt=cutoff)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0
+        placeholders = ", ".join(["%s"] * len(ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {qn(target.db_table)} ({columns}, {qn(archived_at.column)}) "
+                f"SELECT {columns}, %s FROM {qn(source.db_table)} WHERE {qn(source.pk.column)} IN ({placeholders})",
+                [archived_at.get_db_prep_save(timezone.now(), connection), *ids],
+            )
+        # No per-row signals or events: the services still exist, in the archive
+        CarWashService.objects.using(using).filter(pk__in=ids).delete()
+    return len(ids)
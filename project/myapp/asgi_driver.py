@@ -0,0 +1,87 @@
+import asyncio
+import importlib
+import time
+from urllib.parse import urlsplit
+
+from django.urls import clear_url_caches
+
+
+# Minimal in-process ASGI HTTP client used by the load-test commands
+
+class ASGIResult:
+    __slots__ = ("status", "body", "seconds")
+
+    def __init__(self, status, body, seconds):
+        self.status = status
+        self.body = body
+        self.seconds = seconds
+
+
+async def asgi_request(app, method, url, headers=None, body=b"", read_delay=0.0, client=("127.0.0.1", 50000)):
+    """
+    Send one HTTP request straight into an ASGI application.
+    read_delay sleeps on every response chunk, simulating a client on a slow link.
+    client is the (address, port) the request comes from, which the IP throttles key on.
+    """
+    parts = urlsplit(url)
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method.upper(),
+        "scheme": "http",
+        "path": parts.path,
+        "raw_path": parts.path.encode(),
+        "query_string": parts.query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"testserver")] + [
+            (name.lower().encode(), value.encode()) for name, value in (headers or {}).items()
+        ],
+        "client": client,
+        "server": ("testserver", 80),
+    }
+    if body:
+        scope["headers"].append((b"content-length", str(len(body)).encode()))
+
+    request_sent = False
+    finished = asyncio.Event()
+    status = None
+    chunks = []
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await finished.wait()  # Nothing more to send; disconnect once the response is read
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if read_delay:
+                await asyncio.sleep(read_delay)
+            if not message.get("more_body", False):
+                finished.set()
+
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    finished.set()
+    return ASGIResult(status, b"".join(chunks), time.perf_counter() - start)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))]
+
+
+def reload_urls():
+    # read_view() and login_view() pick sync or async views at import time
+    import myapp.urls
+    import project.urls
+    importlib.reload(myapp.urls)
+    importlib.reload(project.urls)
+    clear_url_caches()
@@ -0,0 +1,294 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .authentication import CachedJWTAuthentication
+from .caching import aget_or_compute
+from .events import event_stream
+from .fast_serializers import part_rows, service_rows
+from .hashing import HashingOverloaded, averify_password
+from .http_cache import AsyncPublicCacheMixin
+from .models import CarWashService, PartsListModel, Reviewmodel, ReviewSummary, Users
+from .serializer import CustomerLoginSerializer, EmployeeLoginSerializer, ReviewSerializer
+from .views import (
+    CarWashServiceView, CustomerLoginView, EmployeeLoginView, GiveReviews, ReviewPagination, ReviewSummaryView,
+    SpearPartsList, get_tokens_for_user,
+)
+
+# Native async versions of the read-only endpoints, used for GET/HEAD when ASYNC_READ_VIEWS is on.
+# They answer with the same JSON as the DRF views but never hold a worker thread while waiting.
+# The login views are here too (ASYNC_LOGIN_VIEWS), they hash passwords in a bounded pool (hashing.py).
+
+
+def json_response(data, status_code=status.HTTP_200_OK, headers=None):
+    # Same renderer as the DRF views, so the bodies match byte for byte
+    response = HttpResponse(JSONRenderer().render(data), content_type="application/json", status=status_code)
+    response["Vary"] = "Accept"
+    for name, value in (headers or {}).items():
+        response[name] = value
+    return response
+
+
+def exception_response(exc, headers=None):
+    """What DRF's exception handler answers for an APIException."""
+    headers = dict(headers or {})
+    if getattr(exc, "wait", None):
+        headers["Retry-After"] = "%d" % exc.wait
+    detail = exc.detail if isinstance(exc.detail, (dict, list)) else {"detail": exc.detail}
+    return json_response(detail, exc.status_code, headers)
+
+
+class AsyncReadView(View):
+    http_method_names = ["get", "head"]
+    admin_only = True  # False for the public (AllowAny) endpoints
+    denied_detail = "Permission denied. (You are not admin)"
+    authenticator = CachedJWTAuthentication()
+
+    async def dispatch(self, request, *args, **kwargs):
+        if self.admin_only:
+            try:
+                user_auth = await self.authenticator.aauthenticate(request)
+            except APIException as exc:
+                return exception_response(exc, self.authenticate_headers(request))
+            if user_auth is None:
+                return json_response(
+                    {"detail": "Authentication credentials were not provided."},
+                    status.HTTP_401_UNAUTHORIZED,
+                    self.authenticate_headers(request),
+                )
+            request.user = user_auth[0]
+            if request.user.role != "admin":
+                return json_response({"detail": self.denied_detail}, status.HTTP_403_FORBIDDEN)
+        return await super().dispatch(request, *args, **kwargs)
+
+    def authenticate_headers(self, request):
+        return {"WWW-Authenticate": self.authenticator.authenticate_header(request)}
+
+
+class PrefetchedPage:
+    """
+    Queryset stand-in for CursorPagination.paginate_queryset, which only orders, filters and slices it.
+    The slice it takes is recorded in queries and answered with rows, the page read beforehand.
+    """
+
+    def __init__(self, queryset, rows, queries):
+        self.queryset = queryset
+        self.rows = rows
+        self.queries = queries
+
+    def order_by(self, *ordering):
+        return PrefetchedPage(self.queryset.order_by(*ordering), self.rows, self.queries)
+
+    def filter(self, *args, **kwargs):
+        return PrefetchedPage(self.queryset.filter(*args, **kwargs), self.rows, self.queries)
+
+    def __getitem__(self, page):
+        self.queries.append(self.queryset[page])
+        return self.rows
+
+
+class AsyncReviewPagination(ReviewPagination):
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset with the page read through the async ORM. A first pass of DRF's own method finds
+        the slice it reads, which is fetched asynchronously; the second pass builds the page and cursors.
+        """
+        queries = []
+        super().paginate_queryset(PrefetchedPage(queryset, [], queries), request, view)
+        if not queries:
+            return None  # Pagination is off for this request
+        rows = [row async for row in queries[0]]
+        return super().paginate_queryset(PrefetchedPage(queryset, rows, []), request, view)
+
+
+class AsyncGiveReviews(AsyncPublicCacheMixin, AsyncReadView):
+    admin_only = False
+    cache_group = GiveReviews.cache_group
+
+    async def get(self, request):
+        paginator = AsyncReviewPagination()
+        page = await paginator.apaginate_queryset(Reviewmodel.objects.all(), Request(request))
+        serializer = ReviewSerializer(page, many=True)
+        return json_response(paginator.get_paginated_response(serializer.data).data)
+
+
+class AsyncReviewSummaryView(AsyncPublicCacheMixin, AsyncReadView):
+    admin_only = False
+    cache_group = ReviewSummaryView.cache_group
+
+    async def get(self, request):
+        summary = await aget_or_compute(
+            "reviews", "summary",
+            lambda: ReviewSummary.objects.filter(pk=ReviewSummary.SUMMARY_ID).afirst(),
+        ) or ReviewSummary()
+        return json_response({
+            "count": summary.count,
+            "mean": summary.mean,
+            "histogram": summary.histogram,
+        })
+
+
+class AsyncSpearPartsList(AsyncReadView):
+
+    async def get(self, request):
+        PartsList_id = request.GET.get("id", None)
+        if PartsList_id:
+            PartsList = PartsListModel.objects.filter(id=PartsList_id)
+        else:
+            PartsList = PartsListModel.objects.all()
+
+        async def serialize():
+            return part_rows.represent([row async for row in part_rows.rows(PartsList)])
+
+        data = await aget_or_compute("parts", f"list:{PartsList_id or 'all'}", serialize)
+        if PartsList_id and not data:
+            return json_response(
+                {"detail": f"PartsList with id {PartsList_id} not found."}, status.HTTP_404_NOT_FOUND
+            )
+        return json_response(data)
+
+
+class AsyncCarWashServiceView(AsyncReadView):
+    denied_detail = "Permission denied.(You are not admin)"
+
+    async def get(self, request):
+        Service_id = request.GET.get("id", None)
+        if Service_id:
+            Service = CarWashService.objects.filter(id=Service_id)
+        else:
+            Service = CarWashService.objects.all()
+
+        rows = [row async for row in service_rows.rows(Service)]
+        if Service_id and not rows:
+            return json_response(
+                {"detail": f"WashService with id {Service_id} not found."}, status.HTTP_404_NOT_FOUND
+            )
+        return json_response(service_rows.represent(rows))
+
+
+class CarWashServiceEvents(AsyncReadView):
+    """Live board of services as server-sent events; serve it under ASGI, each stream stays open."""
+    http_method_names = ["get"]
+    denied_detail = "Permission denied.(You are not admin)"
+
+    async def get(self, request):
+        cursor = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+        try:
+            cursor = int(cursor) if cursor else None
+        except ValueError:
+            return json_response({"detail": "Last-Event-ID must be an event id."}, status.HTTP_400_BAD_REQUEST)
+        follow = request.GET.get("follow", "1") != "0"  # follow=0 replays and closes
+
+        response = StreamingHttpResponse(event_stream(cursor, follow), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"  # nginx: pass events through unbuffered
+        return response
+
+
+class AsyncLoginView(View):
+    """
+    Login with the DRF view's throttles and responses, verifying the password in the hashing pool.
+    When the pool's queue is full the request is shed with 503 before any hashing.
+    """
+    http_method_names = ["post", "options"]
+    drf_view = None
+    serializer_class = None
+    roles = ()
+    role_error = ""
+
+    async def post(self, request):
+        drf_request = Request(request, parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES])
+        try:
+            # The cache round trips stay off the event loop and off the thread of the sync views
+            await sync_to_async(self.drf_view().check_throttles, thread_sensitive=False)(drf_request)
+        except APIException as exc:
+            return self.finalize(drf_request, exception_response(exc))
+
+        serializer = self.serializer_class(data=drf_request.data)
+        if not serializer.is_valid():
+            return self.finalize(drf_request, json_response(serializer.errors, status.HTTP_400_BAD_REQUEST))
+        email = serializer.validated_data["email"]
+        password = serializer.validated_data["password"]
+
+        # ModelBackend.authenticate(), with the hash run in the pool
+        user = await Users.objects.filter(**{Users.USERNAME_FIELD: email}).afirst()
+        try:
+            valid = await averify_password(user, password)
+        except HashingOverloaded:
+            return self.finalize(drf_request, json_response(
+                {"detail": "Too many logins in progress, try again shortly."},
+                status.HTTP_503_SERVICE_UNAVAILABLE,
+                {"Retry-After": "1"},
+            ))
+
+        if valid and user.is_active and await Users.objects.filter(role__in=self.roles, email=email).aexists():
+            token = await sync_to_async(get_tokens_for_user)(user)
+            return self.finalize(drf_request, json_response({"token": token, "message": "success"}))
+        return self.finalize(drf_request, json_response(
+            {
+                "error": {
+                    "non_field_error": ["Email or password is not valid"],
+                    "role_error": [self.role_error],
+                }
+            },
+            status.HTTP_401_UNAUTHORIZED,
+        ))
+
+    def finalize(self, drf_request, response):
+        # RateLimitHeadersMixin for this view
+        rate_limit = getattr(drf_request, "rate_limit", None)
+        if rate_limit is not None:
+            response["X-RateLimit-Limit"] = str(rate_limit[0])
+            response["X-RateLimit-Remaining"] = str(rate_limit[1])
+        return response
+
+
+class AsyncEmployeeLoginView(AsyncLoginView):
+    drf_view = EmployeeLoginView
+    serializer_class = EmployeeLoginSerializer
+    roles = ("employee", "admin")
+    role_error = "You are not registered as a employee"
+
+
+class AsyncCustomerLoginView(AsyncLoginView):
+    drf_view = CustomerLoginView
+    serializer_class = CustomerLoginSerializer
+    roles = ("customer", "admin")
+    role_error = "You are not registered as a customer"
+
+
+def login_view(sync_class, async_class):
+    """The async login view when ASYNC_LOGIN_VIEWS is on (under ASGI), else the DRF view."""
+    if not settings.ASYNC_LOGIN_VIEWS:
+        return sync_class.as_view()
+    return csrf_exempt(async_class.as_view())
+
+
+def read_view(sync_class, async_class):
+    """
+    URL view serving GET/HEAD from the async class and every other method from the DRF view.
+    Returns the plain DRF view when ASYNC_READ_VIEWS is off (e.g. under WSGI).
+    """
+    sync_view = sync_class.as_view()
+    if not settings.ASYNC_READ_VIEWS:
+        return sync_view
+
+    async_view = async_class.as_view()
+    sync_view_async = sync_to_async(sync_view)
+
+    async def view(request, *args, **kwargs):
+        if request.method in ("GET", "HEAD"):
+            return await async_view(request, *args, **kwargs)
+        return await sync_view_async(request, *args, **kwargs)
+
+    view.view_class = sync_class  # Keeps replica_methods visible to ReplicaRoutingMiddleware
+    return csrf_exempt(view)
+
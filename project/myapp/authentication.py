@@ -0,0 +1,78 @@
+from asgiref.sync import sync_to_async
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from .caching import aget_or_compute, get_or_compute
+
+# What the views and middleware read from request.user. Only these are cached: never the password hash.
+# Any other field is loaded from the database on first access (a deferred field). The signal handlers
+# drop a user's entry on every save or delete, so deactivation and password changes take effect at once.
+# Misses read the primary: a user created or deactivated a moment ago must not wait for the replica.
+CACHED_FIELDS = ("id", "email", "name", "role", "is_active")
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that reads the token's user (and with it the role checked by every view)
+    from the reference cache instead of the database on each request.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+
+        row = get_or_compute(
+            "users", user_id,
+            lambda: self.user_model.objects.using(DEFAULT_DB_ALIAS).filter(**{api_settings.USER_ID_FIELD: user_id})
+            .values(*CACHED_FIELDS).first(),
+        )
+        user = self.from_row(row)
+        if user is None or not self.passes_checks(user, validated_token):
+            # Let the stock lookup raise the proper error (or find a fresher row)
+            return super().get_user(validated_token)
+        return user
+
+    async def aauthenticate(self, request):
+        """authenticate() for the async views, reading the user through the async ORM."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return await sync_to_async(super().get_user)(validated_token)
+
+        row = await aget_or_compute(
+            "users", user_id,
+            lambda: self.user_model.objects.using(DEFAULT_DB_ALIAS).filter(**{api_settings.USER_ID_FIELD: user_id})
+            .values(*CACHED_FIELDS).afirst(),
+        )
+        user = self.from_row(row)
+        if user is None or not self.passes_checks(user, validated_token):
+            return await sync_to_async(super().get_user)(validated_token)
+        return user
+
+    def from_row(self, row):
+        """A user instance from the cached fields, the others deferred."""
+        if row is None:
+            return None
+        # from_db() takes the loaded values in model field order
+        names = [field.attname for field in self.user_model._meta.concrete_fields if field.attname in row]
+        return self.user_model.from_db(DEFAULT_DB_ALIAS, names, [row[name] for name in names])
+
+    @staticmethod
+    def passes_checks(user, validated_token):
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            return False
+        if getattr(api_settings, "CHECK_REVOKE_TOKEN", False):
+            from rest_framework_simplejwt.utils import get_md5_hash_password
+            return validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) == get_md5_hash_password(user.password)
+        return True
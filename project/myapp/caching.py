@@ -0,0 +1,82 @@
+import time
+
+from django.core.cache import cache
+
+from .metrics import registry
+
+# Versioned cache for hot reference reads (parts catalog, users, reviews).
+# Every key lives under a namespace version; bumping the version drops the whole namespace at once,
+# deleting a single key drops one entry. The signal handlers in signals.py keep both in step with writes.
+
+DEFAULT_TIMEOUT = 300
+_MISSING = object()
+
+
+def _version_key(namespace):
+    return f"ref:{namespace}:version"
+
+
+def namespace_version(namespace):
+    # A fresh version starts from the clock, so it never reuses the number of an evicted one
+    return cache.get_or_set(_version_key(namespace), time.time_ns, None)
+
+
+async def anamespace_version(namespace):
+    return await cache.aget_or_set(_version_key(namespace), time.time_ns, None)
+
+
+def make_key(namespace, key):
+    return f"ref:{namespace}:v{namespace_version(namespace)}:{key}"
+
+
+async def amake_key(namespace, key):
+    return f"ref:{namespace}:v{await anamespace_version(namespace)}:{key}"
+
+
+def make_keys(namespace, keys):
+    """make_key for many keys with a single version lookup, for get_many/set_many."""
+    version = namespace_version(namespace)
+    return [f"ref:{namespace}:v{version}:{key}" for key in keys]
+
+
+def get_or_compute(namespace, key, compute, timeout=DEFAULT_TIMEOUT):
+    """Return the cached value for key, computing and storing it on a miss. None is never cached."""
+    cache_key = make_key(namespace, key)
+    value = cache.get(cache_key, _MISSING)
+    if value is not _MISSING:
+        registry.count_cache(namespace, hit=True)
+        return value
+
+    registry.count_cache(namespace, hit=False)
+    value = compute()
+    if value is not None:
+        cache.set(cache_key, value, timeout)
+    return value
+
+
+async def aget_or_compute(namespace, key, compute, timeout=DEFAULT_TIMEOUT):
+    """get_or_compute for async views; compute is a coroutine function (e.g. an async ORM query)."""
+    cache_key = await amake_key(namespace, key)
+    value = await cache.aget(cache_key, _MISSING)
+    if value is not _MISSING:
+        registry.count_cache(namespace, hit=True)
+        return value
+
+    registry.count_cache(namespace, hit=False)
+    value = await compute()
+    if value is not None:
+        await cache.aset(cache_key, value, timeout)
+    return value
+
+
+def invalidate(namespace, key=None):
+    """Drop one key, or the whole namespace when no key is given (returns the new namespace version)."""
+    if key is not None:
+        cache.delete(make_key(namespace, key))
+        return None
+    try:
+        return cache.incr(_version_key(namespace))
+    except ValueError:
+        version = time.time_ns()
+        cache.set(_version_key(namespace), version, None)
+        return version
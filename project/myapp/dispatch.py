@@ -0,0 +1,209 @@
+import heapq
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Sum
+from django.db.models.functions import Coalesce
+from django.utils.timezone import now
+
+from .caching import invalidate, namespace_version
+from .models import CarWashService, Users
+
+# Auto-dispatch of new services to the least-loaded active employee, fastest first for the service type.
+# Every process keeps a priority queue per service type of (services in hand, average seconds, employee id),
+# updated after commit when a service starts or completes. The queues are only a candidate order: the load
+# of record is Users.services_inhand_count, and the pick is confirmed on the employee row under
+# SELECT ... FOR UPDATE, so concurrent intakes never act on a stale load. When every candidate tried turns
+# out stale, the pick falls back to a locked query ordered by load, so a stale board never refuses a service.
+# With a shared cache (REDIS_URL) other processes' changes arrive through the "dispatch" namespace version;
+# without one, the board is simply rebuilt every DISPATCH_BOARD_SECONDS.
+
+NAMESPACE = "dispatch"
+UNKNOWN_SPEED = float("inf")  # No completed service of this type yet, ranks after known speeds at equal load
+MAX_ATTEMPTS = 5
+
+
+class DispatchBoard:
+
+    def __init__(self, version, loads, speeds, speeds_loaded_at):
+        self.version = version
+        self.loads = loads  # employee id -> services in hand
+        self.speeds = speeds  # (employee id, service type) -> [total seconds, completed services]
+        self.speeds_loaded_at = speeds_loaded_at  # time.monotonic() of the last full aggregate
+        self.built_at = time.monotonic()
+        self.heaps = {}  # service type -> heap of keys, built on first use
+
+    def key(self, employee_id, service_type):
+        total, done = self.speeds.get((employee_id, service_type), (0, 0))
+        return (self.loads[employee_id], total / done if done else UNKNOWN_SPEED, employee_id)
+
+    def heap(self, service_type):
+        if service_type not in self.heaps:
+            heap = [self.key(employee_id, service_type) for employee_id in self.loads]
+            heapq.heapify(heap)
+            self.heaps[service_type] = heap
+        return self.heaps[service_type]
+
+    def peek(self, service_type):
+        """Best current key for the service type; outdated entries are dropped on the way (lazy deletion)."""
+        heap = self.heap(service_type)
+        while heap:
+            entry = heap[0]
+            employee_id = entry[2]
+            if employee_id in self.loads and entry == self.key(employee_id, service_type):
+                return entry
+            heapq.heappop(heap)
+        return None
+
+    def reprioritize(self, employee_id):
+        for service_type, heap in self.heaps.items():
+            heapq.heappush(heap, self.key(employee_id, service_type))
+
+    def set_load(self, employee_id, load):
+        if load is None:
+            self.loads.pop(employee_id, None)  # No longer an active employee
+            return
+        self.loads[employee_id] = load
+        self.reprioritize(employee_id)
+
+    def record_start(self, employee_id):
+        if employee_id in self.loads:
+            self.set_load(employee_id, self.loads[employee_id] + 1)
+
+    def record_completion(self, employee_id, service_type, seconds):
+        if employee_id not in self.loads:
+            return
+        total, done = self.speeds.get((employee_id, service_type), (0, 0))
+        self.speeds[(employee_id, service_type)] = [total + seconds, done + 1]
+        self.set_load(employee_id, max(self.loads[employee_id] - 1, 0))
+
+
+_board = None
+_lock = threading.Lock()
+
+
+def load_speeds():
+    """Total seconds and count of the completed services per (employee, service type), over the recent window."""
+    since = now() - timedelta(days=settings.DISPATCH_SPEED_WINDOW_DAYS)
+    completed = (
+        CarWashService.objects.using(DEFAULT_DB_ALIAS)
+        .filter(status="completed", employee__isnull=False, services_end_date__gte=since)
+        .values("employee_id", "service_type")
+        .annotate(
+            taken=Sum(ExpressionWrapper(F("services_end_date") - F("services_start_date"), output_field=DurationField())),
+            done=Count("id"),
+        )
+    )
+    return {
+        (row["employee_id"], row["service_type"]): [row["taken"].total_seconds(), row["done"]] for row in completed
+    }
+
+
+def load_board(version, previous=None):
+    """
+    A board with fresh loads. The speeds of the previous board are carried over (they are only a tie-breaker
+    and already include the completions this process has seen) until they are DISPATCH_SPEEDS_SECONDS old.
+    """
+    # Loads come from the primary, the pick is confirmed there as well
+    loads = dict(
+        Users.objects.using(DEFAULT_DB_ALIAS)
+        .filter(role="employee", is_active=True)
+        .values_list("id", Coalesce("services_inhand_count", 0))
+    )
+    if previous is not None and time.monotonic() - previous.speeds_loaded_at < settings.DISPATCH_SPEEDS_SECONDS:
+        return DispatchBoard(version, loads, previous.speeds, previous.speeds_loaded_at)
+    return DispatchBoard(version, loads, load_speeds(), time.monotonic())
+
+
+def dispatch_board():
+    """This process' board, rebuilt when the loads changed since it was built or it is older than allowed."""
+    global _board
+    version = namespace_version(NAMESPACE)
+    with _lock:
+        if (
+            _board is None
+            or _board.version != version
+            or time.monotonic() - _board.built_at >= settings.DISPATCH_BOARD_SECONDS
+        ):
+            _board = load_board(version, _board)
+        return _board
+
+
+def reset_board():
+    """Forget this process' board; the next dispatch builds a new one from scratch."""
+    global _board
+    with _lock:
+        _board = None
+
+
+def publish(update):
+    """Apply a change to the local board and tell the other processes, keeping the local board if it is current."""
+    with _lock:
+        board = _board
+        if board is None or board.version != namespace_version(NAMESPACE):
+            board = None  # Rebuilt on the next dispatch, from data that already has this change
+        else:
+            update(board)
+    version = invalidate(NAMESPACE)
+    if board is None:
+        return
+    with _lock:
+        if board is _board and version == board.version + 1:
+            board.version = version  # No other process moved in between, the local board already has this change
+
+
+def assign_employee(service_type):
+    """
+    Pick and lock the best active employee for a new service of service_type, or return None when there is
+    no active employee. Must run inside the transaction that creates the service; the row lock holds off
+    concurrent intakes until CarWashService.save() has counted the new service against the employee.
+    """
+    board = dispatch_board()
+    for _ in range(MAX_ATTEMPTS):
+        with _lock:
+            entry = board.peek(service_type)
+        if entry is None:
+            break
+        load, _, employee_id = entry
+        employee = (
+            Users.objects.select_for_update()
+            .filter(pk=employee_id, role="employee", is_active=True)
+            .first()
+        )
+        current = None if employee is None else (employee.services_inhand_count or 0)
+        if current == load:
+            return employee
+        # Another intake or a completion moved this employee since the board saw it
+        with _lock:
+            board.set_load(employee_id, current)
+
+    # The board is too far behind (or empty): take the least-loaded employee straight from the rows
+    employee = (
+        Users.objects.select_for_update()
+        .filter(role="employee", is_active=True)
+        .order_by(Coalesce("services_inhand_count", 0), "id")
+        .first()
+    )
+    if employee is not None:
+        with _lock:
+            board.set_load(employee.pk, employee.services_inhand_count or 0)
+    return employee
+
+
+def service_started(employee_id):
+    publish(lambda board: board.record_start(employee_id))
+
+
+def service_completed(employee_id, service_type, seconds):
+    publish(lambda board: board.record_completion(employee_id, service_type, seconds))
+
+
+def services_completed(completions):
+    """service_completed() for many (employee id, service type, seconds) at once, with one version bump."""
+    def update(board):
+        for employee_id, service_type, seconds in completions:
+            board.record_completion(employee_id, service_type, seconds)
+    publish(update)
@@ -0,0 +1,152 @@
+import asyncio
+from collections import deque
+
+from rest_framework.renderers import JSONRenderer
+
+from .fast_serializers import service_rows
+from .models import CarWashService, ServiceEvent
+
+# Server-sent events for the live service board. One feed task per process reads new ServiceEvent rows
+# and fans them out to every connected stream, so the number of screens does not multiply database reads.
+# Writes in this process wake the feed right after commit; writes from other processes are picked up by
+# its poll. Reconnecting clients send Last-Event-ID and replay the rows they missed from the table, as long
+# as prune_service_events has not deleted them (SERVICE_EVENT_RETENTION_HOURS).
+
+POLL_SECONDS = 2.0
+KEEPALIVE_SECONDS = 15.0
+BATCH_SIZE = 500
+QUEUE_SIZE = 1000  # A stream further behind than this is closed and replays after reconnecting
+LOOKBACK = 100  # Ids allocated before last_id may commit after it, re-read this many below the cursor
+
+
+class RecentIds:
+    """Bounded set of the most recent event ids, for dropping duplicates."""
+
+    def __init__(self, size=10 * LOOKBACK):
+        self.order = deque()
+        self.ids = set()
+        self.size = size
+
+    def add(self, event_id):
+        if event_id in self.ids:
+            return False
+        self.order.append(event_id)
+        self.ids.add(event_id)
+        if len(self.order) > self.size:
+            self.ids.discard(self.order.popleft())
+        return True
+
+
+async def latest_event_id():
+    return await ServiceEvent.objects.order_by("-id").values_list("id", flat=True).afirst() or 0
+
+
+class ServiceEventFeed:
+
+    def __init__(self):
+        self.subscribers = set()
+        self.loop = None
+        self.wakeup = None
+        self.task = None
+
+    def subscribe(self):
+        queue = asyncio.Queue()
+        self.subscribers.add(queue)
+        loop = asyncio.get_running_loop()
+        if self.task is None or self.task.done() or self.loop is not loop:
+            self.loop = loop
+            self.wakeup = asyncio.Event()
+            self.task = loop.create_task(self.run())
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+
+    def notify(self):
+        """Wake the feed after a commit in this process; callable from any thread."""
+        loop = self.loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self.wakeup.set)
+
+    async def run(self):
+        last_id = await latest_event_id()
+        seen = RecentIds()
+        while self.subscribers:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+
+            events = [
+                event async for event in
+                ServiceEvent.objects.filter(id__gt=last_id - LOOKBACK).order_by("id")[:BATCH_SIZE + LOOKBACK]
+            ]
+            for event in events:
+                last_id = max(last_id, event.id)
+                if not seen.add(event.id):
+                    continue
+                for queue in list(self.subscribers):
+                    if queue.qsize() >= QUEUE_SIZE:
+                        self.subscribers.discard(queue)
+                        queue.put_nowait(None)  # Tells the stream to close
+                    else:
+                        queue.put_nowait(event)
+            if len(events) > BATCH_SIZE:
+                self.wakeup.set()  # More rows are waiting
+
+
+feed = ServiceEventFeed()
+
+
+def format_event(event_id, kind, data):
+    return f"id: {event_id}\nevent: {kind}\ndata: {data}\n\n"
+
+
+async def in_progress_snapshot():
+    rows = [row async for row in service_rows.rows(CarWashService.objects.filter(status="in_progress"))]
+    return service_rows.represent(rows)
+
+
+async def event_stream(cursor=None, follow=True):
+    """
+    SSE body for the service board. Without a cursor it starts with a snapshot of the services in progress,
+    with a cursor it replays the events after it. With follow it then streams events as they commit.
+    A cursor whose event was pruned may have missed pruned events too, so it gets a snapshot instead.
+    """
+    queue = feed.subscribe() if follow else None
+    sent = RecentIds()
+    try:
+        yield f"retry: {int(POLL_SECONDS * 1000)}\n\n"
+        if cursor is not None and not await ServiceEvent.objects.filter(id__lte=cursor).aexists():
+            cursor = None
+        if cursor is None:
+            cursor = await latest_event_id()
+            snapshot = JSONRenderer().render(await in_progress_snapshot()).decode()
+            yield format_event(cursor, "snapshot", snapshot)
+
+        while True:
+            replay = [
+                event async for event in
+                ServiceEvent.objects.filter(id__gt=cursor).order_by("id")[:BATCH_SIZE]
+            ]
+            for event in replay:
+                cursor = event.id
+                sent.add(event.id)
+                yield format_event(event.id, event.kind, event.data)
+            if len(replay) < BATCH_SIZE:
+                break
+
+        while follow:
+            try:
+                event = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"  # Keeps proxies from closing an idle stream
+                continue
+            if event is None:
+                break  # Fell behind, the client reconnects with Last-Event-ID and replays
+            if sent.add(event.id):
+                yield format_event(event.id, event.kind, event.data)
+    finally:
+        if queue is not None:
+            feed.unsubscribe(queue)
@@ -0,0 +1,69 @@
+import csv
+import json
+
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+
+# Row streams for the service history export. Both consume a values() iterator lazily,
+# so memory stays flat however many rows are exported. Under ASGI Django buffers a sync
+# iterator whole before sending it (StreamingHttpResponse runs it through sync_to_async(list)),
+# so there the views pass the async variants an async iterator, e.g. values().aiterator().
+
+SERVICE_EXPORT_FIELDS = [
+    "id", "service_type", "status", "employee_id", "customer_id", "vehicle_number",
+    "final_price", "services_start_date", "services_end_date",
+]
+
+
+class Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller."""
+
+    def write(self, value):
+        return value
+
+
+def csv_rows(rows, fields):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([row[field] for field in fields])
+
+
+def ndjson_rows(rows, fields):
+    encoder = DjangoJSONEncoder(separators=(",", ":"))
+    for row in rows:
+        yield encoder.encode({field: row[field] for field in fields}) + "\n"
+
+
+async def acsv_rows(rows, fields):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    async for row in rows:
+        yield writer.writerow([row[field] for field in fields])
+
+
+async def andjson_rows(rows, fields):
+    encoder = DjangoJSONEncoder(separators=(",", ":"))
+    async for row in rows:
+        yield encoder.encode({field: row[field] for field in fields}) + "\n"
+
+
+async def aiterate(rows):
+    """An already computed list of rows as an async iterator, for the async row streams."""
+    for row in rows:
+        yield row
+
+
+def serves_async(request):
+    """Whether the response is sent by the ASGI handler, which streams only async iterators."""
+    return isinstance(getattr(request, "_request", request), ASGIRequest)
+
+
+EXPORT_FORMATS = {
+    "csv": (csv_rows, "text/csv"),
+    "ndjson": (ndjson_rows, "application/x-ndjson"),
+}
+ASYNC_EXPORT_FORMATS = {
+    "csv": acsv_rows,
+    "ndjson": andjson_rows,
+}
@@ -0,0 +1,57 @@
+from rest_framework import serializers
+
+from .serializer import CarWashServiceSerializer, PartsListSerializer, PurchaseSerializer, UserSee
+
+
+class ValuesSerializer:
+    """
+    Read-only twin of a DRF ModelSerializer for list endpoints.
+
+    Rows come from a values() projection of the serializer's readable fields and go through
+    a mapper list compiled once from the DRF fields, skipping the per-row field machinery.
+    The output is the same as serializer_class(queryset, many=True).data.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self.mappers = []  # (output key, values() key, converter or None for pass-through)
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            self.mappers.append((name, field.source, self.compile_field(field)))
+        self.value_fields = [source for _, source, _ in self.mappers]
+
+    @staticmethod
+    def compile_field(field):
+        # values() already hands back the related pk and the stored choice key
+        if isinstance(field, (serializers.PrimaryKeyRelatedField, serializers.ChoiceField)):
+            return None
+        if isinstance(field, serializers.IntegerField):
+            return int
+        if isinstance(field, serializers.CharField):
+            return str
+        # Dates, decimals and anything else keep DRF's own formatting
+        return field.to_representation
+
+    def rows(self, queryset):
+        return queryset.values(*self.value_fields)
+
+    def represent(self, rows):
+        mappers = self.mappers
+        data = []
+        for row in rows:
+            item = {}
+            for name, source, convert in mappers:
+                value = row[source]
+                item[name] = value if convert is None or value is None else convert(value)
+            data.append(item)
+        return data
+
+    def data(self, queryset):
+        return self.represent(self.rows(queryset))
+
+
+user_rows = ValuesSerializer(UserSee)
+service_rows = ValuesSerializer(CarWashServiceSerializer)
+part_rows = ValuesSerializer(PartsListSerializer)
+purchase_rows = ValuesSerializer(PurchaseSerializer)
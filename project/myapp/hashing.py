@@ -0,0 +1,63 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+# Password hashing for the async login views. PBKDF2 is CPU-bound, and under ASGI every sync login hashes on
+# a thread of its own, so a spike puts as many hashes on the CPUs as there are logins in flight. A small
+# dedicated pool caps the hashes running at once (hashlib releases the GIL, so they still run in parallel)
+# and keeps them off the event loop. Work beyond the pool and its queue is refused right away: a login spike
+# then gets 503s instead of making every other request wait behind it.
+
+
+class HashingOverloaded(Exception):
+    pass
+
+
+class HashingPool:
+
+    def __init__(self, workers, queue_size):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hashing")
+        self.limit = workers + queue_size
+        self.pending = 0
+        self.lock = threading.Lock()
+
+    def release(self, future):
+        with self.lock:
+            self.pending -= 1
+
+    def submit(self, fn, *args):
+        """Run fn in the pool and return an awaitable, or raise HashingOverloaded when the queue is full."""
+        with self.lock:
+            if self.pending >= self.limit:
+                raise HashingOverloaded
+            self.pending += 1
+        # Released when the hash finishes, not when the awaiting request goes away
+        future = self.executor.submit(fn, *args)
+        future.add_done_callback(self.release)
+        return asyncio.wrap_future(future)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def hashing_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = HashingPool(settings.PASSWORD_HASHING_WORKERS, settings.PASSWORD_HASHING_QUEUE)
+        return _pool
+
+
+async def averify_password(user, password):
+    """
+    user.check_password() off the request path. Without a user the default hasher still runs once,
+    like ModelBackend, so response times do not tell which emails exist. Hashes are not upgraded here.
+    """
+    if user is None:
+        await hashing_pool().submit(make_password, password)
+        return False
+    return await hashing_pool().submit(check_password, password, user.password)
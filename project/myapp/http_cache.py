@@ -0,0 +1,114 @@
+import hashlib
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from .caching import anamespace_version, invalidate, namespace_version
+
+
+# Conditional GET and server-side response caching for the public (AllowAny) endpoints.
+# Each group is a caching.py namespace, so its version is clock-seeded the same way and a lost
+# version key can never bring back responses stored under an earlier one.
+def _namespace(group):
+    return f"http:{group}"
+
+
+def _response_key(group, version, request):
+    url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    accept = hashlib.md5(request.META.get("HTTP_ACCEPT", "").encode()).hexdigest()
+    return f"http_cache:{group}:{version}:{url}:{accept}"
+
+
+def response_cache_key(group, request):
+    """Cache key for one rendered response: group version, full URL (query string included) and Accept."""
+    return _response_key(group, namespace_version(_namespace(group)), request)
+
+
+async def aresponse_cache_key(group, request):
+    return _response_key(group, await anamespace_version(_namespace(group)), request)
+
+
+def invalidate_response_cache(group):
+    """Drop every cached response of a group by moving it to a new version."""
+    invalidate(_namespace(group))
+
+
+def cacheable(response):
+    """What is cached of a rendered 200 response; None for responses that must not be cached."""
+    if response.status_code != 200 or response.streaming:
+        return None  # Errors and redirects are never cached
+    if hasattr(response, "render"):
+        response.render()
+    return {
+        "content": response.content,
+        "content_type": response["Content-Type"],
+        "etag": '"%s"' % hashlib.md5(response.content).hexdigest(),
+        "last_modified": int(timezone.now().timestamp()),
+    }
+
+
+def store_response(key, response, timeout):
+    """Cache a rendered 200 response; returns None for responses that must not be cached."""
+    cached = cacheable(response)
+    if cached is not None:
+        cache.set(key, cached, timeout)
+    return cached
+
+
+async def astore_response(key, response, timeout):
+    cached = cacheable(response)
+    if cached is not None:
+        await cache.aset(key, cached, timeout)
+    return cached
+
+
+def cached_response(request, cached, max_age):
+    response = HttpResponse(cached["content"], content_type=cached["content_type"])
+    response["ETag"] = cached["etag"]
+    response["Last-Modified"] = http_date(cached["last_modified"])
+    patch_cache_control(response, public=True, max_age=max_age)
+    patch_vary_headers(response, ["Accept"])
+
+    # Answer 304 Not Modified when the client already has this version
+    return get_conditional_response(
+        request, etag=cached["etag"], last_modified=cached["last_modified"], response=response
+    )
+
+
+class PublicCacheMixin:
+    cache_group = None  # Views sharing a group are invalidated together
+    cache_max_age = 60  # Seconds browsers and proxies may reuse a response
+    cache_timeout = 300  # Seconds a response stays in the server-side cache
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return super().dispatch(request, *args, **kwargs)
+
+        key = response_cache_key(self.cache_group, request)
+        cached = cache.get(key)
+        if cached is None:
+            response = super().dispatch(request, *args, **kwargs)
+            cached = store_response(key, response, self.cache_timeout)
+            if cached is None:
+                return response
+        return cached_response(request, cached, self.cache_max_age)
+
+
+class AsyncPublicCacheMixin(PublicCacheMixin):
+    """PublicCacheMixin for async views, reading and writing the cache through its async API."""
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return await super(PublicCacheMixin, self).dispatch(request, *args, **kwargs)
+
+        key = await aresponse_cache_key(self.cache_group, request)
+        cached = await cache.aget(key)
+        if cached is None:
+            response = await super(PublicCacheMixin, self).dispatch(request, *args, **kwargs)
+            cached = await astore_response(key, response, self.cache_timeout)
+            if cached is None:
+                return response
+        return cached_response(request, cached, self.cache_max_age)
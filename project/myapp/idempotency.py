@@ -0,0 +1,85 @@
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+# Idempotency-Key support for POST handlers. The key row is inserted in the same transaction as the
+# view's writes and stores the response before commit. A duplicate sent while the first is running
+# blocks on the unique index until that transaction ends, then replays its response; if the first
+# rolled back, the duplicate runs the view itself.
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint(request):
+    data = request.data
+    if hasattr(data, "lists"):
+        data = dict(data.lists())  # Form and multipart posts
+    body = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(f"{request.method} {request.path}\n{body}".encode()).hexdigest()
+
+
+def replay(record, fingerprint):
+    if record.fingerprint != fingerprint:
+        return Response(
+            {"detail": f"This {HEADER} was already used for a different request."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    return Response(
+        json.loads(record.response_body),
+        status=record.response_status,
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+def idempotent(handler):
+    """Make an APIView handler replay its stored response when retried with the same Idempotency-Key."""
+
+    @wraps(handler)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return handler(self, request, *args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {"detail": f"{HEADER} must be 1 to {MAX_KEY_LENGTH} characters."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        fingerprint = request_fingerprint(request)
+        now = timezone.now()
+        with transaction.atomic():
+            # Expired keys are free again
+            IdempotencyKey.objects.filter(user=request.user, key=key, expires_at__lte=now).delete()
+            try:
+                with transaction.atomic():
+                    record = IdempotencyKey.objects.create(
+                        user=request.user, key=key, fingerprint=fingerprint,
+                        response_status=0, response_body="",
+                        expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+                    )
+            except IntegrityError:
+                # Committed by an earlier request (waited for above if it was still running)
+                return replay(IdempotencyKey.objects.get(user=request.user, key=key), fingerprint)
+
+            response = handler(self, request, *args, **kwargs)
+            if response.status_code >= 500 or not isinstance(response, Response):
+                record.delete()  # Server errors and redirects are not stored, a retry runs the view again
+                return response
+
+            record.response_status = response.status_code
+            record.response_body = JSONRenderer().render(response.data).decode()
+            record.save(update_fields=["response_status", "response_body"])
+        return response
+
+    return wrapper
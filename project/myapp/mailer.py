@@ -0,0 +1,64 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.mail import get_connection
+
+# Background delivery of the completion mails sent by the bulk endpoints. A bulk completion can mail hundreds
+# of customers, and an SMTP round trip per message inside the request would hold the worker for all of them.
+# Batches go to a single sender thread instead, one SMTP connection per batch. The queue is bounded: when
+# the mail server cannot keep up, new batches are refused (and logged) rather than piling up in memory.
+
+logger = logging.getLogger(__name__)
+
+
+class MailQueueFull(Exception):
+    pass
+
+
+class MailQueue:
+
+    def __init__(self, queue_size):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="completion-mail")
+        self.limit = queue_size
+        self.pending = 0
+        self.lock = threading.Lock()
+
+    def release(self, future):
+        with self.lock:
+            self.pending -= 1
+
+    def submit(self, messages):
+        """Send messages in the background, or raise MailQueueFull when too many batches are waiting."""
+        with self.lock:
+            if self.pending >= self.limit:
+                raise MailQueueFull
+            self.pending += 1
+        future = self.executor.submit(send_batch, messages)
+        future.add_done_callback(self.release)
+        return future
+
+    def join(self):
+        """Wait until every batch queued so far has been handled (one sender, so the queue is FIFO)."""
+        self.executor.submit(lambda: None).result()
+
+
+def send_batch(messages):
+    try:
+        return get_connection().send_messages(messages)
+    except Exception:
+        logger.exception("Sending %s completion emails failed", len(messages))
+        return 0
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def mail_queue():
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = MailQueue(settings.COMPLETION_EMAIL_QUEUE)
+        return _queue
@@ -0,0 +1,39 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from myapp.archive import archive_batch
+
+
+class Command(BaseCommand):
+    help = "Move completed services older than the archive age to the archive table in batches (run it from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than-days", type=int, default=settings.SERVICE_ARCHIVE_AFTER_DAYS,
+                            help="Archive services completed more than this many days ago.")
+        parser.add_argument("--batch-size", type=int, default=1000,
+                            help="Services moved per transaction, keeps each lock short.")
+        parser.add_argument("--pause", type=float, default=0.0,
+                            help="Seconds to wait between batches, to leave room for the desk traffic.")
+
+    def handle(self, *args, **options):
+        if options["older_than_days"] < 1:
+            raise CommandError("--older-than-days must be at least 1.")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        cutoff = timezone.now() - timedelta(days=options["older_than_days"])
+        archived = batches = 0
+        while True:
+            moved = archive_batch(cutoff, options["batch_size"])
+            if not moved:
+                break
+            archived += moved
+            batches += 1
+            if moved < options["batch_size"]:
+                break
+            if options["pause"]:
+                time.sleep(options["pause"])
+        self.stdout.write(f"Archived {archived} services completed before {cutoff:%Y-%m-%d %H:%M} in {batches} batches.")
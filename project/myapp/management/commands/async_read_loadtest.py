@@ -0,0 +1,84 @@
+import asyncio
+import threading
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from myapp.asgi_driver import asgi_request, percentile, reload_urls
+from myapp.models import Users
+
+DEFAULT_PATHS = ["/api/see_reviews/", "/api/review_summary/", "/api/spear_parts_list/", "/api/carwash_service/"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive project.asgi.application in-process with many concurrent slow clients on the read-only "
+        "endpoints, once with the DRF views and once with the async views, and compare."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=100, help="Concurrent simulated clients.")
+        parser.add_argument("--requests", type=int, default=5, help="Requests per client.")
+        parser.add_argument("--read-delay", type=float, default=0.05,
+                            help="Seconds each client takes to read a response chunk.")
+        parser.add_argument("--path", action="append", dest="paths", help="Endpoint to call (repeatable).")
+        parser.add_argument("--email", help="User the JWT is minted for (defaults to the first admin).")
+        parser.add_argument("--mode", choices=["both", "sync", "async"], default="both")
+
+    def handle(self, *args, **options):
+        user = (
+            Users.objects.filter(email=options["email"]).first() if options["email"]
+            else Users.objects.filter(role="admin").first()
+        )
+        if user is None:
+            raise CommandError("No user to authenticate as; create an admin or pass --email.")
+        headers = {"Authorization": f"Bearer {RefreshToken.for_user(user).access_token}"}
+
+        modes = {"both": [False, True], "sync": [False], "async": [True]}[options["mode"]]
+        for use_async in modes:
+            with override_settings(ASYNC_READ_VIEWS=use_async):
+                reload_urls()
+                cache.clear()
+                result = asyncio.run(self.run_clients(options, options["paths"] or DEFAULT_PATHS, headers))
+            self.report("async views" if use_async else "DRF views", result)
+        reload_urls()
+
+    async def run_clients(self, options, paths, headers):
+        from project.asgi import application
+
+        timings, errors = [], 0
+        peak_threads = threading.active_count()
+
+        async def client(number):
+            nonlocal errors
+            for i in range(options["requests"]):
+                path = paths[(number + i) % len(paths)]
+                result = await asgi_request(application, "GET", path, headers, read_delay=options["read_delay"])
+                if result.status != 200:
+                    errors += 1
+                timings.append(result.seconds)
+
+        async def sample_threads():
+            nonlocal peak_threads
+            while True:
+                peak_threads = max(peak_threads, threading.active_count())
+                await asyncio.sleep(0.01)
+
+        sampler = asyncio.create_task(sample_threads())
+        start = time.perf_counter()
+        await asyncio.gather(*(client(n) for n in range(options["clients"])))
+        elapsed = time.perf_counter() - start
+        sampler.cancel()
+        return {"timings": timings, "errors": errors, "elapsed": elapsed, "peak_threads": peak_threads}
+
+    def report(self, label, result):
+        timings = result["timings"]
+        self.stdout.write(
+            f"{label:<12} requests={len(timings)} errors={result['errors']} "
+            f"throughput={len(timings) / result['elapsed']:.1f}/s "
+            f"p50={percentile(timings, 50) * 1000:.1f}ms p95={percentile(timings, 95) * 1000:.1f}ms "
+            f"p99={percentile(timings, 99) * 1000:.1f}ms peak_threads={result['peak_threads']}"
+        )
@@ -0,0 +1,251 @@
+import asyncio
+import itertools
+import json
+import random
+import string
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import date
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import got_request_exception
+from django.db import OperationalError
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from myapp.asgi_driver import asgi_request, percentile
+from myapp.caching import invalidate
+from myapp.models import CarWashService, PartsListModel, ServiceEvent, Users
+
+# Replays the day of the reception desks: every simulated tablet logs in as its own employee, then takes in
+# cars, completes them, sells parts and looks things up, each from its own address (so the IP throttles see
+# separate clients). The accounts and the part are created for the run and deleted with everything they
+# produced afterwards, unless --keep-data.
+
+DEFAULT_MIX = "login=1,intake=4,complete=4,purchase=2,list=5"
+PASSWORD = "desk-loadtest-password"
+EMAIL_DOMAIN = "loadtest.invalid"
+REQUEST_ID_HEADER = "X-Loadtest-Request"
+LOCK_SQLSTATES = ("55P03", "40P01")  # lock_not_available (lock_timeout), deadlock_detected
+
+
+def is_lock_timeout(exc):
+    """A statement that gave up waiting for a lock: PostgreSQL lock_timeout or deadlock, SQLite busy timeout."""
+    if not isinstance(exc, OperationalError):
+        return False
+    cause = exc.__cause__
+    if (getattr(cause, "sqlstate", None) or getattr(cause, "pgcode", None)) in LOCK_SQLSTATES:
+        return True
+    return "database is locked" in str(exc) or "database table is locked" in str(exc)
+
+
+def parse_mix(value):
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        if name not in ("login", "intake", "complete", "purchase", "list") or not weight.isdigit():
+            raise CommandError(f"Bad --mix entry {item!r}; expected e.g. {DEFAULT_MIX}.")
+        mix[name] = int(weight)
+    if not any(mix.values()):
+        raise CommandError("--mix needs at least one non-zero weight.")
+    return mix
+
+
+def vehicle_number(client, sequence):
+    # 'XX00xx0000', unique per client and intake
+    letters = string.ascii_lowercase
+    return f"LT{client // 676 % 100:02d}{letters[client // 26 % 26]}{letters[client % 26]}{sequence % 10000:04d}"
+
+
+class RouteStats:
+
+    def __init__(self):
+        self.timings = []
+        self.statuses = Counter()
+        self.errors = 0
+        self.lock_timeouts = 0
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive project.asgi.application in-process with concurrent simulated desk tablets replaying a mix of "
+        "login, service intake, completion, parts sale and listing calls, and report per route throughput, "
+        "latency percentiles, errors and lock-wait timeouts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=200, help="Concurrent simulated tablets.")
+        parser.add_argument("--requests", type=int, default=20, help="Calls per tablet after its login.")
+        parser.add_argument("--mix", default=DEFAULT_MIX, help="Relative weights of the calls.")
+        parser.add_argument("--think-time", type=float, default=0.0,
+                            help="Mean seconds a tablet waits between calls (exponential).")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--send-mail", action="store_true",
+                            help="Send the completion mails through EMAIL_BACKEND instead of dropping them.")
+        parser.add_argument("--keep-data", action="store_true", help="Keep the accounts and rows of the run.")
+
+    def handle(self, *args, **options):
+        if options["clients"] < 1:
+            raise CommandError("--clients must be at least 1.")
+        mix = parse_mix(options["mix"])
+        fixtures = self.create_fixtures(options["clients"])
+        lock_timeouts = set()
+
+        def record_lock_timeout(sender, request=None, **kwargs):
+            if request is not None and is_lock_timeout(sys.exc_info()[1]):
+                lock_timeouts.add(request.headers.get(REQUEST_ID_HEADER))
+
+        got_request_exception.connect(record_lock_timeout)
+        mail = {} if options["send_mail"] else {"EMAIL_BACKEND": "django.core.mail.backends.dummy.EmailBackend"}
+        try:
+            with override_settings(**mail):
+                stats, elapsed = asyncio.run(self.run_clients(options, mix, fixtures, lock_timeouts))
+        finally:
+            got_request_exception.disconnect(record_lock_timeout)
+            if not options["keep_data"]:
+                self.delete_fixtures(fixtures)
+        self.report(stats, elapsed)
+
+    def create_fixtures(self, clients):
+        tag = uuid.uuid4().hex[:8]
+        password = make_password(PASSWORD)  # Hashed once, shared by every account of the run
+
+        def account(role, number, **fields):
+            email = f"{role}-{number}-{tag}@{EMAIL_DOMAIN}"
+            return Users(username=email, email=email, name=f"lt-{tag}-{role}-{number}", role=role,
+                         password=password, **fields)
+
+        admin = Users.objects.bulk_create([account("admin", 0)])[0]
+        employees = Users.objects.bulk_create(
+            account("employee", n, salary=0, services_inhand_count=0, services_finished=0) for n in range(clients)
+        )
+        customers = Users.objects.bulk_create(
+            account("customer", n, discount_remaining=0, free_services_used=0) for n in range(clients)
+        )
+        invalidate("dispatch")  # bulk_create sends no post_save
+        part = PartsListModel.objects.create(
+            parts_name=f"loadtest-{tag}", parts_prices=100, parts_manufacture_date=date(2024, 1, 1),
+            parts_expire_date=date(2100, 1, 1), description="Desk load test", stock_quantity=10 ** 6,
+        )
+        return {
+            "admin": admin,
+            "employees": employees,
+            "customers": customers,
+            "part": part,
+            "admin_token": str(AccessToken.for_user(admin)),
+            "employee_tokens": [str(AccessToken.for_user(employee)) for employee in employees],
+        }
+
+    def delete_fixtures(self, fixtures):
+        users = [fixtures["admin"].pk] + [user.pk for user in fixtures["employees"] + fixtures["customers"]]
+        service_ids = list(
+            CarWashService.objects.filter(customer__in=fixtures["customers"]).values_list("id", flat=True)
+        )
+        ServiceEvent.objects.filter(service_id__in=service_ids).delete()
+        Users.objects.filter(pk__in=users).delete()  # Cascades to their services, purchases and keys
+        fixtures["part"].delete()
+        invalidate("dispatch")
+        invalidate("analytics")
+
+    async def run_clients(self, options, mix, fixtures, lock_timeouts):
+        from project.asgi import application
+
+        stats = defaultdict(RouteStats)
+        request_ids = itertools.count()
+        actions, weights = zip(*[(name, weight) for name, weight in mix.items() if weight])
+        service_types = [choice for choice, _ in CarWashService.SERVICE_TYPE_CHOICES]
+
+        async def call(client, route, expected, method, url, token=None, data=None):
+            request_id = str(next(request_ids))
+            headers = {REQUEST_ID_HEADER: request_id}
+            if token:
+                headers["Authorization"] = f"Bearer {token}"
+            body = b""
+            if data is not None:
+                headers["Content-Type"] = "application/json"
+                body = json.dumps(data).encode()
+            address = (f"10.{client >> 16 & 255}.{client >> 8 & 255}.{client & 255}", 40000)
+            result = await asgi_request(application, method, url, headers, body, client=address)
+
+            route_stats = stats[route]
+            route_stats.timings.append(result.seconds)
+            route_stats.statuses[result.status] += 1
+            if result.status != expected:
+                route_stats.errors += 1
+            if request_id in lock_timeouts:
+                route_stats.lock_timeouts += 1
+            return result if result.status == expected else None
+
+        async def tablet(client):
+            rng = random.Random(options["seed"] * 100003 + client)
+            employee = fixtures["employees"][client]
+            customer = fixtures["customers"][client]
+            admin_token = fixtures["admin_token"]
+            employee_token = fixtures["employee_tokens"][client]
+            open_services, plates = [], []
+
+            async def login():
+                nonlocal employee_token
+                result = await call(client, "POST employee_login", 200, "POST", "/api/employee_login/",
+                                    data={"email": employee.email, "password": PASSWORD})
+                if result is not None:
+                    employee_token = json.loads(result.body)["token"]["access"]
+
+            await login()
+            for _ in range(options["requests"]):
+                if options["think_time"]:
+                    await asyncio.sleep(rng.expovariate(1 / options["think_time"]))
+                action = rng.choices(actions, weights)[0]
+                if action == "complete" and not open_services:
+                    action = "intake"
+
+                if action == "login":
+                    await login()
+                elif action == "intake":
+                    plate = vehicle_number(client, len(plates))
+                    plates.append(plate)
+                    service_type = rng.choice(service_types)
+                    result = await call(client, "POST carwash_service", 201, "POST", "/api/carwash_service/",
+                                        admin_token, {"service_type": service_type, "employee": employee.pk,
+                                                      "customer": customer.pk, "vehicle_number": plate})
+                    if result is not None:
+                        open_services.append((json.loads(result.body)["id"], service_type, plate))
+                elif action == "complete":
+                    service_id, service_type, plate = open_services.pop(rng.randrange(len(open_services)))
+                    await call(client, "PUT carwash_service <pk>", 200, "PUT", f"/api/carwash_service/{service_id}/",
+                               admin_token, {"service_type": service_type, "status": "completed",
+                                             "vehicle_number": plate})
+                elif action == "purchase":
+                    await call(client, "POST purchase", 201, "POST", "/api/purchase/", employee_token,
+                               {"parts": fixtures["part"].pk, "employee": employee.pk, "customer": customer.pk,
+                                "quantity": 1})
+                elif rng.random() < 0.5:
+                    await call(client, "GET spear_parts_list", 200, "GET", "/api/spear_parts_list/", admin_token)
+                else:
+                    plate = rng.choice(plates) if plates else vehicle_number(client, 0)
+                    await call(client, "GET vehicle_history", 200, "GET",
+                               f"/api/vehicle_history/?vehicle_number={plate}", admin_token)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(tablet(client) for client in range(options["clients"])))
+        return stats, time.perf_counter() - start
+
+    def report(self, stats, elapsed):
+        total = sum(len(route_stats.timings) for route_stats in stats.values())
+        self.stdout.write(f"{total} requests in {elapsed:.1f}s, {total / elapsed:.1f}/s")
+        self.stdout.write(
+            f"{'route':<28}{'requests':>9}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+            f"{'errors':>8}{'lock t/o':>9}  statuses"
+        )
+        for route, route_stats in sorted(stats.items()):
+            timings = route_stats.timings
+            statuses = " ".join(f"{code}:{count}" for code, count in sorted(route_stats.statuses.items()))
+            self.stdout.write(
+                f"{route:<28}{len(timings):>9}{len(timings) / elapsed:>8.1f}"
+                f"{percentile(timings, 50) * 1000:>9.1f}{percentile(timings, 95) * 1000:>9.1f}"
+                f"{percentile(timings, 99) * 1000:>9.1f}{route_stats.errors:>8}{route_stats.lock_timeouts:>9}"
+                f"  {statuses}"
+            )
@@ -0,0 +1,316 @@
+import random
+import string
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from myapp.archive import service_history
+from myapp.caching import invalidate
+from myapp.http_cache import invalidate_response_cache
+from myapp.models import (
+    CarWashService, PartSale, PartsListModel, Purchasemodel, Reviewmodel, ReviewSummary, Users,
+)
+from myapp.utils import calculate_final_price, earned_discount
+
+# Production-sized data for scale tests, written with bulk_create in batches: none of the save() overrides
+# run, so the employee counters, customer discounts and the review summary are rebuilt in one pass at the
+# end. The same --seed, --until and volumes give the same rows. Every generated account and part carries
+# --prefix in its email or name, so runs with different prefixes can share a database.
+
+PASSWORD = "synthetic@123"
+EMAIL_DOMAIN = "synthetic.invalid"
+STATES = ["MH", "KA", "DL", "GJ", "TN", "RJ", "UP", "WB", "KL", "TS"]
+COMPANIES = ["local", "Bosch", "Valeo", "Denso", "Mahle", "3M", "Meguiar's"]
+SERVICE_MIX = {"full_carwash": 35, "only_body": 25, "inside_vacuum": 15, "only_polish": 15, "full_with_polish": 10}
+DURATION_MINUTES = {
+    "full_carwash": (30, 60),
+    "inside_vacuum": (15, 30),
+    "only_body": (15, 30),
+    "full_with_polish": (60, 120),
+    "only_polish": (30, 60),
+}
+DISCOUNTS = {0: 80, 5: 10, 20: 5, 30: 4, 100: 1}  # Discount percentage -> share of services
+RATINGS = {1: 5, 2: 7, 3: 18, 4: 35, 5: 35}
+OPENING_MINUTES = (8 * 60, 20 * 60)  # Services and sales happen between 08:00 and 20:00
+IN_PROGRESS_SHARE = 0.3  # Of the services started on the last day
+FREE_SERVICE_EVERY = 50  # As in earned_discount()
+
+
+@contextmanager
+def explicit_timestamps(model, *names):
+    """Let bulk_create write the given auto_now/auto_now_add fields as set on the objects."""
+    fields = [model._meta.get_field(name) for name in names]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def vehicle_number(customer, vehicle):
+    # 'XX00xx0000', unique per customer and vehicle
+    letters = string.ascii_lowercase
+    n = customer * 2 + vehicle
+    state, district = STATES[n % len(STATES)], n // 10 % 100
+    return f"{state}{district:02d}{letters[n // 1000 % 26]}{letters[n // 26000 % 26]}{n % 10000:04d}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a reproducible set of synthetic employees, customers, services, parts, purchases and reviews "
+        "with bulk inserts, then rebuild the denormalized counters."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--employees", type=int, default=50)
+        parser.add_argument("--customers", type=int, default=10000)
+        parser.add_argument("--services", type=int, default=100000)
+        parser.add_argument("--parts", type=int, default=200)
+        parser.add_argument("--purchases", type=int, default=20000,
+                            help="Part sales; those of one (part, employee, customer) share a purchase line.")
+        parser.add_argument("--reviews", type=int, default=5000)
+        parser.add_argument("--days", type=int, default=365, help="Days of history the services span.")
+        parser.add_argument("--until", type=date.fromisoformat, default=None,
+                            help="Last day of the history, YYYY-MM-DD (default today).")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rows per INSERT.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--prefix", default="synth", help="Marks the generated accounts and parts.")
+
+    def handle(self, *args, **options):
+        if options["employees"] < 1 or options["customers"] < 1:
+            raise CommandError("--employees and --customers must be at least 1.")
+        if options["days"] < 1 or options["batch_size"] < 1:
+            raise CommandError("--days and --batch-size must be at least 1.")
+        if not options["prefix"].isalnum():
+            raise CommandError("--prefix must be letters and digits.")
+        prefix = options["prefix"]
+        if (Users.objects.filter(email__endswith=self.email_domain(prefix)).exists()
+                or PartsListModel.objects.filter(parts_name__startswith=f"{prefix}-part-").exists()):
+            raise CommandError(f"Data with prefix {prefix!r} exists already, pass another --prefix.")
+
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.until = options["until"] or timezone.localdate()
+        self.first_day = self.until - timedelta(days=options["days"] - 1)
+        self.midnights = {}
+
+        employees = self.timed("employees", lambda: self.create_employees(prefix, options["employees"]))
+        customers = self.timed("customers", lambda: self.create_customers(prefix, options["customers"]))
+        self.timed("services", lambda: self.create_services(options["services"], employees, customers))
+        parts = self.timed("parts", lambda: self.create_parts(prefix, options["parts"]))
+        lines, sales = self.draw_sales(options["purchases"], parts, employees, customers)
+        self.timed("purchases", lambda: self.create_purchases(lines))
+        self.timed("sales", lambda: len(self.insert(PartSale, sales)))
+        self.timed("reviews", lambda: self.create_reviews(options["reviews"]))
+        self.timed("counters", lambda: self.rebuild_counters(prefix))
+
+    def timed(self, label, step):
+        start = time.perf_counter()
+        result = step()
+        rows = len(result) if isinstance(result, list) else result
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"{label:<10}{rows:>10} rows {elapsed:>8.1f}s {rows / max(elapsed, 1e-9):>10.0f}/s")
+        return result
+
+    def email_domain(self, prefix):
+        return f"@{prefix.lower()}.{EMAIL_DOMAIN}"
+
+    def moment(self, day):
+        """A random aware datetime in the opening hours of day."""
+        midnight = self.midnights.get(day)
+        if midnight is None:
+            midnight = self.midnights[day] = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+        return midnight + timedelta(minutes=self.rng.randint(*OPENING_MINUTES), seconds=self.rng.randint(0, 59))
+
+    def random_day(self):
+        return self.first_day + timedelta(days=self.rng.randint(0, (self.until - self.first_day).days))
+
+    def insert(self, model, rows):
+        """bulk_create from an iterable in batches without materializing it; returns the created pks."""
+        pks, batch = [], []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == self.batch_size:
+                pks.extend(obj.pk for obj in model.objects.bulk_create(batch))
+                batch = []
+        if batch:
+            pks.extend(obj.pk for obj in model.objects.bulk_create(batch))
+        return pks
+
+    def create_employees(self, prefix, count):
+        password = make_password(PASSWORD)  # Hashed once, shared by every generated account
+        rng, domain = self.rng, self.email_domain(prefix)
+        employees = []
+        for i in range(count):
+            # Most were hired before the history starts, some during it; about one in ten has left since
+            joined = self.first_day - timedelta(days=rng.randint(-(self.until - self.first_day).days // 2, 1000))
+            left = None
+            if rng.random() < 0.1 and joined < self.until - timedelta(days=30):
+                left = joined + timedelta(days=rng.randint(30, (self.until - joined).days))
+            employees.append(Users(
+                username=f"emp{i}{domain}", email=f"emp{i}{domain}", name=f"{prefix}-emp-{i}", role="employee",
+                password=password, salary=rng.randrange(12000, 30001, 500), joining_date=joined,
+                last_working_day=left, is_active=left is None, created_at=joined, updated_at=left or joined,
+                services_inhand_count=0, services_finished=0,
+            ))
+        with explicit_timestamps(Users, "joining_date", "created_at", "updated_at"):
+            pks = self.insert(Users, employees)
+        # (pk, joining_date, last_working_day), to give each service someone who worked that day
+        return [(pk, employee.joining_date, employee.last_working_day) for pk, employee in zip(pks, employees)]
+
+    def create_customers(self, prefix, count):
+        password = make_password(PASSWORD)
+        rng, domain = self.rng, self.email_domain(prefix)
+
+        def customers():
+            for i in range(count):
+                joined = self.first_day - timedelta(days=rng.randint(0, 700))  # Before any of their services
+                yield Users(
+                    username=f"cus{i}{domain}", email=f"cus{i}{domain}", name=f"{prefix}-cus-{i}",
+                    role="customer", password=password, joining_date=joined, created_at=joined, updated_at=joined,
+                    discount_remaining=0, free_services_used=0,
+                )
+
+        with explicit_timestamps(Users, "joining_date", "created_at", "updated_at"):
+            return self.insert(Users, customers())
+
+    def on_duty(self, employees, day):
+        """A random employee who worked on day (any employee when nobody did)."""
+        for _ in range(8):
+            pk, joined, left = self.rng.choice(employees)
+            if joined <= day and (left is None or day <= left):
+                return pk
+        return pk
+
+    def create_services(self, count, employees, customers):
+        rng = self.rng
+        service_types, type_weights = zip(*SERVICE_MIX.items())
+        discounts, discount_weights = zip(*DISCOUNTS.items())
+        final_prices = {
+            (service_type, discount): calculate_final_price(service_type, discount)
+            for service_type in service_types for discount in discounts
+        }
+
+        def services():
+            for _ in range(count):
+                service_type = rng.choices(service_types, type_weights)[0]
+                discount = rng.choices(discounts, discount_weights)[0]
+                customer = rng.randrange(len(customers))
+                day = self.random_day()
+                start = self.moment(day)
+                in_progress = day == self.until and rng.random() < IN_PROGRESS_SHARE
+                yield CarWashService(
+                    service_type=service_type,
+                    employee_id=self.on_duty(employees, day),
+                    customer_id=customers[customer],
+                    status="in_progress" if in_progress else "completed",
+                    final_price=final_prices[(service_type, discount)],
+                    vehicle_number=vehicle_number(customer, rng.randrange(2)),
+                    services_start_date=start,
+                    services_end_date=(
+                        None if in_progress else start + timedelta(minutes=rng.randint(*DURATION_MINUTES[service_type]))
+                    ),
+                )
+
+        with explicit_timestamps(CarWashService, "services_start_date"):
+            return len(self.insert(CarWashService, services()))
+
+    def create_parts(self, prefix, count):
+        rng = self.rng
+        parts = []
+        for i in range(count):
+            made = self.first_day - timedelta(days=rng.randint(0, 700))
+            parts.append(PartsListModel(
+                parts_name=f"{prefix}-part-{i}", parts_prices=rng.randint(50, 5000),
+                parts_manufacture_date=made, parts_expire_date=made + timedelta(days=rng.randint(365, 3650)),
+                company_name=rng.choice(COMPANIES), description=f"Synthetic part {i}",
+                stock_quantity=rng.randint(0, 500),
+            ))
+        # (pk, price) pairs, the prices give the purchase totals
+        return list(zip(self.insert(PartsListModel, parts), (part.parts_prices for part in parts)))
+
+    def draw_sales(self, count, parts, employees, customers):
+        """
+        count part sales merged into purchase lines as add_purchase() does, a line per (part, employee,
+        customer) dated at its latest sale. The parts are new, so no existing line can clash with these.
+        """
+        rng = self.rng
+        lines, sales = {}, []
+        for _ in range(count if parts else 0):
+            part, price = rng.choice(parts)
+            day = self.random_day()
+            quantity = rng.randint(1, 3)
+            key = (part, self.on_duty(employees, day), rng.choice(customers))
+            sold_at = self.moment(day)
+            line = lines.get(key)
+            if line is None:
+                line = lines[key] = Purchasemodel(
+                    parts_id=key[0], employee_id=key[1], customer_id=key[2], purchase_date=sold_at,
+                    quantity=0, total_price=0,
+                )
+            line.quantity += quantity
+            line.total_price += price * quantity
+            line.purchase_date = max(line.purchase_date, sold_at)
+            # bulk_create copies the line's pk into purchase_id once the line is inserted
+            sales.append(PartSale(purchase=line, quantity=quantity, total_price=price * quantity, sold_at=sold_at))
+        return list(lines.values()), sales
+
+    def create_purchases(self, lines):
+        with explicit_timestamps(Purchasemodel, "purchase_date"):
+            return len(self.insert(Purchasemodel, lines))
+
+    def create_reviews(self, count):
+        rng = self.rng
+        ratings, weights = zip(*RATINGS.items())
+        return len(self.insert(Reviewmodel, (
+            Reviewmodel(ratings=rating, review=f"Synthetic review {i}: rated {rating}")
+            for i, rating in enumerate(rng.choices(ratings, weights, k=count))
+        )))
+
+    def rebuild_counters(self, prefix):
+        """What the save() overrides would have kept up to date, for the generated accounts."""
+        domain = self.email_domain(prefix)
+        services = service_history(using="default")
+
+        def count(**filters):
+            return Coalesce(Subquery(
+                services.filter(employee=OuterRef("pk"), **filters)
+                .values("employee").annotate(n=Count("id")).values("n")
+            ), 0)
+
+        employees = Users.objects.filter(role="employee", email__endswith=domain).update(
+            services_inhand_count=count(status="in_progress"),
+            services_finished=count(status="completed"),
+        )
+
+        # Every free service earned so far counts as used, what is left is the discount tier
+        completed = dict(
+            services.filter(customer__email__endswith=domain, status="completed")
+            .values_list("customer_id").annotate(Count("id"))
+        )
+        customers, batch = 0, []
+        for pk in Users.objects.filter(role="customer", email__endswith=domain).values_list("pk", flat=True):
+            done = completed.get(pk, 0)
+            customer = Users(pk=pk, free_services_used=done // FREE_SERVICE_EVERY)
+            earned_discount(customer, done)
+            batch.append(customer)
+            if len(batch) == self.batch_size:
+                customers += Users.objects.bulk_update(batch, ["discount_remaining", "free_services_used"])
+                batch = []
+        if batch:
+            customers += Users.objects.bulk_update(batch, ["discount_remaining", "free_services_used"])
+
+        ReviewSummary.rebuild()
+        for namespace in ("users", "dispatch", "analytics", "parts", "reviews"):
+            invalidate(namespace)
+        invalidate_response_cache("reviews")
+        return employees + customers
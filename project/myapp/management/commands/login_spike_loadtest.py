@@ -0,0 +1,103 @@
+import asyncio
+import json
+import time
+from collections import Counter
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from myapp.asgi_driver import asgi_request, percentile, reload_urls
+from myapp.models import Users
+from myapp.throttling import TokenBucketThrottle
+
+DEFAULT_PATHS = ["/api/about_us/", "/api/social_links/"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive project.asgi.application in-process with steady traffic on non-login endpoints, alone and "
+        "during a spike of logins, once with the DRF login views and once with the async ones, and compare "
+        "the latency of the non-login requests."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--read-clients", type=int, default=10, help="Concurrent clients on the other endpoints.")
+        parser.add_argument("--read-requests", type=int, default=30, help="Requests per read client.")
+        parser.add_argument("--login-clients", type=int, default=50, help="Concurrent clients logging in.")
+        parser.add_argument("--login-requests", type=int, default=4, help="Logins per login client.")
+        parser.add_argument("--path", action="append", dest="paths", help="Non-login endpoint (repeatable).")
+        parser.add_argument("--login-path", default="/api/customer_login/")
+        parser.add_argument("--email", help="Account to log in as (defaults to the first customer).")
+        parser.add_argument("--password", default="not-the-password",
+                            help="Password to send; a wrong one costs the same hash and writes nothing.")
+        parser.add_argument("--keep-throttles", action="store_true",
+                            help="Leave the login throttles on (by default the spike would mostly get 429s).")
+        parser.add_argument("--mode", choices=["both", "sync", "async"], default="both")
+
+    def handle(self, *args, **options):
+        email = options["email"] or Users.objects.filter(role="customer").values_list("email", flat=True).first()
+        if email is None:
+            raise CommandError("No account to log in as; create a customer or pass --email.")
+        login_body = json.dumps({"email": email, "password": options["password"]}).encode()
+
+        rates = TokenBucketThrottle.THROTTLE_RATES
+        if not options["keep_throttles"]:
+            TokenBucketThrottle.THROTTLE_RATES = dict.fromkeys(rates)  # No rate, every request allowed
+        try:
+            modes = {"both": [False, True], "sync": [False], "async": [True]}[options["mode"]]
+            for use_async in modes:
+                with override_settings(ASYNC_LOGIN_VIEWS=use_async):
+                    reload_urls()
+                    cache.clear()
+                    alone = asyncio.run(self.run_clients(options, login_body, spike=False))
+                    spike = asyncio.run(self.run_clients(options, login_body, spike=True))
+                self.report("async login" if use_async else "DRF login", alone, spike)
+        finally:
+            TokenBucketThrottle.THROTTLE_RATES = rates
+            reload_urls()
+
+    async def run_clients(self, options, login_body, spike):
+        from project.asgi import application
+
+        paths = options["paths"] or DEFAULT_PATHS
+        reads, read_errors, logins = [], 0, []
+
+        async def reader(number):
+            nonlocal read_errors
+            for i in range(options["read_requests"]):
+                result = await asgi_request(application, "GET", paths[(number + i) % len(paths)])
+                if result.status != 200:
+                    read_errors += 1
+                reads.append(result.seconds)
+
+        async def login_client():
+            for _ in range(options["login_requests"]):
+                result = await asgi_request(
+                    application, "POST", options["login_path"], {"Content-Type": "application/json"}, login_body
+                )
+                logins.append((result.status, result.seconds))
+
+        clients = [reader(n) for n in range(options["read_clients"])]
+        if spike:
+            clients += [login_client() for _ in range(options["login_clients"])]
+        start = time.perf_counter()
+        await asyncio.gather(*clients)
+        return {"reads": reads, "read_errors": read_errors, "logins": logins, "elapsed": time.perf_counter() - start}
+
+    def report(self, label, alone, spike):
+        for phase, result in (("alone", alone), ("login spike", spike)):
+            reads = result["reads"]
+            line = (
+                f"{label:<12} {phase:<12} reads={len(reads)} errors={result['read_errors']} "
+                f"p50={percentile(reads, 50) * 1000:.1f}ms p99={percentile(reads, 99) * 1000:.1f}ms"
+            )
+            if result["logins"]:
+                statuses = Counter(status for status, _ in result["logins"])
+                login_p99 = percentile([seconds for _, seconds in result["logins"]], 99)
+                line += (
+                    f" | logins={len(result['logins'])} "
+                    f"{' '.join(f'{status}:{count}' for status, count in sorted(statuses.items()))} "
+                    f"login_p99={login_p99 * 1000:.1f}ms"
+                )
+            self.stdout.write(line)
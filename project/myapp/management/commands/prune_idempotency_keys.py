@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from myapp.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Delete expired Idempotency-Key responses in batches (run it from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=10000,
+                            help="Rows deleted per statement, keeps each lock short.")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        deleted = 0
+        while True:
+            # expires_at is indexed; each batch is one DELETE ... WHERE id IN (...) with no per-row signals
+            batch = list(
+                IdempotencyKey.objects.filter(expires_at__lte=now)
+                .values_list("pk", flat=True)[:options["batch_size"]]
+            )
+            if not batch:
+                break
+            count, _ = IdempotencyKey.objects.filter(pk__in=batch).delete()
+            deleted += count
+        self.stdout.write(f"Deleted {deleted} expired idempotency keys.")
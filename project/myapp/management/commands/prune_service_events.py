@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from myapp.models import ServiceEvent
+
+
+class Command(BaseCommand):
+    help = "Delete service events older than the live board's replay window in batches (run it from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than-hours", type=int, default=settings.SERVICE_EVENT_RETENTION_HOURS,
+                            help="Delete events recorded more than this many hours ago.")
+        parser.add_argument("--batch-size", type=int, default=10000,
+                            help="Rows deleted per statement, keeps each lock short.")
+
+    def handle(self, *args, **options):
+        if options["older_than_hours"] < 1:
+            raise CommandError("--older-than-hours must be at least 1.")
+        cutoff = timezone.now() - timedelta(hours=options["older_than_hours"])
+        # Ids follow created_at, so everything below the first recent id goes, walked along the primary key
+        # (created_at has no index). The newest event is always kept: it is the cursor of a fresh snapshot.
+        events = ServiceEvent.objects.order_by("id").values_list("id", flat=True)
+        keep_from = events.filter(created_at__gte=cutoff).first() or events.last()
+        deleted = 0
+        while keep_from is not None:
+            batch = list(events.filter(id__lt=keep_from)[:options["batch_size"]])
+            if not batch:
+                break
+            count, _ = ServiceEvent.objects.filter(pk__in=batch).delete()
+            deleted += count
+        self.stdout.write(f"Deleted {deleted} service events recorded before {cutoff:%Y-%m-%d %H:%M}.")
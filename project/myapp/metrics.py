@@ -0,0 +1,106 @@
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+# In-process request metrics, rendered in the Prometheus text format by MetricsView.
+# Each worker process keeps its own numbers; Prometheus sums them across scrape targets.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RouteStats:
+    __slots__ = ("requests", "latency_buckets", "latency_sum", "sql_queries", "sql_seconds")
+
+    def __init__(self):
+        self.requests = defaultdict(int)  # status code -> count
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # last slot is +Inf
+        self.latency_sum = 0.0
+        self.sql_queries = 0
+        self.sql_seconds = 0.0
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = defaultdict(RouteStats)  # (route, method) -> RouteStats
+        self._cache_lookups = defaultdict(int)  # (namespace, "hit" | "miss") -> count
+
+    def observe(self, route, method, status_code, seconds, sql_queries, sql_seconds):
+        with self._lock:
+            stats = self._routes[(route, method)]
+            stats.requests[status_code] += 1
+            stats.latency_buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            stats.latency_sum += seconds
+            stats.sql_queries += sql_queries
+            stats.sql_seconds += sql_seconds
+
+    def count_cache(self, namespace, hit):
+        with self._lock:
+            self._cache_lookups[(namespace, "hit" if hit else "miss")] += 1
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+            self._cache_lookups.clear()
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format."""
+        with self._lock:
+            routes = sorted(self._routes.items())
+            lines = [
+                "# HELP myapp_http_requests_total Requests handled, by route, method and status.",
+                "# TYPE myapp_http_requests_total counter",
+            ]
+            for (route, method), stats in routes:
+                for status_code, count in sorted(stats.requests.items()):
+                    labels = _labels(route=route, method=method, status=status_code)
+                    lines.append(f"myapp_http_requests_total{{{labels}}} {count}")
+
+            lines += [
+                "# HELP myapp_http_request_duration_seconds Request latency, by route and method.",
+                "# TYPE myapp_http_request_duration_seconds histogram",
+            ]
+            for (route, method), stats in routes:
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), stats.latency_buckets):
+                    cumulative += count
+                    labels = _labels(route=route, method=method, le=bound)
+                    lines.append(f"myapp_http_request_duration_seconds_bucket{{{labels}}} {cumulative}")
+                labels = _labels(route=route, method=method)
+                lines.append(f"myapp_http_request_duration_seconds_sum{{{labels}}} {stats.latency_sum:.6f}")
+                lines.append(f"myapp_http_request_duration_seconds_count{{{labels}}} {cumulative}")
+
+            lines += [
+                "# HELP myapp_db_queries_total SQL statements executed, by route and method.",
+                "# TYPE myapp_db_queries_total counter",
+            ]
+            for (route, method), stats in routes:
+                labels = _labels(route=route, method=method)
+                lines.append(f"myapp_db_queries_total{{{labels}}} {stats.sql_queries}")
+
+            lines += [
+                "# HELP myapp_db_query_duration_seconds_total Time spent in SQL, by route and method.",
+                "# TYPE myapp_db_query_duration_seconds_total counter",
+            ]
+            for (route, method), stats in routes:
+                labels = _labels(route=route, method=method)
+                lines.append(f"myapp_db_query_duration_seconds_total{{{labels}}} {stats.sql_seconds:.6f}")
+
+            lines += [
+                "# HELP myapp_cache_lookups_total Reference cache lookups, by namespace and result.",
+                "# TYPE myapp_cache_lookups_total counter",
+            ]
+            for (namespace, result), count in sorted(self._cache_lookups.items()):
+                labels = _labels(namespace=namespace, result=result)
+                lines.append(f"myapp_cache_lookups_total{{{labels}}} {count}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return ",".join(f'{name}="{escape(value)}"' for name, value in labels.items())
+
+
+registry = MetricsRegistry()
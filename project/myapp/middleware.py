@@ -0,0 +1,276 @@
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework.exceptions import APIException
+from rest_framework_simplejwt.settings import api_settings
+
+from .authentication import CachedJWTAuthentication
+from .metrics import registry
+from .profiling import Capture
+from .slow_queries import current_request, install_slow_query_log
+from .routers import replica_alias, replica_reads
+
+# Counter of the request being handled. Context variables follow the request into
+# sync_to_async threads, so queries from async views are attributed as well.
+current_query_counter = ContextVar("current_query_counter", default=None)
+
+
+class QueryCounter:
+    """Counts the statements run for one request and the time spent in them."""
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+def count_queries(execute, sql, params, many, context):
+    """Database execute wrapper installed on every connection while metrics are enabled."""
+    counter = current_query_counter.get()
+    if counter is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        counter.seconds += time.perf_counter() - start
+        counter.queries += 1
+
+
+def install_query_counter(sender, connection, **kwargs):
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+class AsyncCapableMiddleware:
+    """Base for middleware usable both under WSGI and, without a thread hop, under ASGI."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        self.before(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            self.cleanup(request)
+        return self.after(request, response)
+
+    async def __acall__(self, request):
+        self.before(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.cleanup(request)
+        return self.after(request, response)
+
+    def before(self, request):
+        pass
+
+    def cleanup(self, request):
+        pass
+
+    def after(self, request, response):
+        return response
+
+
+# Per-route request count, latency and SQL cost, exposed by MetricsView
+class RequestMetricsMiddleware(AsyncCapableMiddleware):
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed  # Dropped from the chain, costs nothing when disabled
+        connection_created.connect(install_query_counter, dispatch_uid="myapp_query_counter")
+        for connection in connections.all(initialized_only=True):
+            install_query_counter(None, connection)
+        super().__init__(get_response)
+
+    def before(self, request):
+        request._metrics_counter = QueryCounter()
+        request._metrics_token = current_query_counter.set(request._metrics_counter)
+        request._metrics_start = time.perf_counter()
+
+    def cleanup(self, request):
+        current_query_counter.reset(request._metrics_token)
+
+    def after(self, request, response):
+        elapsed = time.perf_counter() - request._metrics_start
+        counter = request._metrics_counter
+        match = request.resolver_match
+        route = match.route if match else "unmatched"
+        registry.observe(route, request.method, response.status_code, elapsed, counter.queries, counter.seconds)
+        return response
+
+
+# Slow statements logged with the URL name and view method of the request that ran them (slow_queries.py)
+class SlowQueryLogMiddleware(AsyncCapableMiddleware):
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY_MS:
+            raise MiddlewareNotUsed
+        connection_created.connect(install_slow_query_log, dispatch_uid="myapp_slow_query_log")
+        for connection in connections.all(initialized_only=True):
+            install_slow_query_log(None, connection)
+        super().__init__(get_response)
+
+    def before(self, request):
+        request._slow_query_token = current_request.set(request)
+
+    def cleanup(self, request):
+        current_request.reset(request._slow_query_token)
+
+
+# Route replica-safe views to the reporting database, pinning a client to the primary after it writes
+class ReplicaRoutingMiddleware(AsyncCapableMiddleware):
+    SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+    def __init__(self, get_response):
+        if replica_alias() is None:
+            raise MiddlewareNotUsed  # No replica configured, every query already goes to the primary
+        super().__init__(get_response)
+
+    authenticator = CachedJWTAuthentication()
+
+    @classmethod
+    def sticky_key(cls, request):
+        # Keyed on the token's user, so a refreshed access token stays on the primary; anonymous calls by address
+        if not hasattr(request, "_replica_client"):
+            user_id = cls.token_user_id(request)
+            request._replica_client = (
+                f"user:{user_id}" if user_id is not None else f"addr:{request.META.get('REMOTE_ADDR', '')}"
+            )
+        return "replica:sticky:" + request._replica_client
+
+    @classmethod
+    def token_user_id(cls, request):
+        """User id claim of a valid bearer token, checked without loading the user."""
+        header = cls.authenticator.get_header(request)
+        raw_token = cls.authenticator.get_raw_token(header) if header is not None else None
+        if raw_token is None:
+            return None
+        try:
+            return cls.authenticator.get_validated_token(raw_token).get(api_settings.USER_ID_CLAIM)
+        except APIException:
+            return None  # The view answers the bad token
+
+    def before(self, request):
+        request.replica_allowed = False
+
+    def cleanup(self, request):
+        replica_reads.set(False)
+
+    def after(self, request, response):
+        if request.method not in self.SAFE_METHODS and not request.replica_allowed and response.status_code < 400:
+            # Read-your-writes: keep this client on the primary until the replica has caught up
+            cache.set(self.sticky_key(request), True, settings.REPLICA_STICKY_SECONDS)
+        return response
+
+    def process_view(self, request, view_func, args, kwargs):
+        view_class = getattr(view_func, "view_class", None)
+        methods = getattr(view_class, "replica_methods", ())
+        if request.method in methods and not cache.get(self.sticky_key(request)):
+            request.replica_allowed = True
+            replica_reads.set(True)
+        return None
+
+
+# cProfile capture of a single request, asked for by an admin with "X-Profile: 1" or "?profile=1"
+class ProfilingMiddleware(AsyncCapableMiddleware):
+    """
+    Keep it last in MIDDLEWARE: it runs the view itself from process_view, after the other middleware's
+    process_view. Requests without the flag only pay the header check. The id of the capture comes back
+    in X-Profile-Id. Async views are profiled on the event loop and their SQL is not listed; streamed
+    bodies are produced after the capture ends.
+    """
+    authenticator = CachedJWTAuthentication()
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        # A sync process_view would cost every request a thread hop under ASGI
+        self.process_view = self.aprocess_view if iscoroutinefunction(self) else self.sync_process_view
+
+    @staticmethod
+    def requested(request):
+        if request.META.get("HTTP_X_PROFILE") == "1":
+            return True
+        return "profile" in request.META.get("QUERY_STRING", "") and request.GET.get("profile") == "1"
+
+    def sync_process_view(self, request, view_func, view_args, view_kwargs):
+        if not self.requested(request) or iscoroutinefunction(view_func):
+            return None
+        try:
+            user_auth = self.authenticator.authenticate(request)
+        except APIException:
+            return None  # The view answers the bad token
+        if not self.admin(request, user_auth):
+            return None
+        return self.profile(request, view_func, view_args, view_kwargs)
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        if not self.requested(request):
+            return None
+        try:
+            user_auth = await self.authenticator.aauthenticate(request)
+        except APIException:
+            return None
+        if not self.admin(request, user_auth):
+            return None
+        if iscoroutinefunction(view_func):
+            return await self.aprofile(request, view_func, view_args, view_kwargs)
+        # In the request's thread, where Django would run the sync view
+        return await sync_to_async(self.profile)(request, view_func, view_args, view_kwargs)
+
+    @staticmethod
+    def admin(request, user_auth):
+        if user_auth is None or user_auth[0].role != "admin":
+            return False
+        request.profiled_by = user_auth[0]
+        return True
+
+    @staticmethod
+    def render(response):
+        # DRF responses are rendered after the view returns, that is part of the request's cost
+        if hasattr(response, "render") and callable(response.render):
+            response = response.render()
+        return response
+
+    def profile(self, request, view_func, view_args, view_kwargs):
+        capture = Capture()
+        start = time.perf_counter()
+        try:
+            with capture.recording_sql():
+                capture.profiler.enable()
+                try:
+                    response = self.render(view_func(request, *view_args, **view_kwargs))
+                finally:
+                    capture.profiler.disable()
+        except Exception as exc:
+            capture.save(request, None, time.perf_counter() - start, error=repr(exc))
+            raise
+        response["X-Profile-Id"] = capture.save(request, response.status_code, time.perf_counter() - start)
+        return response
+
+    async def aprofile(self, request, view_func, view_args, view_kwargs):
+        capture = Capture()
+        start = time.perf_counter()
+        capture.profiler.enable()
+        try:
+            response = self.render(await view_func(request, *view_args, **view_kwargs))
+        except Exception as exc:
+            capture.profiler.disable()
+            capture.save(request, None, time.perf_counter() - start, error=repr(exc))
+            raise
+        capture.profiler.disable()
+        response["X-Profile-Id"] = capture.save(request, response.status_code, time.perf_counter() - start)
+        return response
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.4 on 2026-10-19 14:48
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def merge_duplicate_purchases(apps, schema_editor):
+    # Fold duplicate (parts, employee, customer) lines into the oldest one
+    Purchasemodel = apps.get_model('myapp', 'Purchasemodel')
+    purchases = Purchasemodel.objects.using(schema_editor.connection.alias)
+    duplicates = (
+        purchases.values('parts', 'employee', 'customer')
+        .annotate(lines=Count('id'))
+        .filter(lines__gt=1)
+    )
+    for key in duplicates:
+        lines = list(
+            purchases.filter(
+                parts=key['parts'], employee=key['employee'], customer=key['customer']
+            ).order_by('id')
+        )
+        keep = lines[0]
+        keep.quantity = sum(line.quantity for line in lines)
+        keep.total_price = sum(line.total_price for line in lines)
+        keep.save(update_fields=['quantity', 'total_price'])
+        purchases.filter(id__in=[line.id for line in lines[1:]]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0006_alter_carwashservice_services_start_date'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_purchases, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='purchasemodel',
+            constraint=models.UniqueConstraint(fields=('parts', 'employee', 'customer'), name='unique_purchase_line'),
+        ),
+    ]
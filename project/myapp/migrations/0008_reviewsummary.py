@@ -0,0 +1,42 @@
+# Generated by Django 5.1.4 on 2026-10-19 14:49
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def seed_review_summary(apps, schema_editor):
+    # Start the running totals from the reviews already stored
+    Reviewmodel = apps.get_model('myapp', 'Reviewmodel')
+    ReviewSummary = apps.get_model('myapp', 'ReviewSummary')
+    db_alias = schema_editor.connection.alias
+    totals = Reviewmodel.objects.using(db_alias).aggregate(
+        count=Count('id'),
+        ratings_total=Sum('ratings'),
+        **{f'rating_{rating}': Count('id', filter=Q(ratings=rating)) for rating in range(1, 6)},
+    )
+    totals['ratings_total'] = totals['ratings_total'] or 0
+    ReviewSummary.objects.using(db_alias).create(pk=1, **totals)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0007_purchasemodel_unique_purchase_line'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('ratings_total', models.PositiveIntegerField(default=0)),
+                ('rating_1', models.PositiveIntegerField(default=0)),
+                ('rating_2', models.PositiveIntegerField(default=0)),
+                ('rating_3', models.PositiveIntegerField(default=0)),
+                ('rating_4', models.PositiveIntegerField(default=0)),
+                ('rating_5', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_review_summary, migrations.RunPython.noop),
+    ]
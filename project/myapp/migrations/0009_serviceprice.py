@@ -0,0 +1,52 @@
+# Generated by Django 5.1.4 on 2026-10-19 15:03
+
+import datetime
+from decimal import Decimal
+
+import django.utils.timezone
+from django.db import migrations, models
+
+# Prices and labels that were hard-coded on CarWashService until now
+INITIAL_PRICES = [
+    ('full_carwash', 'Full Carwash', Decimal('70')),
+    ('inside_vacuum', 'Inside Vacuum', Decimal('40')),
+    ('only_body', 'Only Body', Decimal('30')),
+    ('full_with_polish', 'Full with Polish', Decimal('100')),
+    ('only_polish', 'Only Polish', Decimal('30')),
+]
+
+
+def seed_prices(apps, schema_editor):
+    ServicePrice = apps.get_model('myapp', 'ServicePrice')
+    db_alias = schema_editor.connection.alias
+    # Effective from well before any stored service, so past services price the same
+    start = datetime.datetime(2000, 1, 1, tzinfo=datetime.timezone.utc)
+    ServicePrice.objects.using(db_alias).bulk_create(
+        ServicePrice(service_type=service_type, label=label, price=price, effective_from=start)
+        for service_type, label, price in INITIAL_PRICES
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0008_reviewsummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ServicePrice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('service_type', models.CharField(choices=[('full_carwash', 'Full Carwash - 70 Rupees'), ('inside_vacuum', 'Inside Vacuum - 40 Rupees'), ('only_body', 'Only Body - 30 Rupees'), ('full_with_polish', 'Full with Polish - 100 Rupees'), ('only_polish', 'Only Polish - 30 Rupees')], max_length=50)),
+                ('label', models.CharField(max_length=50)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('effective_from', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('service_type', 'effective_from'), name='unique_service_price_start')],
+            },
+        ),
+        migrations.RunPython(seed_prices, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-19 15:12
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0010_serviceevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='carwashservice',
+            name='vehicle_key',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Upper('vehicle_number'), output_field=models.CharField(max_length=10)),
+        ),
+        migrations.AddIndex(
+            model_name='carwashservice',
+            index=models.Index(fields=['vehicle_key', '-id'], name='service_vehicle_history_idx'),
+        ),
+    ]
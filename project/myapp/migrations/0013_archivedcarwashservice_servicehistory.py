@@ -0,0 +1,67 @@
+# Generated by Django 5.1.4 on 2026-10-19 15:32
+
+import django.db.models.deletion
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+COLUMNS = (
+    "id, service_type, employee_id, customer_id, status, final_price, vehicle_number, "
+    "services_start_date, services_end_date, vehicle_key"
+)
+
+# Both branches are plain scans of one table, so the planner pushes the reports' filters into each of them
+CREATE_SERVICE_HISTORY = f"""
+    CREATE VIEW myapp_servicehistory AS
+    SELECT {COLUMNS}, FALSE AS archived FROM myapp_carwashservice
+    UNION ALL
+    SELECT {COLUMNS}, TRUE AS archived FROM myapp_archivedcarwashservice
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0012_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ServiceHistory',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('service_type', models.CharField(choices=[('full_carwash', 'Full Carwash - 70 Rupees'), ('inside_vacuum', 'Inside Vacuum - 40 Rupees'), ('only_body', 'Only Body - 30 Rupees'), ('full_with_polish', 'Full with Polish - 100 Rupees'), ('only_polish', 'Only Polish - 30 Rupees')], max_length=50)),
+                ('status', models.CharField(choices=[('completed', 'Complete'), ('in_progress', 'In Progress')], max_length=15)),
+                ('final_price', models.DecimalField(decimal_places=2, max_digits=10, null=True)),
+                ('vehicle_number', models.CharField(max_length=10)),
+                ('services_start_date', models.DateTimeField()),
+                ('services_end_date', models.DateTimeField(null=True)),
+                ('vehicle_key', models.CharField(max_length=10)),
+                ('archived', models.BooleanField()),
+            ],
+            options={
+                'db_table': 'myapp_servicehistory',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedCarWashService',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('service_type', models.CharField(choices=[('full_carwash', 'Full Carwash - 70 Rupees'), ('inside_vacuum', 'Inside Vacuum - 40 Rupees'), ('only_body', 'Only Body - 30 Rupees'), ('full_with_polish', 'Full with Polish - 100 Rupees'), ('only_polish', 'Only Polish - 30 Rupees')], max_length=50)),
+                ('status', models.CharField(choices=[('completed', 'Complete'), ('in_progress', 'In Progress')], max_length=15)),
+                ('final_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('vehicle_number', models.CharField(max_length=10)),
+                ('services_start_date', models.DateTimeField()),
+                ('services_end_date', models.DateTimeField(blank=True, null=True)),
+                ('vehicle_key', models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Upper('vehicle_number'), output_field=models.CharField(max_length=10))),
+                ('archived_at', models.DateTimeField()),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_services', to=settings.AUTH_USER_MODEL)),
+                ('employee', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archived_services_done', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['vehicle_key', '-id'], name='archive_vehicle_history_idx'), models.Index(fields=['services_start_date'], name='archive_start_date_idx'), models.Index(fields=['services_end_date'], name='archive_end_date_idx')],
+            },
+        ),
+        migrations.RunSQL(CREATE_SERVICE_HISTORY, "DROP VIEW myapp_servicehistory"),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.4 on 2026-10-19 15:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0013_archivedcarwashservice_servicehistory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='serviceprice',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='archivedcarwashservice',
+            name='service_type',
+            field=models.CharField(choices=[('full_carwash', 'Full Carwash'), ('inside_vacuum', 'Inside Vacuum'), ('only_body', 'Only Body'), ('full_with_polish', 'Full with Polish'), ('only_polish', 'Only Polish')], max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='carwashservice',
+            name='service_type',
+            field=models.CharField(choices=[('full_carwash', 'Full Carwash'), ('inside_vacuum', 'Inside Vacuum'), ('only_body', 'Only Body'), ('full_with_polish', 'Full with Polish'), ('only_polish', 'Only Polish')], default='full_carwash', max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='serviceprice',
+            name='service_type',
+            field=models.CharField(choices=[('full_carwash', 'Full Carwash'), ('inside_vacuum', 'Inside Vacuum'), ('only_body', 'Only Body'), ('full_with_polish', 'Full with Polish'), ('only_polish', 'Only Polish')], max_length=50),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.4 on 2026-10-19 15:45
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_sales(apps, schema_editor):
+    # Lines merged before the ledger existed become one sale dated at their latest sale
+    Purchasemodel = apps.get_model('myapp', 'Purchasemodel')
+    PartSale = apps.get_model('myapp', 'PartSale')
+    alias = schema_editor.connection.alias
+    lines = Purchasemodel.objects.using(alias).iterator(chunk_size=2000)
+    batch = []
+    for line in lines:
+        batch.append(PartSale(purchase_id=line.id, quantity=line.quantity, total_price=line.total_price,
+                              sold_at=line.purchase_date))
+        if len(batch) == 2000:
+            PartSale.objects.using(alias).bulk_create(batch)
+            batch = []
+    PartSale.objects.using(alias).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0014_serviceprice_updated_at_service_type_labels'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PartSale',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField()),
+                ('total_price', models.PositiveIntegerField()),
+                ('sold_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('purchase', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales', to='myapp.purchasemodel')),
+            ],
+        ),
+        migrations.RunPython(backfill_sales, migrations.RunPython.noop),
+    ]
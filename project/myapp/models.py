@@ -1,11 +1,18 @@
-from django.db import models
+import re
+from collections import Counter
+
+from django.db import models, connection, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, Greatest, Upper
+
+from .caching import invalidate
 
 # Create your models here.
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
 from django.utils.timezone import now
-from datetime import timedelta
+from datetime import datetime, time, timedelta
 from django.conf import settings
 from django.core.validators import RegexValidator
 
@@ -37,13 +44,13 @@ class Users(AbstractUser):
 class CarWashService(models.Model):
 
     SERVICE_TYPE_CHOICES = [
-    ("full_carwash", "Full Carwash - 70 Rupees"),
-    ("inside_vacuum", "Inside Vacuum - 40 Rupees"),
-    ("only_body", "Only Body - 30 Rupees"),
-    ("full_with_polish", "Full with Polish - 100 Rupees"),
-    ("only_polish", "Only Polish - 30 Rupees"),
+    ("full_carwash", "Full Carwash"),
+    ("inside_vacuum", "Inside Vacuum"),
+    ("only_body", "Only Body"),
+    ("full_with_polish", "Full with Polish"),
+    ("only_polish", "Only Polish"),
     ]
-# Defining prices for each service type
+# Default prices, used to seed the price catalog (ServicePrice) and for types missing from it
     SERVICE_PRICE = {
     "full_carwash": 70,
     "inside_vacuum": 40,
@@ -77,6 +84,21 @@ class CarWashService(models.Model):
 
     services_start_date = models.DateTimeField(auto_now_add=True)# jab created honga {created_at}
     services_end_date = models.DateTimeField(null=True, blank=True)  # Updated when completed
+    # Case-insensitive plate for lookups; computed by the database, so bulk writes keep it in step too
+    vehicle_key = models.GeneratedField(
+        expression=Upper("vehicle_number"), output_field=models.CharField(max_length=10), db_persist=True,
+    )
+
+    class Meta:
+        indexes = [
+            # Vehicle history: every service of a plate, newest first, paged by id
+            models.Index(fields=["vehicle_key", "-id"], name="service_vehicle_history_idx"),
+        ]
+
+    @staticmethod
+    def normalize_vehicle_number(value):
+        """The vehicle_key of a plate as typed, e.g. 'mh14-fu-1234' -> 'MH14FU1234'."""
+        return re.sub(r"[^A-Z0-9]", "", value.upper())
 
     def time_taken_for_services(self):
         """Calculate the time difference between start and end."""
@@ -85,6 +107,12 @@ class CarWashService(models.Model):
         return None
 
     def save(self, *args, **kwargs):
+        if self.pk is None:
+            event = ServiceEvent.CREATED
+        elif self.status == 'completed' and not self.services_end_date:
+            event = ServiceEvent.COMPLETED
+        else:
+            event = ServiceEvent.UPDATED
     # Check if the status is changing to "completed"
         if self.status == 'completed' and not self.services_end_date:
             self.services_end_date = now()
@@ -94,13 +122,67 @@ class CarWashService(models.Model):
                 employee.services_inhand_count -= 1  # Decrease services in hand 
             employee.services_finished += 1  # Increase services finished
             employee.save()
+            if self.pk is not None:
+                # Keep the auto-dispatch queues in step once the completion is committed
+                from .dispatch import service_completed
+                seconds = (self.services_end_date - self.services_start_date).total_seconds()
+                employee_id, service_type = employee.pk, self.service_type
+                transaction.on_commit(lambda: service_completed(employee_id, service_type, seconds))
 
         elif self.pk is None:  # New service being created
             employee = self.employee  # The employee who will perform the service
             employee.services_inhand_count += 1  # Increase services in hand
             employee.save()
+            from .dispatch import service_started
+            employee_id = employee.pk
+            transaction.on_commit(lambda: service_started(employee_id))
 
         super().save(*args, **kwargs)
+        ServiceEvent.record(event, self.pk, self)
+        if event == ServiceEvent.UPDATED and self.status == 'completed':
+            # Edits a bucket the analytics cache may consider final
+            transaction.on_commit(lambda: invalidate("analytics"))
+
+    @classmethod
+    def complete_many(cls, services):
+        """
+        What save() does when a service is completed, for many in-progress services at once: one update of
+        the services, one counter update per group of employees finishing the same number, one event insert.
+        """
+        end = now()
+        cls.objects.filter(pk__in=[service.pk for service in services]).update(
+            status="completed", services_end_date=end,
+        )
+        for service in services:
+            service.status = "completed"
+            service.services_end_date = end
+
+        finished = Counter(service.employee_id for service in services if service.employee_id is not None)
+        employees_by_count = {}
+        for employee_id, count in finished.items():
+            employees_by_count.setdefault(count, []).append(employee_id)
+        for count, employee_ids in employees_by_count.items():
+            Users.objects.filter(pk__in=employee_ids).update(
+                services_inhand_count=Greatest(F("services_inhand_count") - count, 0),
+                services_finished=F("services_finished") + count,
+            )
+
+        from .dispatch import services_completed
+        completions = [
+            (service.employee_id, service.service_type, (end - service.services_start_date).total_seconds())
+            for service in services if service.employee_id is not None
+        ]
+        transaction.on_commit(lambda: services_completed(completions))
+        ServiceEvent.record_many(ServiceEvent.COMPLETED, services)
+
+    def delete(self, *args, **kwargs):
+        # Not a post_delete receiver: that would turn cascade deletes of users into per-row deletes
+        service_id = self.pk
+        result = super().delete(*args, **kwargs)
+        ServiceEvent.record(ServiceEvent.DELETED, service_id)
+        if self.status == 'completed':
+            transaction.on_commit(lambda: invalidate("analytics"))
+        return result
 
 
     def __str__(self):
@@ -108,39 +190,165 @@ class CarWashService(models.Model):
 
     @property
     def price(self):
-        """Returns the price based on the selected service type."""
-        return self.SERVICE_PRICE.get(self.service_type, 0)  # Default to 0 if no match
+        """Returns the current catalog price of the selected service type."""
+        from .pricing import price_catalog
+        return price_catalog().price(self.service_type)
     
     # Making a static method in service for sales count
     @staticmethod
     def count_services_by_period(period):
         """Count services based on the period selected by the user."""
-        today = timezone.now().date()
-        today_date = CarWashService.objects.filter(services_start_date__date=today)
+        from .archive import service_history
 
+        today = timezone.now().date()
         yesterday = today - timedelta(days=1)
-        yesterday_date = CarWashService.objects.filter(services_start_date__date=yesterday)
 
         start_of_week = today - timedelta(days=today.weekday())  # Monday
         end_of_week = start_of_week + timedelta(days=6)  # Sunday
-        week_date = CarWashService.objects.filter(services_start_date__gte=start_of_week, services_start_date__lte=end_of_week)
-
-        month_date = CarWashService.objects.filter(services_start_date__month=today.month, services_start_date__year=today.year)
 
+        # First day of the period (whether the archive is read depends on it) and the period filter
         period_dict={
-            "today":today_date,
-            "yesterday":yesterday_date,
-            "weekly":week_date,
-            "monthly":month_date
+            "today": (today, Q(services_start_date__date=today)),
+            "yesterday": (yesterday, Q(services_start_date__date=yesterday)),
+            "weekly": (start_of_week,
+                       Q(services_start_date__gte=start_of_week, services_start_date__lte=end_of_week)),
+            "monthly": (today.replace(day=1),
+                        Q(services_start_date__month=today.month, services_start_date__year=today.year)),
         }
 
-        count = period_dict.get(period, None)
-
-        if count is not None:
-            return count  # Return the count of services for the given period
-        else:
+        if period not in period_dict:
             return 0  # Return 0 if period is invalid
 
+        first_day, in_period = period_dict[period]
+        since = timezone.make_aware(datetime.combine(first_day, time.min))
+        return service_history(since).filter(in_period)  # The services of the given period
+
+
+class ArchivedCarWashService(models.Model):
+    """A completed service moved out of CarWashService by archive_services; keeps its original id."""
+
+    id = models.BigIntegerField(primary_key=True)
+    service_type = models.CharField(max_length=50, choices=CarWashService.SERVICE_TYPE_CHOICES)
+    employee = models.ForeignKey('Users', null=True, blank=True, on_delete=models.CASCADE,
+                                 related_name="archived_services_done")
+    customer = models.ForeignKey('Users', on_delete=models.CASCADE, related_name="archived_services")
+    status = models.CharField(choices=CarWashService.STATUS, max_length=15)
+    final_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    vehicle_number = models.CharField(max_length=10)
+    services_start_date = models.DateTimeField()
+    services_end_date = models.DateTimeField(null=True, blank=True)
+    vehicle_key = models.GeneratedField(
+        expression=Upper("vehicle_number"), output_field=models.CharField(max_length=10), db_persist=True,
+    )
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["vehicle_key", "-id"], name="archive_vehicle_history_idx"),
+            models.Index(fields=["services_start_date"], name="archive_start_date_idx"),
+            models.Index(fields=["services_end_date"], name="archive_end_date_idx"),
+        ]
+
+
+class ServiceHistory(models.Model):
+    """
+    Read-only view of CarWashService and ArchivedCarWashService together (UNION ALL, created in migration
+    0013), for the reports whose range reaches back into the archive. See archive.service_history().
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    service_type = models.CharField(max_length=50, choices=CarWashService.SERVICE_TYPE_CHOICES)
+    employee = models.ForeignKey('Users', null=True, on_delete=models.DO_NOTHING, db_constraint=False,
+                                 related_name="+")
+    customer = models.ForeignKey('Users', on_delete=models.DO_NOTHING, db_constraint=False, related_name="+")
+    status = models.CharField(choices=CarWashService.STATUS, max_length=15)
+    final_price = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    vehicle_number = models.CharField(max_length=10)
+    services_start_date = models.DateTimeField()
+    services_end_date = models.DateTimeField(null=True)
+    vehicle_key = models.CharField(max_length=10)
+    archived = models.BooleanField()
+
+    class Meta:
+        managed = False
+        db_table = "myapp_servicehistory"
+
+
+class ServiceEvent(models.Model):
+    """Change feed of CarWashService rows; the id is the replay cursor of the live board stream."""
+
+    CREATED = "created"
+    UPDATED = "updated"
+    COMPLETED = "completed"
+    DELETED = "deleted"
+    KINDS = [(CREATED, "Created"), (UPDATED, "Updated"), (COMPLETED, "Completed"), (DELETED, "Deleted")]
+
+    service_id = models.BigIntegerField()  # Not a foreign key, events outlive deleted services
+    kind = models.CharField(max_length=10, choices=KINDS)
+    data = models.TextField()  # The service as rendered by the API, JSON
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @staticmethod
+    def record(kind, service_id, service=None):
+        """Store one event in the writing transaction and wake the stream feed once it commits."""
+        from rest_framework.renderers import JSONRenderer
+        from .events import feed
+        from .serializer import CarWashServiceSerializer
+
+        data = CarWashServiceSerializer(service).data if service is not None else {"id": service_id}
+        ServiceEvent.objects.create(service_id=service_id, kind=kind, data=JSONRenderer().render(data).decode())
+        transaction.on_commit(feed.notify)
+
+    @staticmethod
+    def record_many(kind, services):
+        """record() for many services with one insert."""
+        from rest_framework.renderers import JSONRenderer
+        from .events import feed
+        from .serializer import CarWashServiceSerializer
+
+        renderer = JSONRenderer()
+        ServiceEvent.objects.bulk_create(
+            ServiceEvent(service_id=data["id"], kind=kind, data=renderer.render(data).decode())
+            for data in CarWashServiceSerializer(services, many=True).data
+        )
+        transaction.on_commit(feed.notify)
+
+
+class IdempotencyKey(models.Model):
+    """Stored outcome of a POST sent with an Idempotency-Key header, replayed to retries of the same request."""
+
+    user = models.ForeignKey('Users', on_delete=models.CASCADE, related_name="idempotency_keys")
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)  # sha256 of method, path and body
+    response_status = models.PositiveSmallIntegerField()
+    response_body = models.TextField()  # JSON of the response data
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "key"], name="unique_idempotency_key"),
+        ]
+
+
+class ServicePrice(models.Model):
+    """One price of a service type, valid from effective_from until the next row of the same type."""
+
+    service_type = models.CharField(max_length=50, choices=CarWashService.SERVICE_TYPE_CHOICES)
+    label = models.CharField(max_length=50)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    effective_from = models.DateTimeField(default=now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # Lets every process notice edits, see pricing.py
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["service_type", "effective_from"], name="unique_service_price_start"),
+        ]
+
+    def __str__(self):
+        return f"{self.service_type} {self.price} from {self.effective_from:%Y-%m-%d}"
+
 
 class Reviewmodel(models.Model):
 
@@ -157,6 +365,52 @@ class Reviewmodel(models.Model):
 
     def __str__(self):
         return f"{self.ratings()}"
+
+
+# Running totals of all reviews, kept in a single row so the public widget needs one read
+class ReviewSummary(models.Model):
+    SUMMARY_ID = 1
+
+    count = models.PositiveIntegerField(default=0)
+    ratings_total = models.PositiveIntegerField(default=0)
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+
+    @property
+    def mean(self):
+        """Average rating, or None when nothing has been reviewed yet."""
+        if not self.count:
+            return None
+        return round(self.ratings_total / self.count, 2)
+
+    @property
+    def histogram(self):
+        return {str(rating): getattr(self, f"rating_{rating}") for rating in range(1, 6)}
+
+    @staticmethod
+    def record(rating):
+        """Add one rating to the summary with a single atomic UPDATE."""
+        updated = ReviewSummary.objects.filter(pk=ReviewSummary.SUMMARY_ID).update(
+            count=F("count") + 1,
+            ratings_total=F("ratings_total") + rating,
+            **{f"rating_{rating}": F(f"rating_{rating}") + 1},
+        )
+        if not updated:
+            # Summary row is missing, rebuild it from the reviews (which include this one)
+            ReviewSummary.rebuild()
+
+    @staticmethod
+    def rebuild():
+        """Recompute the summary row from every stored review."""
+        totals = Reviewmodel.objects.aggregate(
+            count=Count("id"),
+            ratings_total=Coalesce(Sum("ratings"), 0),
+            **{f"rating_{rating}": Count("id", filter=Q(ratings=rating)) for rating in range(1, 6)},
+        )
+        ReviewSummary.objects.update_or_create(pk=ReviewSummary.SUMMARY_ID, defaults=totals)
     
 class PartsListModel(models.Model):
 
@@ -181,7 +435,57 @@ class Purchasemodel(models.Model):
     quantity = models.PositiveIntegerField(default=1)
     total_price = models.PositiveIntegerField()
 
+    class Meta:
+        constraints = [
+            # One purchase line per part sold by an employee to a customer
+            models.UniqueConstraint(fields=["parts", "employee", "customer"], name="unique_purchase_line"),
+        ]
+
     def save(self, *args, **kwargs):
         # Calculate total price based on quantity
         self.total_price = self.parts.parts_prices * self.quantity
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def add_purchase(part, employee, customer, quantity):
+        """
+        Insert a purchase line or merge it into the existing (parts, employee, customer) line.
+        Quantity and total price are incremented by the database in a single statement; the sale itself
+        is kept as a dated PartSale, since the line only holds the date of its latest sale.
+        """
+        qn = connection.ops.quote_name
+        opts = Purchasemodel._meta
+        table = qn(opts.db_table)
+        col = {name: qn(opts.get_field(name).column)
+               for name in ("parts", "customer", "employee", "purchase_date", "quantity", "total_price")}
+        sold_at = now()
+        purchase_date = opts.get_field("purchase_date").get_db_prep_save(sold_at, connection)
+
+        sql = f"""
+            INSERT INTO {table} ({col['parts']}, {col['customer']}, {col['employee']},
+                                 {col['purchase_date']}, {col['quantity']}, {col['total_price']})
+            VALUES (%s, %s, %s, %s, %s, %s)
+            ON CONFLICT ({col['parts']}, {col['employee']}, {col['customer']}) DO UPDATE SET
+                {col['quantity']} = {table}.{col['quantity']} + EXCLUDED.{col['quantity']},
+                {col['total_price']} = {table}.{col['total_price']} + EXCLUDED.{col['total_price']},
+                {col['purchase_date']} = EXCLUDED.{col['purchase_date']}
+            RETURNING {qn(opts.pk.column)}, {col['quantity']}, {col['total_price']}
+        """
+        params = [part.pk, customer.pk, employee.pk, purchase_date, quantity, part.parts_prices * quantity]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            pk, total_quantity, total_price = cursor.fetchone()
+        PartSale.objects.create(purchase_id=pk, quantity=quantity, total_price=part.parts_prices * quantity,
+                                sold_at=sold_at)
+
+        return Purchasemodel(pk=pk, parts=part, customer=customer, employee=employee,
+                             quantity=total_quantity, total_price=total_price)
+
+
+class PartSale(models.Model):
+    """One sale merged into a purchase line by Purchasemodel.add_purchase(), for reports by period (payroll)."""
+
+    purchase = models.ForeignKey('Purchasemodel', on_delete=models.CASCADE, related_name="sales")
+    quantity = models.PositiveIntegerField()
+    total_price = models.PositiveIntegerField()
+    sold_at = models.DateTimeField(default=now, db_index=True)
@@ -0,0 +1,110 @@
+import calendar
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from .archive import service_history
+from .models import CarWashService, PartSale, Users
+
+# Monthly payroll: the salary pro-rated by the days employed in the month, a commission per service completed
+# in the month by service type, and a share of the parts sold. Each table is read once as columns and the
+# pay is computed with array operations over all employees at once, so a month of a large shop takes a few
+# queries and no per-row Python. The commission rates are PAYROLL_SERVICE_COMMISSION and
+# PAYROLL_PARTS_COMMISSION_RATE in the settings.
+
+SERVICE_TYPES = np.array(sorted(choice for choice, _ in CarWashService.SERVICE_TYPE_CHOICES))  # Sorted for lookup()
+
+PAYROLL_FIELDS = [
+    "employee_id", "name", "email", "joining_date", "last_working_day", "salary", "days_in_month", "days_employed",
+    "base_pay", *[f"services_{service_type}" for service_type in SERVICE_TYPES], "services_completed",
+    "service_revenue", "service_commission", "parts_sales", "parts_commission", "total_pay",
+]
+
+
+def columns(queryset, fields):
+    """queryset.values_list() as one NumPy array per field; fields maps the field to its dtype."""
+    rows = list(queryset.values_list(*fields))
+    if not rows:
+        return [np.empty(0, dtype=dtype) for dtype in fields.values()]
+    return [np.array(column, dtype=dtype) for column, dtype in zip(zip(*rows), fields.values())]
+
+
+def lookup(keys, values):
+    """Positions of values in the sorted array keys, and the mask of the values found there."""
+    index = np.searchsorted(keys, values)
+    found = index < len(keys)
+    found[found] = keys[index[found]] == values[found]
+    return index, found
+
+
+def money(values):
+    return np.char.mod("%.2f", values)
+
+
+def month_payroll(year, month, using="default"):
+    """Payroll rows of a month, one per employee who was employed in it or completed or sold anything."""
+    days_in_month = calendar.monthrange(year, month)[1]
+    first_day, last_day = date(year, month, 1), date(year, month, days_in_month)
+    start = timezone.make_aware(datetime.combine(first_day, time.min))
+    end = timezone.make_aware(datetime.combine(last_day + timedelta(days=1), time.min))
+
+    ids, names, emails, salary, joined, left = columns(
+        Users.objects.using(using).filter(role="employee").order_by("id"),
+        {"id": np.int64, "name": object, "email": object, "salary": np.float64,
+         "joining_date": "datetime64[D]", "last_working_day": "datetime64[D]"},
+    )
+    salary = np.nan_to_num(salary)  # No salary set
+
+    # Days employed: the overlap of [joining_date, last_working_day] with the month, both ends inclusive
+    month_start, month_end = np.datetime64(first_day, "D"), np.datetime64(last_day, "D")
+    employed_from = np.maximum(joined, month_start)
+    employed_to = np.minimum(np.where(np.isnat(left), month_end, left), month_end)
+    days_employed = np.clip((employed_to - employed_from).astype(np.int64) + 1, 0, days_in_month)
+    base_pay = np.round(salary * days_employed / days_in_month, 2)
+
+    # Services completed in the month, counted per employee and service type
+    service_employees, service_types, prices = columns(
+        service_history(start, using).filter(
+            status="completed", services_end_date__gte=start, services_end_date__lt=end, employee__isnull=False,
+        ),
+        {"employee_id": np.int64, "service_type": str, "final_price": np.float64},
+    )
+    prices = np.nan_to_num(prices)
+    index, found = lookup(ids, service_employees)
+    type_index, known_type = lookup(SERVICE_TYPES, service_types)
+    counted = found & known_type
+    counts = np.bincount(
+        index[counted] * len(SERVICE_TYPES) + type_index[counted], minlength=len(ids) * len(SERVICE_TYPES),
+    ).reshape(len(ids), len(SERVICE_TYPES))
+    service_revenue = np.bincount(index[found], weights=prices[found], minlength=len(ids))
+    rates = settings.PAYROLL_SERVICE_COMMISSION
+    service_commission = counts @ np.array([rates.get(service_type, 0) for service_type in SERVICE_TYPES])
+
+    # Parts sold in the month, from the dated sales: a purchase line merges sales of every month
+    sale_employees, sale_totals = columns(
+        PartSale.objects.using(using).filter(sold_at__gte=start, sold_at__lt=end),
+        {"purchase__employee_id": np.int64, "total_price": np.float64},
+    )
+    index, found = lookup(ids, sale_employees)
+    parts_sales = np.bincount(index[found], weights=sale_totals[found], minlength=len(ids))
+    parts_commission = np.round(parts_sales * settings.PAYROLL_PARTS_COMMISSION_RATE, 2)
+
+    total_pay = base_pay + service_commission + parts_commission  # The sum of the amounts as written
+    services_completed = counts.sum(axis=1)
+    paid = np.flatnonzero((days_employed > 0) | (services_completed > 0) | (parts_sales > 0))
+
+    # Only the rows to write go back to Python objects, a column at a time
+    table = {
+        "employee_id": ids[paid], "name": names[paid], "email": emails[paid],
+        "joining_date": joined[paid].astype(object), "last_working_day": left[paid].astype(object),
+        "salary": money(salary[paid]), "days_in_month": np.full(len(paid), days_in_month),
+        "days_employed": days_employed[paid], "base_pay": money(base_pay[paid]),
+        **{f"services_{service_type}": counts[paid, column] for column, service_type in enumerate(SERVICE_TYPES)},
+        "services_completed": services_completed[paid], "service_revenue": money(service_revenue[paid]),
+        "service_commission": money(service_commission[paid]), "parts_sales": money(parts_sales[paid]),
+        "parts_commission": money(parts_commission[paid]), "total_pay": money(total_pay[paid]),
+    }
+    table = {field: table[field].tolist() for field in PAYROLL_FIELDS}
+    return [dict(zip(PAYROLL_FIELDS, row)) for row in zip(*table.values())]
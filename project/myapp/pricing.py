@@ -0,0 +1,105 @@
+import threading
+import time
+from bisect import bisect_right
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .caching import namespace_version
+from .models import CarWashService, ServicePrice
+
+# In-process snapshot of the service price catalog. Every read checks the "prices" cache namespace version,
+# which a catalog write moves (see signals.py); with the default LocMemCache that only reaches the process
+# that wrote. So at most every PRICE_CATALOG_CHECK_SECONDS a read also compares the catalog's row count and
+# newest updated_at in the database with the snapshot's, which every process sees. Scheduled prices are part
+# of the snapshot, so a price whose effective_from arrives takes over without a reload.
+
+NAMESPACE = "prices"
+CENTS = Decimal("0.01")
+
+
+class PriceSnapshot:
+
+    def __init__(self, version, rows):
+        self.version = version
+        self.fingerprint = (len(rows), max((row["updated_at"] for row in rows), default=None))
+        self.checked_at = time.monotonic()
+        self.schedule = {}  # service_type -> catalog rows ordered by effective_from
+        for row in rows:
+            self.schedule.setdefault(row["service_type"], []).append(row)
+        self.starts = {
+            service_type: [row["effective_from"] for row in rows] for service_type, rows in self.schedule.items()
+        }
+
+    def entry(self, service_type, at=None):
+        """Catalog row in effect at the given time (now by default), or None."""
+        starts = self.starts.get(service_type)
+        if not starts:
+            return None
+        index = bisect_right(starts, at or timezone.now())
+        return self.schedule[service_type][index - 1] if index else None
+
+    def price(self, service_type, at=None):
+        entry = self.entry(service_type, at)
+        if entry is None:
+            return Decimal(CarWashService.SERVICE_PRICE.get(service_type, 0))
+        return entry["price"]
+
+    def current(self, at=None):
+        """The price list in effect, one entry per service type."""
+        prices = []
+        for service_type, default_label in CarWashService.SERVICE_TYPE_CHOICES:
+            entry = self.entry(service_type, at)
+            prices.append({
+                "service_type": service_type,
+                "label": entry["label"] if entry else default_label,
+                "price": self.price(service_type, at),
+                "effective_from": entry["effective_from"] if entry else None,
+            })
+        return prices
+
+
+_snapshot = None
+_lock = threading.Lock()
+
+
+def load_snapshot(version):
+    # Always from the primary: a lagging replica would pin stale prices to the new version
+    rows = (
+        ServicePrice.objects.using(DEFAULT_DB_ALIAS)
+        .order_by("service_type", "effective_from")
+        .values("service_type", "label", "price", "effective_from", "updated_at")
+    )
+    return PriceSnapshot(version, list(rows))
+
+
+def catalog_fingerprint():
+    """Row count and newest updated_at of the catalog: any insert, edit or delete changes one of them."""
+    # From the primary too, a replica could still hold the catalog that is being replaced
+    totals = ServicePrice.objects.using(DEFAULT_DB_ALIAS).aggregate(count=Count("id"), updated=Max("updated_at"))
+    return totals["count"], totals["updated"]
+
+
+def price_catalog():
+    """Current price snapshot, reloaded when the catalog version or the catalog in the database changed."""
+    global _snapshot
+    version = namespace_version(NAMESPACE)
+    snapshot = _snapshot
+    if (
+        snapshot is None or snapshot.version != version
+        or time.monotonic() - snapshot.checked_at >= settings.PRICE_CATALOG_CHECK_SECONDS
+    ):
+        with _lock:
+            snapshot = _snapshot
+            if snapshot is None or snapshot.version != version:
+                _snapshot = load_snapshot(version)
+            elif time.monotonic() - snapshot.checked_at >= settings.PRICE_CATALOG_CHECK_SECONDS:
+                if catalog_fingerprint() != snapshot.fingerprint:
+                    _snapshot = load_snapshot(version)  # Written by another process
+                else:
+                    snapshot.checked_at = time.monotonic()
+            snapshot = _snapshot
+    return snapshot
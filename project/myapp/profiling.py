@@ -0,0 +1,114 @@
+import cProfile
+import io
+import json
+import pstats
+import re
+import time
+import uuid
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+# Opt-in profiles of single requests, taken by ProfilingMiddleware. A capture is the cProfile data as a
+# .prof file (for pstats or snakeviz) plus a JSON summary with the request, its SQL statements and the
+# hottest functions. Only the newest PROFILING_MAX_CAPTURES captures are kept.
+
+CAPTURE_ID = re.compile(r"^\d{8}T\d{12}-[0-9a-f]{8}$")
+TOP_FUNCTIONS = 40
+LISTED_FIELDS = ("id", "created_at", "method", "path", "user", "status", "seconds", "sql_count", "sql_seconds")
+
+
+def capture_dir():
+    return Path(settings.PROFILING_DIR)
+
+
+class Capture:
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        self.queries = []
+        self.sql_recorded = False
+
+    def query_wrapper(self, alias):
+        def record(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                # Parameters are left out, they may hold credentials
+                self.queries.append({
+                    "alias": alias, "sql": sql, "many": many, "seconds": round(time.perf_counter() - start, 6),
+                })
+        return record
+
+    @contextmanager
+    def recording_sql(self):
+        """Lists the statements run by this thread's connections while active."""
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self.query_wrapper(connection.alias)))
+            self.sql_recorded = True
+            yield
+
+    def save(self, request, status_code, seconds, error=None):
+        """Write the capture and drop the oldest beyond the retention limit; returns the capture id."""
+        capture_id = f"{timezone.now():%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:8]}"
+        directory = capture_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        self.profiler.dump_stats(directory / f"{capture_id}.prof")
+
+        top = io.StringIO()
+        pstats.Stats(self.profiler, stream=top).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+        user = getattr(request, "profiled_by", None)
+        summary = {
+            "id": capture_id,
+            "created_at": timezone.now().isoformat(),
+            "method": request.method,
+            "path": request.path,
+            "query_string": request.META.get("QUERY_STRING", ""),
+            "user": user.email if user is not None else None,
+            "status": status_code,
+            "error": error,
+            "seconds": round(seconds, 6),
+            "sql_recorded": self.sql_recorded,
+            "sql_count": len(self.queries),
+            "sql_seconds": round(sum(query["seconds"] for query in self.queries), 6),
+            "queries": self.queries,
+            "top_functions": top.getvalue(),
+        }
+        (directory / f"{capture_id}.json").write_text(json.dumps(summary, indent=1))
+        prune(directory)
+        return capture_id
+
+
+def prune(directory):
+    summaries = sorted(directory.glob("*.json"))  # Ids start with the timestamp, oldest first
+    for summary in summaries[:max(0, len(summaries) - settings.PROFILING_MAX_CAPTURES)]:
+        summary.with_suffix(".prof").unlink(missing_ok=True)
+        summary.unlink(missing_ok=True)
+
+
+def list_captures():
+    """Summaries without the query lists and stats, newest first."""
+    directory = capture_dir()
+    if not directory.is_dir():
+        return []
+    captures = []
+    for path in sorted(directory.glob("*.json"), reverse=True):
+        try:
+            summary = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue  # Pruned or still being written
+        captures.append({field: summary.get(field) for field in LISTED_FIELDS})
+    return captures
+
+
+def capture_path(capture_id, suffix):
+    """Path of a capture file, or None for ids that are not capture ids (no path tricks)."""
+    if not CAPTURE_ID.match(capture_id or ""):
+        return None
+    path = capture_dir() / f"{capture_id}{suffix}"
+    return path if path.is_file() else None
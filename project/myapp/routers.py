@@ -0,0 +1,31 @@
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Set by ReplicaRoutingMiddleware while a replica-safe view handles the request
+replica_reads = ContextVar("replica_reads", default=False)
+
+
+def replica_alias():
+    """The configured reporting/replica alias, or None when only the primary exists."""
+    alias = getattr(settings, "REPORTING_DATABASE_ALIAS", None)
+    return alias if alias in settings.DATABASES else None
+
+
+class ReplicaRouter:
+    """
+    Send reads from report views and list GETs to the reporting replica.
+    Writes, and reads from everything else, stay on the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if replica_reads.get():
+            return replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data, objects read from either may be related
+        return True
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import CarWashService,Reviewmodel,PartsListModel,Purchasemodel,Users
+from .models import CarWashService,Reviewmodel,PartsListModel,Purchasemodel,ServicePrice,Users
 from django.contrib.auth.hashers import make_password
 import re
 from django.utils import timezone
@@ -294,13 +294,19 @@ class CustomerManage(serializers.ModelSerializer):
 
 # Serializer for records of serives
 class CarWashServiceSerializer(serializers.ModelSerializer):
-    employee = serializers.PrimaryKeyRelatedField(queryset=Users.objects.all())
+    employee = serializers.PrimaryKeyRelatedField(queryset=Users.objects.all(), required=False)
     customer = serializers.PrimaryKeyRelatedField(queryset=Users.objects.all())
     service_type = serializers.ChoiceField(choices=CarWashService.SERVICE_TYPE_CHOICES,required=True)
+    auto_assign = serializers.BooleanField(default=False, write_only=True)  # Let dispatch pick the employee
 
     class Meta:
         model = CarWashService
-        fields = ["id", "service_type", "employee", "customer", "status", "final_price","vehicle_number"]
+        fields = ["id", "service_type", "employee", "customer", "status", "final_price","vehicle_number", "auto_assign"]
+
+    def validate(self, data):
+        if not data.get("auto_assign") and not data.get("employee"):
+            raise serializers.ValidationError({"employee": ["This field is required."]})
+        return data
 
     def validate_vehicle_number(self, value):
         # Custom validation for vehicle number
@@ -397,6 +403,7 @@ class PurchaseSerializer(serializers.ModelSerializer):
     class Meta:
         model = Purchasemodel
         fields = ["id","parts", "customer", "employee", "quantity"]
+        validators = []  # Repeated lines are merged by Purchasemodel.add_purchase, not rejected
 
     def validate_quantity(self, value):
         """
@@ -414,4 +421,20 @@ class PurchaseSerializer(serializers.ModelSerializer):
         # Ensure the part exists in the database
         if part is None:
             raise serializers.ValidationError({"parts": "The part does not exist."})
-        return data
\ No newline at end of file
+        return data
+
+
+class ServicePriceSerializer(serializers.ModelSerializer):
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+
+    class Meta:
+        model = ServicePrice
+        fields = ["id", "service_type", "label", "price", "effective_from", "created_at"]
+        read_only_fields = ["created_at"]
+
+
+# Services closed together at the end of a shift
+class BulkCompleteSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=500,
+    )
@@ -0,0 +1,50 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import invalidate
+from .http_cache import invalidate_response_cache
+from .models import PartsListModel, Reviewmodel, ServicePrice, Users
+
+
+# Keep the reference cache in step with writes. Invalidation runs after commit,
+# so a concurrent reader cannot re-cache the old row before the write is visible.
+
+@receiver([post_save, post_delete], sender=PartsListModel)
+def invalidate_parts(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate("parts"))
+
+
+@receiver([post_save, post_delete], sender=ServicePrice)
+def invalidate_prices(sender, instance, **kwargs):
+    # Moves the catalog version, every process reloads its price snapshot on the next read
+    transaction.on_commit(lambda: invalidate("prices"))
+
+
+@receiver([post_save, post_delete], sender=Users)
+def invalidate_user(sender, instance, **kwargs):
+    # On every save, so a deactivation, role or password change reaches the next authenticated request.
+    # The pk is taken now: a deleted instance has lost it by the time the transaction commits.
+    pk = instance.pk
+    transaction.on_commit(lambda: invalidate("users", pk))
+
+
+@receiver(post_save, sender=Users)
+def add_employee_to_dispatch(sender, instance, created, **kwargs):
+    # New employees join the auto-dispatch queues, deactivated ones leave them
+    if instance.role == "employee" and (created or not instance.is_active):
+        transaction.on_commit(lambda: invalidate("dispatch"))
+
+
+@receiver(post_delete, sender=Users)
+def remove_employee_from_dispatch(sender, instance, **kwargs):
+    if instance.role == "employee":
+        transaction.on_commit(lambda: invalidate("dispatch"))
+
+
+@receiver([post_save, post_delete], sender=Reviewmodel)
+def invalidate_reviews(sender, instance, **kwargs):
+    def flush():
+        invalidate("reviews")
+        invalidate_response_cache("reviews")
+    transaction.on_commit(flush)
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+import traceback
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+# Statements slower than SLOW_QUERY_MS, logged as one JSON object per line on the "myapp.slow_queries" logger
+# with the URL name and view method of the request that ran them and the project frames of the stack that
+# issued them. With SLOW_QUERY_EXPLAIN the plan of each query shape is logged with its first slow statement.
+# SQL parameters are never logged, they may hold credentials.
+
+logger = logging.getLogger("myapp.slow_queries")
+
+# Request being handled, set by SlowQueryLogMiddleware; follows it into sync_to_async threads
+current_request = ContextVar("slow_query_request", default=None)
+
+STACK_FRAMES = 8
+MAX_SHAPES = 1000  # Shapes remembered as explained; new shapes past this are logged without a plan
+PROJECT_ROOT = str(Path(settings.BASE_DIR).resolve())
+# Frames of the logging itself and of the middleware chain say nothing about the query
+SKIPPED_FILES = {str(Path(__file__).resolve()), str(Path(__file__).resolve().with_name("middleware.py"))}
+
+_explained = set()
+_lock = threading.Lock()
+_explaining = threading.local()
+
+IN_LIST = re.compile(r"\((?:\s*%s\s*,)+\s*%s\s*\)")
+NUMBER = re.compile(r"\b\d+\b")
+SPACE = re.compile(r"\s+")
+
+
+def query_shape(sql):
+    """Fingerprint of a statement with IN lists and inlined numbers collapsed."""
+    normalized = SPACE.sub(" ", NUMBER.sub("?", IN_LIST.sub("(...)", sql))).strip()
+    return hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+
+def project_stack():
+    """The innermost project frames of the current stack, outermost first."""
+    frames = [
+        frame for frame in traceback.extract_stack()
+        if frame.filename.startswith(PROJECT_ROOT) and frame.filename not in SKIPPED_FILES
+        and "site-packages" not in frame.filename
+    ]
+    return [
+        f"{Path(frame.filename).relative_to(PROJECT_ROOT)}:{frame.lineno} in {frame.name}: "
+        f"{(frame.line or '').strip()}"
+        for frame in frames[-STACK_FRAMES:]
+    ]
+
+
+def request_context():
+    request = current_request.get()
+    match = getattr(request, "resolver_match", None) if request is not None else None
+    if match is None:
+        return {"url_name": None, "route": None, "method": getattr(request, "method", None), "view": None}
+    view_class = getattr(match.func, "view_class", None)
+    view = f"{view_class.__name__}.{request.method.lower()}" if view_class else match.func.__name__
+    return {"url_name": match.url_name, "route": match.route, "method": request.method, "view": view}
+
+
+def first_of_shape(shape):
+    with _lock:
+        if shape in _explained or len(_explained) >= MAX_SHAPES:
+            return False
+        _explained.add(shape)
+        return True
+
+
+def explain(connection, sql, params):
+    """The backend's EXPLAIN of a SELECT, in a savepoint so a failure cannot break the caller's transaction."""
+    _explaining.active = True
+    try:
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+                return "\n".join(" ".join(str(column) for column in row) for row in cursor.fetchall())
+    except DatabaseError as exc:
+        return f"EXPLAIN failed: {exc}"
+    finally:
+        _explaining.active = False
+
+
+def log_slow_query(execute, sql, params, many, context):
+    """Database execute wrapper installed on every connection while the slow query log is on."""
+    if getattr(_explaining, "active", False):
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    failed = True
+    try:
+        result = execute(sql, params, many, context)
+        failed = False
+        return result
+    finally:
+        elapsed = time.perf_counter() - start
+        if elapsed * 1000 >= settings.SLOW_QUERY_MS:
+            report(context["connection"], sql, params, many, elapsed, failed)
+
+
+def report(connection, sql, params, many, elapsed, failed):
+    shape = query_shape(sql)
+    entry = {
+        "event": "slow_query",
+        "ms": round(elapsed * 1000, 2),
+        "alias": connection.alias,
+        **request_context(),
+        "sql": sql,
+        "params_count": 0 if params is None else len(params),
+        "many": many,
+        "failed": failed,
+        "shape": shape,
+        "stack": project_stack(),
+    }
+    if (
+        settings.SLOW_QUERY_EXPLAIN and not many and not failed
+        and sql.lstrip()[:6].upper() in ("SELECT", "WITH")
+        and first_of_shape(shape)
+    ):
+        entry["explain"] = explain(connection, sql, params)
+    logger.warning(json.dumps(entry, default=str))
+
+
+def install_slow_query_log(sender, connection, **kwargs):
+    if log_slow_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(log_slow_query)
@@ -0,0 +1,7 @@
+"""
+Tests, one module per feature, run against SQLite:
+    python manage.py test myapp --settings=project.settings_bench
+
+The replica routing tests are skipped there, they need the second SQLite database of
+    python manage.py test myapp.tests.test_replica --settings=project.settings_replica
+"""
@@ -0,0 +1,141 @@
+"""Seeded data shared by the benchmark and the feature tests."""
+
+import os
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from ..models import CarWashService, PartSale, PartsListModel, Purchasemodel, Reviewmodel, ReviewSummary, Users
+
+
+def env_int(name, default):
+    return int(os.getenv(name, default))
+
+
+VOLUMES = {
+    "employees": env_int("BENCH_EMPLOYEES", 20),
+    "customers": env_int("BENCH_CUSTOMERS", 200),
+    "services": env_int("BENCH_SERVICES", 2000),
+    "parts": env_int("BENCH_PARTS", 100),
+    "purchases": env_int("BENCH_PURCHASES", 500),
+    "reviews": env_int("BENCH_REVIEWS", 500),
+}
+ITERATIONS = env_int("BENCH_ITERATIONS", 5)  # Timed calls per route or serializer
+REPORT_DIR = Path(os.getenv("BENCH_REPORT_DIR", settings.BASE_DIR / "bench_reports"))
+BENCH_PASSWORD = "bench@123"
+
+
+def vehicle_number(n):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return f"MH{n % 100:02d}{letters[n // 100 % 26]}{letters[n // 2600 % 26]}{n % 10000:04d}"
+
+
+def seed_database(volumes, rng):
+    """Bulk-load users, services, parts, purchases and reviews; returns the fixtures the routes use."""
+    password = make_password(BENCH_PASSWORD)  # Hash once, every seeded user shares it
+
+    admin = Users.objects.create(
+        username="admin@bench.com", email="admin@bench.com", name="BenchAdmin", role="admin", password=password
+    )
+    employees = Users.objects.bulk_create(
+        Users(
+            username=f"emp{i}@bench.com", email=f"emp{i}@bench.com", name=f"BenchEmp{i}", role="employee",
+            salary=15000, services_inhand_count=0, services_finished=0, password=password,
+        )
+        for i in range(volumes["employees"])
+    )
+    customers = Users.objects.bulk_create(
+        Users(
+            username=f"cus{i}@bench.com", email=f"cus{i}@bench.com", name=f"BenchCus{i}", role="customer",
+            discount_remaining=0, free_services_used=0, password=password,
+        )
+        for i in range(volumes["customers"])
+    )
+
+    # bulk_create skips CarWashService.save, so the employee counters are filled in below
+    service_types = list(CarWashService.SERVICE_PRICE)
+    now = timezone.now()
+    services = []
+    for i in range(volumes["services"]):
+        service_type = rng.choice(service_types)
+        completed = rng.random() < 0.8
+        start = now - timedelta(minutes=rng.randint(30, 60 * 24 * 60))
+        services.append(CarWashService(
+            service_type=service_type,
+            employee=rng.choice(employees),
+            customer=rng.choice(customers),
+            status="completed" if completed else "in_progress",
+            final_price=CarWashService.SERVICE_PRICE[service_type],
+            vehicle_number=vehicle_number(i),
+            services_end_date=start + timedelta(minutes=rng.randint(10, 90)) if completed else None,
+        ))
+    services = CarWashService.objects.bulk_create(services)
+    # services_start_date is auto_now_add, spread it out afterwards
+    for service in services:
+        service.services_start_date = (service.services_end_date or now) - timedelta(minutes=rng.randint(10, 90))
+    CarWashService.objects.bulk_update(services, ["services_start_date"], batch_size=500)
+
+    for employee in employees:
+        own = [s for s in services if s.employee_id == employee.id]
+        employee.services_inhand_count = sum(s.status == "in_progress" for s in own)
+        employee.services_finished = sum(s.status == "completed" for s in own)
+    Users.objects.bulk_update(employees, ["services_inhand_count", "services_finished"], batch_size=500)
+
+    parts = PartsListModel.objects.bulk_create(
+        PartsListModel(
+            parts_name=f"bench-part-{i}", parts_prices=rng.randint(50, 5000),
+            parts_manufacture_date=date(2024, 1, 1), parts_expire_date=date(2030, 1, 1),
+            description="Seeded by the benchmark suite", stock_quantity=10000,
+        )
+        for i in range(volumes["parts"])
+    )
+
+    lines = set()
+    while len(lines) < min(volumes["purchases"], len(parts) * len(employees) * len(customers)):
+        lines.add((rng.choice(parts), rng.choice(employees), rng.choice(customers)))
+    purchases = []
+    for part, employee, customer in lines:
+        quantity = rng.randint(1, 5)
+        purchases.append(Purchasemodel(
+            parts=part, employee=employee, customer=customer, quantity=quantity,
+            total_price=part.parts_prices * quantity,
+        ))
+    purchases = Purchasemodel.objects.bulk_create(purchases)
+    PartSale.objects.bulk_create(
+        PartSale(purchase=purchase, quantity=purchase.quantity, total_price=purchase.total_price)
+        for purchase in purchases
+    )
+
+    Reviewmodel.objects.bulk_create(
+        Reviewmodel(ratings=rng.randint(1, 5), review=f"Benchmark review {i}")
+        for i in range(volumes["reviews"])
+    )
+    ReviewSummary.rebuild()
+
+    in_progress = next(s for s in services if s.status == "in_progress")
+    completed = next(s for s in services if s.status == "completed")
+    shift = [s for s in services if s.status == "in_progress"][:20]
+    return {
+        "admin": admin,
+        "employee": employees[0],
+        "customer": customers[0],
+        "in_progress": in_progress,
+        "completed": completed,
+        "shift": shift,
+        "part": parts[0],
+        "purchase": purchases[0],
+    }
+
+
+async def consume(iterator):
+    return b"".join([chunk async for chunk in iterator])
+
+
+def write_report(name, lines):
+    """Timings go to a file in REPORT_DIR rather than into the test runner's output."""
+    REPORT_DIR.mkdir(parents=True, exist_ok=True)
+    (REPORT_DIR / name).write_text("\n".join(lines) + "\n")
+
@@ -0,0 +1,93 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from ..analytics import bucket_floor, percentile_cont, service_analytics
+from ..caching import invalidate
+from ..models import CarWashService, Users
+
+
+class ServiceAnalytics(TestCase):
+    """Bucketed counts and durations of completed services, with settled buckets served from the cache."""
+
+    @classmethod
+    def setUpTestData(cls):
+        employee = Users.objects.create(
+            username="emp", name="Employee", email="emp@example.com", role="employee",
+            services_inhand_count=0, services_finished=0,
+        )
+        customer = Users.objects.create(username="cust", name="Customer", email="cust@example.com", role="customer")
+        # A Monday three weeks back, so every bucket below is long settled
+        cls.monday = bucket_floor(timezone.now(), "week") - timedelta(weeks=3)
+        # (hours after Monday 00:00 the service ended, minutes it took, service type)
+        completions = [
+            (1, 10, "full_carwash"), (1, 20, "full_carwash"), (1, 30, "full_carwash"), (1, 40, "full_carwash"),
+            (1, 15, "only_polish"),
+            (3, 25, "full_carwash"),
+            (26, 35, "full_carwash"),  # Tuesday
+            (7 * 24 + 5, 45, "only_body"),  # The next week
+        ]
+        services = CarWashService.objects.bulk_create(
+            CarWashService(
+                service_type=service_type, employee=employee, customer=customer, status="completed",
+                final_price=CarWashService.SERVICE_PRICE[service_type], vehicle_number="MH14fu1234",
+                services_end_date=cls.monday + timedelta(hours=hours, minutes=30),
+            )
+            for hours, _, service_type in completions
+        )
+        for service, (_, minutes, _) in zip(services, completions):
+            service.services_start_date = service.services_end_date - timedelta(minutes=minutes)
+        CarWashService.objects.bulk_update(services, ["services_start_date"])
+        cls.first = services[0]
+
+    def setUp(self):
+        invalidate("analytics")
+
+    def counts(self, size, days):
+        buckets = service_analytics(size, self.monday, self.monday + timedelta(days=days))
+        return [sum(row["count"] for row in bucket["services"]) for bucket in buckets]
+
+    def test_bucket_counts(self):
+        self.assertEqual(self.counts("hour", 1)[:5], [0, 5, 0, 1, 0])
+        self.assertEqual(sum(self.counts("hour", 1)), 6)
+        self.assertEqual(self.counts("day", 8), [6, 1, 0, 0, 0, 0, 0, 1])
+        self.assertEqual(self.counts("week", 14), [7, 1])
+
+    def test_rows_per_service_type(self):
+        hour = service_analytics("hour", self.monday + timedelta(hours=1), self.monday + timedelta(hours=2))[0]
+        self.assertEqual(hour["start"], self.monday + timedelta(hours=1))
+        rows = {row["service_type"]: row for row in hour["services"]}
+        self.assertEqual(rows["full_carwash"]["count"], 4)
+        self.assertEqual(rows["full_carwash"]["revenue"], Decimal(4 * CarWashService.SERVICE_PRICE["full_carwash"]))
+        self.assertEqual(rows["full_carwash"]["avg_duration_seconds"], 25 * 60)
+        # percentile_cont over 10, 20, 30, 40 minutes: 30 + 0.7 * 10
+        self.assertEqual(rows["full_carwash"]["p90_duration_seconds"], 37 * 60)
+        self.assertEqual(rows["only_polish"]["p90_duration_seconds"], 15 * 60)
+
+    def test_percentile_fallback(self):
+        self.assertEqual(percentile_cont([4, 1, 3, 2], 0.5), 2.5)
+        self.assertEqual(percentile_cont([10, 20, 30, 40, 50], 0.9), 46)
+        self.assertEqual(percentile_cont([7], 0.9), 7)
+        self.assertEqual(percentile_cont([1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11], 0.9), 10)
+
+    def test_closed_buckets_come_from_the_cache(self):
+        first = service_analytics("day", self.monday, self.monday + timedelta(days=7))
+        with self.assertNumQueries(0):
+            self.assertEqual(service_analytics("day", self.monday, self.monday + timedelta(days=7)), first)
+
+    def test_editing_a_completed_service_invalidates(self):
+        self.counts("day", 1)
+        self.first.final_price = 1
+        with self.captureOnCommitCallbacks(execute=True):
+            self.first.save()
+        day = service_analytics("day", self.monday, self.monday + timedelta(days=1))[0]
+        revenue = {row["service_type"]: row["revenue"] for row in day["services"]}
+        self.assertEqual(revenue["full_carwash"], 1 + 4 * CarWashService.SERVICE_PRICE["full_carwash"])
+
+    def test_deleting_a_completed_service_invalidates(self):
+        self.counts("day", 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.first.delete()
+        self.assertEqual(self.counts("day", 1), [5])
@@ -0,0 +1,37 @@
+import random
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from ..archive import service_history
+from ..export import SERVICE_EXPORT_FIELDS
+from ..models import ArchivedCarWashService, CarWashService
+from .fixtures import VOLUMES, seed_database
+
+
+class ServiceArchive(TestCase):
+    """Archived services leave the hot table but stay in every report read through service_history()."""
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_database(dict(VOLUMES, services=300, purchases=50, reviews=0), random.Random(1234))
+
+    def history(self, since=None):
+        return list(service_history(since).order_by("id").values_list(*SERVICE_EXPORT_FIELDS))
+
+    def test_archived_rows_stay_in_history(self):
+        before = self.history()
+        call_command("archive_services", older_than_days=30, batch_size=50, stdout=StringIO())
+
+        archived = ArchivedCarWashService.objects.count()
+        self.assertGreater(archived, 0)
+        self.assertEqual(CarWashService.objects.count() + archived, len(before))
+        self.assertEqual(self.history(), before)
+        self.assertEqual(self.history(timezone.now() - timedelta(days=60)), before)  # Reaches into the archive
+
+    def test_recent_ranges_skip_the_archive(self):
+        call_command("archive_services", older_than_days=30, stdout=StringIO())
+        self.assertIs(service_history(timezone.now() - timedelta(days=7)).model, CarWashService)
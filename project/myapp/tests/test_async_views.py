@@ -0,0 +1,40 @@
+import json
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, RequestFactory, TestCase
+from django.urls import reverse
+
+from ..async_views import AsyncGiveReviews
+from ..models import Reviewmodel
+from ..views import GiveReviews
+
+
+class AsyncReviewPages(TestCase):
+    """The async reviews view pages through the cursors exactly like the DRF view, both ways."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Reviewmodel.objects.bulk_create(Reviewmodel(ratings=i % 5 + 1, review=f"Review {i}") for i in range(7))
+
+    def setUp(self):
+        cache.clear()
+
+    def walk(self, fetch):
+        """Follow next links to the end, then previous links back; returns every body seen."""
+        bodies, url = [], reverse("see_reviews")
+        for link in ("next", "previous"):
+            while True:
+                cache.clear()  # The responses are cached by URL, each page must be built
+                body = json.loads(fetch(url).content)
+                bodies.append(body)
+                if not body[link]:
+                    break
+                url = body[link].removeprefix("http://testserver")
+        return bodies
+
+    def test_same_pages_as_drf(self):
+        drf = self.walk(lambda url: GiveReviews.as_view()(RequestFactory().get(url)))
+        native = self.walk(lambda url: async_to_sync(AsyncGiveReviews.as_view())(AsyncRequestFactory().get(url)))
+        self.assertEqual(native, drf)
+        self.assertEqual(len(drf), 8)  # Four pages of two, forward then back
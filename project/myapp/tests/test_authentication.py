@@ -0,0 +1,52 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ..authentication import CACHED_FIELDS
+from ..caching import invalidate, make_key
+from ..models import Users
+
+
+class CachedTokenUser(TestCase):
+    """The token's user comes from the cache, without secrets, and a change to the user drops it."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Users.objects.create(username="admin", name="Admin", email="admin@example.com", role="admin")
+        cls.admin.set_password("pass@123")
+        cls.admin.save()
+
+    def setUp(self):
+        invalidate("users")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.admin).access_token}")
+
+    def get(self):
+        return self.client.get(reverse("admin_api"))
+
+    def test_cache_holds_no_password(self):
+        self.assertEqual(self.get().status_code, 200)
+        cached = cache.get(make_key("users", self.admin.pk))
+        self.assertEqual(set(cached), set(CACHED_FIELDS))
+        self.assertNotIn("password", cached)
+
+    def test_cached_user_skips_the_lookup(self):
+        self.get()
+        with self.assertNumQueries(1):  # The admin list itself
+            self.assertEqual(self.get().status_code, 200)
+
+    def test_deactivated_user_is_refused(self):
+        self.assertEqual(self.get().status_code, 200)
+        self.admin.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin.save()
+        self.assertEqual(self.get().status_code, 401)
+
+    def test_demoted_user_loses_access(self):
+        self.assertEqual(self.get().status_code, 200)
+        self.admin.role = "employee"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin.save()
+        self.assertEqual(self.get().status_code, 403)
@@ -0,0 +1,281 @@
+"""
+Endpoint micro-benchmarks with query-count budgets.
+
+Every route in myapp/urls.py is called through the test client against a seeded
+SQLite database. Each route records its latency percentiles and SQL query count;
+the run fails when a route runs more queries than its budget, or when its p50
+latency regresses beyond the stored baseline. Requests carry real JWTs, so the
+authentication queries count toward the budgets. Without a baseline file the
+latency check is skipped (and says so); record one on the machine that runs the
+suite with BENCH_UPDATE_BASELINE=1. The timings are written to BENCH_REPORT_DIR.
+
+    python manage.py test myapp --settings=project.settings_bench
+
+Environment knobs:
+    BENCH_EMPLOYEES, BENCH_CUSTOMERS, BENCH_SERVICES, BENCH_PARTS,
+    BENCH_PURCHASES, BENCH_REVIEWS   seeded volumes
+    BENCH_ITERATIONS                 timed calls per route (default 5)
+    BENCH_BASELINE                   baseline file (default myapp/bench_baseline.json)
+    BENCH_UPDATE_BASELINE=1          write the current run as the new baseline
+    BENCH_TOLERANCE                  allowed p50 regression, 0.5 = +50% (default)
+    BENCH_REPORT_DIR                 where the reports go (default bench_reports/)
+"""
+
+import json
+import os
+import random
+import time
+from pathlib import Path
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .. import urls as myapp_urls
+from .fixtures import BENCH_PASSWORD, ITERATIONS, VOLUMES, consume, seed_database, vehicle_number, write_report
+
+
+BASELINE_PATH = Path(os.getenv("BENCH_BASELINE", Path(__file__).resolve().parent.parent / "bench_baseline.json"))
+UPDATE_BASELINE = os.getenv("BENCH_UPDATE_BASELINE") == "1"
+TOLERANCE = float(os.getenv("BENCH_TOLERANCE", "0.5"))
+LATENCY_SLACK = 0.002  # Seconds, so sub-millisecond routes do not fail on timer noise
+
+
+class BenchRoute:
+    """One benchmarked call: URL name, method, fixtures -> (pk, payload), expected status and query budget."""
+
+    def __init__(self, name, method, status, queries, pk=None, data=None, user="admin", query_string=""):
+        self.name = name
+        self.method = method
+        self.status = status
+        self.queries = queries
+        self.pk = pk
+        self.data = data
+        self.user = user
+        self.query_string = query_string
+
+    @property
+    def label(self):
+        detail = " <pk>" if self.pk else ""
+        return f"{self.method.upper()} {self.name}{detail}{self.query_string}"
+
+    def url(self, fixtures):
+        if self.pk:
+            return reverse(self.name, kwargs={"pk": self.pk(fixtures).pk})
+        return reverse(self.name) + self.query_string
+
+
+def employee_payload(f):
+    return {
+        "email": "new.emp@bench.com", "password": BENCH_PASSWORD, "password_confirm": BENCH_PASSWORD,
+        "name": "NewBenchEmp", "role": "employee", "salary": "12000",
+    }
+
+
+def customer_payload(f):
+    return {
+        "email": "new.cus@bench.com", "password": BENCH_PASSWORD, "password_confirm": BENCH_PASSWORD,
+        "name": "NewBenchCus", "role": "customer",
+    }
+
+
+def part_payload(f):
+    return {
+        "parts_name": "new-bench-part", "parts_prices": 120, "parts_manufacture_date": "2024-01-01",
+        "parts_expire_date": "2026-01-01", "company_name": "bench", "description": "New part",
+        "stock_quantity": 5,
+    }
+
+
+# Query budgets must not grow with the seeded volumes: a route needing more is an N+1
+BENCH_ROUTES = [
+    BenchRoute("admin_api", "get", 200, 1),
+    BenchRoute("emp_register", "post", 201, 6, data=employee_payload),
+    BenchRoute("employee_login", "post", 200, 3,
+               data=lambda f: {"email": f["employee"].email, "password": BENCH_PASSWORD}),
+    BenchRoute("employee_api", "get", 200, 1),
+    BenchRoute("employee_api", "post", 201, 6, data=employee_payload),
+    BenchRoute("employee_api", "put", 200, 6, pk=lambda f: f["employee"],
+               data=lambda f: {"email": f["employee"].email, "name": f["employee"].name, "salary": "16000",
+                               "role": "employee", "password": BENCH_PASSWORD}),
+    BenchRoute("employee_api", "patch", 200, 2, pk=lambda f: f["employee"],
+               data=lambda f: {"salary": "17000", "role": "employee"}),
+    BenchRoute("employee_api", "delete", 204, 14, pk=lambda f: f["employee"]),
+    BenchRoute("customer_register", "post", 201, 6, data=customer_payload),
+    BenchRoute("customer_login", "post", 200, 3,
+               data=lambda f: {"email": f["customer"].email, "password": BENCH_PASSWORD}),
+    BenchRoute("customer_api", "get", 200, 1),
+    BenchRoute("customer_api", "post", 201, 6, data=customer_payload),
+    BenchRoute("customer_api", "put", 200, 3, pk=lambda f: f["customer"],
+               data=lambda f: {"email": f["customer"].email, "name": f["customer"].name,
+                               "role": "customer", "password": BENCH_PASSWORD}),
+    BenchRoute("customer_api", "patch", 200, 2, pk=lambda f: f["customer"],
+               data=lambda f: {"role": "customer", "is_active": True}),
+    BenchRoute("customer_api", "delete", 204, 12, pk=lambda f: f["customer"]),
+    BenchRoute("customer_crud", "get", 200, 1, user="customer"),
+    BenchRoute("customer_crud", "put", 200, 3, pk=lambda f: f["customer"], user="customer",
+               data=lambda f: {"email": f["customer"].email, "name": f["customer"].name,
+                               "role": "customer", "password": BENCH_PASSWORD}),
+    BenchRoute("carwash_service", "get", 200, 1),
+    BenchRoute("carwash_service", "post", 201, 14,
+               data=lambda f: {"service_type": "full_carwash", "employee": f["employee"].pk,
+                               "customer": f["customer"].pk, "vehicle_number": "MH14zz9999"}),
+    BenchRoute("carwash_service", "put", 200, 9, pk=lambda f: f["in_progress"],
+               data=lambda f: {"service_type": f["in_progress"].service_type, "status": "completed",
+                               "vehicle_number": f["in_progress"].vehicle_number}),
+    BenchRoute("carwash_service", "delete", 204, 3, pk=lambda f: f["completed"]),
+    BenchRoute("carwash_service_complete", "post", 200, 11,
+               data=lambda f: {"ids": [s.pk for s in f["shift"]]}),
+    BenchRoute("carwash_service_export", "get", 200, 1, query_string="?type=csv&status=completed"),
+    BenchRoute("carwash_service_events", "get", 200, 4, query_string="?follow=0"),
+    BenchRoute("service_analytics", "get", 200, 3, query_string="?bucket=day"),
+    BenchRoute("vehicle_history", "get", 200, 2, query_string=f"?vehicle_number={vehicle_number(0).upper()}"),
+    BenchRoute("service_prices", "get", 200, 1),
+    BenchRoute("service_prices", "post", 201, 2, data=lambda f: {
+        "service_type": "only_body", "label": "Only Body", "price": "35.00", "effective_from": "2099-01-01T00:00:00Z",
+    }),
+    BenchRoute("payroll", "get", 200, 4),
+    BenchRoute("services_count", "post", 200, 2, data=lambda f: {"period": "monthly"}),
+    BenchRoute("logout", "post", 200, 7,
+               data=lambda f: {"refresh_token": str(RefreshToken.for_user(f["admin"]))}),
+    BenchRoute("about_us", "get", 200, 0, user=None),
+    BenchRoute("social_links", "post", 302, 0, user=None, data=lambda f: {"name": "youtube"}),
+    BenchRoute("review", "post", 201, 4, data=lambda f: {"ratings": 4, "review": "Benchmark"}),
+    BenchRoute("see_reviews", "get", 200, 1, user=None),
+    BenchRoute("review_summary", "get", 200, 1, user=None),
+    BenchRoute("spear_parts_list", "get", 200, 1),
+    BenchRoute("spear_parts_list", "post", 201, 2, data=part_payload),
+    BenchRoute("spear_parts_list", "put", 200, 3, pk=lambda f: f["part"], data=part_payload),
+    BenchRoute("spear_parts_list", "patch", 200, 2, pk=lambda f: f["part"],
+               data=lambda f: {"stock_quantity": 42}),
+    BenchRoute("spear_parts_list", "delete", 204, 5, pk=lambda f: f["part"]),
+    BenchRoute("purchase", "get", 200, 1),
+    BenchRoute("purchase", "post", 201, 8,
+               data=lambda f: {"parts": f["part"].pk, "employee": f["employee"].pk,
+                               "customer": f["customer"].pk, "quantity": 1}),
+    BenchRoute("purchase", "delete", 204, 3, pk=lambda f: f["purchase"]),
+    BenchRoute("emp_efficency", "post", 200, 3,
+               data=lambda f: {"employee_name": f["completed"].employee.name,
+                               "vehicle_number": f["completed"].vehicle_number,
+                               "service_type": f["completed"].service_type}),
+    BenchRoute("metrics", "get", 200 if settings.METRICS_ENABLED else 404, 0),
+    BenchRoute("profiles", "get", 200 if settings.PROFILING_ENABLED else 404, 0),
+]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+class EndpointBenchmark(TestCase):
+    results = None  # Measured once per run, by the first test that needs them
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.fixtures = seed_database(VOLUMES, random.Random(1234))
+        # Authenticated like a real client, so the token checks and user reads are measured too
+        cls.tokens = {
+            name: str(RefreshToken.for_user(cls.fixtures[name]).access_token)
+            for name in ("admin", "employee", "customer")
+        }
+
+    def setUp(self):
+        cache.clear()
+
+    def call(self, route):
+        """Call a route once inside a rolled-back savepoint, so every iteration sees the seeded data."""
+        client = APIClient()
+        if route.user:
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.tokens[route.user]}")
+        with transaction.atomic():
+            url = route.url(self.fixtures)
+            data = route.data(self.fixtures) if route.data else None
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = getattr(client, route.method)(url, data, format="json")
+                if response.streaming:
+                    # Streamed rows are read while consuming
+                    if response.is_async:
+                        async_to_sync(consume)(response.streaming_content)
+                    else:
+                        b"".join(response.streaming_content)
+                elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+        return response, elapsed, len(queries)
+
+    def test_every_route_is_benchmarked(self):
+        names = {pattern.name for pattern in myapp_urls.urlpatterns if isinstance(pattern, URLPattern)}
+        missing = names - {route.name for route in BENCH_ROUTES}
+        self.assertFalse(missing, f"Routes without a benchmark entry: {sorted(missing)}")
+
+    def measure(self):
+        """Time every route; returns {label: p50/p95/p99/queries} and the routes that failed to answer."""
+        if EndpointBenchmark.results is not None:
+            return EndpointBenchmark.results
+        results, failures = {}, []
+        for route in BENCH_ROUTES:
+            self.call(route)  # Warm-up, not timed
+            timings, query_counts = [], []
+            for _ in range(ITERATIONS):
+                response, elapsed, queries = self.call(route)
+                if response.status_code != route.status:
+                    failures.append(f"{route.label}: status {response.status_code}, expected {route.status}")
+                    break
+                timings.append(elapsed)
+                query_counts.append(queries)
+            if timings:
+                results[route.label] = {
+                    "p50": percentile(timings, 50),
+                    "p95": percentile(timings, 95),
+                    "p99": percentile(timings, 99),
+                    "queries": max(query_counts),
+                }
+        self.report(results)
+        if UPDATE_BASELINE:
+            BASELINE_PATH.write_text(json.dumps(results, indent=2, sort_keys=True))
+        EndpointBenchmark.results = results, failures
+        return results, failures
+
+    def test_routes_within_budget(self):
+        results, failures = self.measure()
+        budgets = {route.label: route.queries for route in BENCH_ROUTES}
+        failures = failures + [
+            f"{label}: {result['queries']} queries, budget {budgets[label]}"
+            for label, result in results.items() if result["queries"] > budgets[label]
+        ]
+        self.assertFalse(failures, "\n" + "\n".join(failures))
+
+    def test_latency_within_baseline(self):
+        if UPDATE_BASELINE:
+            self.skipTest(f"Recording a new baseline in {BASELINE_PATH}")
+        if not BASELINE_PATH.exists():
+            self.skipTest(f"No latency baseline at {BASELINE_PATH}, record one with BENCH_UPDATE_BASELINE=1")
+        baseline = json.loads(BASELINE_PATH.read_text())
+        results, _ = self.measure()
+        failures = []
+        for label, result in results.items():
+            previous = baseline.get(label)
+            if previous and result["p50"] > previous["p50"] * (1 + TOLERANCE) + LATENCY_SLACK:
+                failures.append(f"{label}: p50 {result['p50'] * 1000:.1f}ms, baseline {previous['p50'] * 1000:.1f}ms")
+        self.assertFalse(failures, "\n" + "\n".join(failures))
+
+    def report(self, results):
+        volumes = ", ".join(f"{name}={count}" for name, count in VOLUMES.items())
+        lines = [
+            f"Endpoint benchmark ({ITERATIONS} iterations; {volumes})",
+            f"{'route':<42}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}",
+        ]
+        for label, result in results.items():
+            lines.append(
+                f"{label:<42}{result['p50'] * 1000:>9.2f}{result['p95'] * 1000:>9.2f}"
+                f"{result['p99'] * 1000:>9.2f}{result['queries']:>9}"
+            )
+        write_report("endpoints.txt", lines)
@@ -0,0 +1,81 @@
+from unittest import mock
+
+from django.core import mail
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..mailer import mail_queue
+from ..models import CarWashService, Users
+
+
+class BulkComplete(TestCase):
+    """Completing many services updates the employee counters in bulk and mails the customers off the request."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Users.objects.create(username="admin", name="Admin", email="admin@example.com", role="admin")
+        cls.busy, cls.drifted = (
+            Users.objects.create(username=name, name=name, email=f"{name}@example.com", role="employee",
+                                 services_inhand_count=0, services_finished=0)
+            for name in ("busy", "drifted")
+        )
+        cls.customers = [
+            Users.objects.create(username=f"cust{i}", name=f"Customer{i}", email=f"cust{i}@example.com",
+                                 role="customer")
+            for i in range(3)
+        ]
+        cls.services = [
+            CarWashService.objects.create(
+                service_type="full_carwash", employee=employee, customer=customer, vehicle_number="MH14fu1234",
+            )
+            for employee, customer in zip((cls.busy, cls.busy, cls.drifted), cls.customers)
+        ]
+        # The drifted counter already says nothing is in hand, completing must not take it below zero
+        Users.objects.filter(pk=cls.busy.pk).update(services_inhand_count=2, services_finished=5)
+        Users.objects.filter(pk=cls.drifted.pk).update(services_inhand_count=0, services_finished=1)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def complete(self, ids):
+        response = self.client.post(reverse("carwash_service_complete"), {"ids": ids}, format="json")
+        mail_queue().join()
+        return response
+
+    def test_counters_and_mails(self):
+        response = self.complete([service.pk for service in self.services] + [999999])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["email_status"], "3 emails queued")
+        self.assertEqual(response.data["not_found"], [999999])
+
+        self.busy.refresh_from_db()
+        self.drifted.refresh_from_db()
+        self.assertEqual((self.busy.services_inhand_count, self.busy.services_finished), (0, 7))
+        self.assertEqual((self.drifted.services_inhand_count, self.drifted.services_finished), (0, 2))
+        self.assertEqual(
+            set(CarWashService.objects.filter(pk__in=[s.pk for s in self.services]).values_list("status", flat=True)),
+            {"completed"},
+        )
+
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), [c.email for c in self.customers])
+        self.assertTrue(all(message.subject == "Your Car Wash Service is Completed!" for message in mail.outbox))
+
+    def test_already_completed_is_not_counted_again(self):
+        self.complete([self.services[0].pk])
+        mail.outbox.clear()
+        response = self.complete([self.services[0].pk])
+        self.assertEqual(response.data["already_completed"], [self.services[0].pk])
+        self.assertEqual(response.data["email_status"], "No emails to send.")
+        self.busy.refresh_from_db()
+        self.assertEqual((self.busy.services_inhand_count, self.busy.services_finished), (1, 6))
+        self.assertEqual(mail.outbox, [])
+
+    def test_full_queue_refuses_the_batch(self):
+        with mock.patch.object(mail_queue(), "limit", 0):
+            response = self.complete([self.services[2].pk])
+        self.assertEqual(response.data["email_status"], "Email queue is full, 1 emails not sent")
+        self.assertEqual(mail.outbox, [])
+        self.drifted.refresh_from_db()
+        self.assertEqual(self.drifted.services_finished, 2)  # The completion itself went through
@@ -0,0 +1,100 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..caching import invalidate
+from ..dispatch import MAX_ATTEMPTS, assign_employee, dispatch_board, reset_board
+from ..models import CarWashService, Users
+
+
+class AutoDispatch(TestCase):
+    """assign_employee() picks the least-loaded active employee and never trusts a stale board."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = Users.objects.create(
+            username="cust", name="Customer", email="cust@example.com", role="customer",
+        )
+
+    def setUp(self):
+        reset_board()
+        invalidate("dispatch")
+
+    def employee(self, name, load=0, **fields):
+        return Users.objects.create(
+            username=name, name=name, email=f"{name}@example.com", role="employee",
+            services_inhand_count=load, **fields,
+        )
+
+    def set_loads(self, loads):
+        # A plain update, like another process counting services the board has not heard of
+        for employee, load in loads.items():
+            Users.objects.filter(pk=employee.pk).update(services_inhand_count=load)
+
+    def test_least_loaded_employee(self):
+        self.employee("busy", load=2)
+        idle = self.employee("idle", load=0)
+        self.employee("steady", load=1)
+        self.assertEqual(assign_employee("full_carwash"), idle)
+
+    def test_faster_employee_wins_a_tie(self):
+        slow = self.employee("slow")
+        fast = self.employee("fast")
+        end = timezone.now()
+        for employee, minutes in ((slow, 90), (fast, 20)):
+            service = CarWashService.objects.create(
+                service_type="only_polish", employee=employee, customer=self.customer, status="completed",
+                vehicle_number="MH14fu1234", services_end_date=end,
+            )
+            CarWashService.objects.filter(pk=service.pk).update(services_start_date=end - timedelta(minutes=minutes))
+        self.set_loads({slow: 0, fast: 0})
+        self.assertEqual(assign_employee("only_polish"), fast)
+
+    def test_stale_pick_is_retried(self):
+        first = self.employee("first")
+        second = self.employee("second", load=1)
+        dispatch_board()
+        self.set_loads({first: 5})
+        self.assertEqual(assign_employee("full_carwash"), second)
+        self.assertEqual(dispatch_board().loads[first.pk], 5)  # The board learned the real load
+
+    def test_every_pick_stale_falls_back_to_the_rows(self):
+        employees = [self.employee(f"emp{i}") for i in range(MAX_ATTEMPTS + 1)]
+        dispatch_board()
+        # The board tries them in id order; the real loads put the last one ahead of all the others
+        self.set_loads({employee: len(employees) - i for i, employee in enumerate(employees)})
+        self.assertEqual(assign_employee("full_carwash"), employees[-1])
+
+    def test_no_employees(self):
+        self.assertIsNone(assign_employee("full_carwash"))
+        self.employee("gone", is_active=False)
+        self.assertIsNone(assign_employee("full_carwash"))
+
+    def test_board_refreshes_when_an_employee_is_added(self):
+        self.employee("veteran", load=1)
+        dispatch_board()
+        with self.captureOnCommitCallbacks(execute=True):
+            newcomer = self.employee("newcomer")
+        self.assertIn(newcomer.pk, dispatch_board().loads)
+        self.assertEqual(assign_employee("full_carwash"), newcomer)
+
+    def test_board_refreshes_when_an_employee_is_deactivated(self):
+        leaving = self.employee("leaving")
+        staying = self.employee("staying", load=1)
+        dispatch_board()
+        leaving.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            leaving.save()
+        self.assertNotIn(leaving.pk, dispatch_board().loads)
+        self.assertEqual(assign_employee("full_carwash"), staying)
+
+    @override_settings(DISPATCH_BOARD_SECONDS=0)
+    def test_board_expires_without_a_version_change(self):
+        self.employee("veteran", load=1)
+        dispatch_board()
+        # bulk_create sends no signal, as if the row came from a process whose cache this one cannot see
+        newcomer, = Users.objects.bulk_create([
+            Users(username="newcomer", name="newcomer", email="newcomer@example.com", role="employee"),
+        ])
+        self.assertIn(newcomer.pk, dispatch_board().loads)
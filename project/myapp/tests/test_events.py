@@ -0,0 +1,44 @@
+from datetime import timedelta
+from io import StringIO
+
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from ..events import event_stream
+from ..models import ServiceEvent
+
+
+class ServiceEventRetention(TestCase):
+    """Events past the replay window are pruned, and a cursor among them gets a snapshot instead of a gap."""
+
+    def setUp(self):
+        self.events = [
+            ServiceEvent.objects.create(service_id=i, kind=ServiceEvent.UPDATED, data=f'{{"id": {i}}}')
+            for i in range(5)
+        ]
+        ServiceEvent.objects.filter(id__lte=self.events[2].id).update(created_at=timezone.now() - timedelta(days=2))
+
+    def stream(self, cursor):
+        async def read():
+            return [chunk async for chunk in event_stream(cursor, follow=False)]
+        return "".join(async_to_sync(read)())
+
+    def test_prunes_only_events_past_the_window(self):
+        call_command("prune_service_events", older_than_hours=24, batch_size=2, stdout=StringIO())
+        remaining = list(ServiceEvent.objects.order_by("id").values_list("id", flat=True))
+        self.assertEqual(remaining, [event.id for event in self.events[3:]])
+
+    def test_keeps_the_newest_event(self):
+        ServiceEvent.objects.update(created_at=timezone.now() - timedelta(days=2))
+        call_command("prune_service_events", older_than_hours=24, stdout=StringIO())
+        self.assertEqual(list(ServiceEvent.objects.values_list("id", flat=True)), [self.events[-1].id])
+
+    def test_pruned_cursor_gets_a_snapshot(self):
+        self.assertNotIn("event: snapshot", self.stream(self.events[1].id))
+        call_command("prune_service_events", older_than_hours=24, stdout=StringIO())
+        self.assertIn("event: snapshot", self.stream(self.events[1].id))
+        replay = self.stream(self.events[3].id)
+        self.assertNotIn("event: snapshot", replay)
+        self.assertIn(f"id: {self.events[4].id}\n", replay)
@@ -0,0 +1,69 @@
+import json
+import threading
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, TestCase
+
+from ..async_views import AsyncEmployeeLoginView
+from ..hashing import HashingOverloaded, HashingPool
+from ..models import Users
+
+
+class HashingPoolLimits(TestCase):
+    """Logins beyond the hashing workers plus their queue are shed with 503 instead of waiting."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Users.objects.create(
+            username="emp@example.com", name="Employee", email="emp@example.com", role="employee",
+            password=make_password("pass@123"),
+        )
+
+    def setUp(self):
+        cache.clear()  # Login throttles
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def saturated_pool(self, workers=1, queue_size=1):
+        """A pool whose workers and queue are all taken by jobs that wait for self.release."""
+        pool = HashingPool(workers, queue_size)
+        self.addCleanup(pool.executor.shutdown, wait=False)  # The release in setUp runs after this
+        # Outside an event loop, keep the plain futures submit() would wrap for awaiting
+        with mock.patch("asyncio.wrap_future", lambda future: future):
+            blockers = [pool.submit(self.release.wait) for _ in range(workers + queue_size)]
+        return pool, blockers
+
+    def login(self):
+        request = AsyncRequestFactory().post(
+            "/api/employee_login/", json.dumps({"email": "emp@example.com", "password": "pass@123"}),
+            content_type="application/json",
+        )
+        return async_to_sync(AsyncEmployeeLoginView.as_view())(request)
+
+    def test_queue_limit(self):
+        pool, blockers = self.saturated_pool(workers=2, queue_size=3)
+        self.assertEqual(pool.pending, 5)
+        with self.assertRaises(HashingOverloaded):
+            pool.submit(make_password, "pass@123")
+
+        self.release.set()
+        for blocker in blockers:
+            blocker.result(timeout=5)
+        self.assertEqual(pool.pending, 0)  # Slots come back as the jobs finish
+
+    def test_saturated_pool_answers_503(self):
+        pool, blockers = self.saturated_pool()
+        with mock.patch("myapp.hashing._pool", pool):
+            response = self.login()
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response["Retry-After"], "1")
+
+            self.release.set()
+            for blocker in blockers:
+                blocker.result(timeout=5)
+            response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("token", json.loads(response.content))
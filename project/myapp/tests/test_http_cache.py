@@ -0,0 +1,64 @@
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..http_cache import invalidate_response_cache, response_cache_key
+from ..models import Reviewmodel, ReviewSummary, Users
+
+
+class PublicResponseCache(TestCase):
+    """Public GETs carry an ETag, answer 304 to a matching If-None-Match and are dropped by a write."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = Users.objects.create(
+            username="cust", name="Customer", email="cust@example.com", role="customer",
+        )
+        review = Reviewmodel.objects.create(ratings=4, review="Spotless")
+        ReviewSummary.record(review.ratings)
+
+    def setUp(self):
+        invalidate_response_cache("reviews")
+        self.client = APIClient()
+
+    def review(self, ratings, text):
+        client = APIClient()
+        client.force_authenticate(self.customer)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(reverse("review"), {"ratings": ratings, "review": text}, format="json")
+        self.assertEqual(response.status_code, 201)
+
+    def test_etag_and_not_modified(self):
+        first = self.client.get(reverse("review_summary"))
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first["ETag"])
+        self.assertIn("max-age", first["Cache-Control"])
+
+        again = self.client.get(reverse("review_summary"), headers={"If-None-Match": first["ETag"]})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b"")
+
+        other = self.client.get(reverse("review_summary"), headers={"If-None-Match": '"something-else"'})
+        self.assertEqual(other.status_code, 200)
+
+    def test_cached_response_skips_the_view(self):
+        self.client.get(reverse("see_reviews"))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(reverse("see_reviews")).status_code, 200)
+
+    def test_write_invalidates(self):
+        before = self.client.get(reverse("review_summary"))
+        self.review(2, "Missed a spot")
+
+        after = self.client.get(reverse("review_summary"), headers={"If-None-Match": before["ETag"]})
+        self.assertEqual(after.status_code, 200)
+        self.assertNotEqual(after["ETag"], before["ETag"])
+        self.assertEqual(after.json()["count"], 2)
+        self.assertIn("Missed a spot", self.client.get(reverse("see_reviews")).content.decode())
+
+    def test_lost_version_never_reuses_old_keys(self):
+        request = RequestFactory().get(reverse("see_reviews"))
+        before = response_cache_key("reviews", request)
+        cache.delete("ref:http:reviews:version")  # Evicted, or a cache restart
+        self.assertNotEqual(response_cache_key("reviews", request), before)
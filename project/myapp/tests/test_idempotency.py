@@ -0,0 +1,53 @@
+from datetime import date
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..models import PartSale, PartsListModel, Users
+
+
+class IdempotentPurchase(TestCase):
+    """A retried POST with the same Idempotency-Key replays the first response instead of selling twice."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Users.objects.create(username="admin", name="Admin", email="admin@example.com", role="admin")
+        cls.employee = Users.objects.create(
+            username="emp", name="Employee", email="emp@example.com", role="employee",
+        )
+        cls.customer = Users.objects.create(
+            username="cust", name="Customer", email="cust@example.com", role="customer",
+        )
+        cls.part = PartsListModel.objects.create(
+            parts_name="filter", parts_prices=400, parts_manufacture_date=date(2024, 1, 1),
+            parts_expire_date=date(2030, 1, 1), description="Oil filter", stock_quantity=10,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def buy(self, key, quantity=1):
+        return self.client.post(reverse("purchase"), {
+            "parts": self.part.pk, "employee": self.employee.pk, "customer": self.customer.pk, "quantity": quantity,
+        }, format="json", headers={"Idempotency-Key": key})
+
+    def test_same_key_replays_the_response(self):
+        first = self.buy("retry-1")
+        second = self.buy("retry-1")
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(PartSale.objects.count(), 1)
+        self.part.refresh_from_db()
+        self.assertEqual(self.part.stock_quantity, 9)  # Deducted once
+
+    def test_same_key_with_another_body_is_rejected(self):
+        self.assertEqual(self.buy("retry-2").status_code, 201)
+        response = self.buy("retry-2", quantity=2)
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(PartSale.objects.count(), 1)
+        self.assertEqual(self.buy("retry-3", quantity=2).status_code, 201)  # A new key is a new request
+        self.assertEqual(PartSale.objects.count(), 2)
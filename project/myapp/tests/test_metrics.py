@@ -0,0 +1,44 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..models import Users
+
+
+@override_settings(METRICS_ENABLED=True, METRICS_TOKEN="scrape-secret")
+class MetricsAccess(TestCase):
+    """The metrics page is for the scraper (shared secret) and admins, not for everyone."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Users.objects.create(username="admin", name="Admin", email="admin@example.com", role="admin")
+        cls.employee = Users.objects.create(
+            username="emp", name="Employee", email="emp@example.com", role="employee",
+        )
+
+    def get(self, user=None, **headers):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        return client.get(reverse("metrics"), headers=headers)
+
+    def test_anonymous_is_refused(self):
+        self.assertEqual(self.get().status_code, 403)
+        self.assertEqual(self.get(**{"X-Metrics-Token": "guess"}).status_code, 403)
+
+    def test_scraper_token(self):
+        response = self.get(**{"X-Metrics-Token": "scrape-secret"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+
+    def test_admin_only(self):
+        self.assertEqual(self.get(self.admin).status_code, 200)
+        self.assertEqual(self.get(self.employee).status_code, 403)
+
+    @override_settings(METRICS_TOKEN="")
+    def test_empty_token_matches_nothing(self):
+        self.assertEqual(self.get(**{"X-Metrics-Token": ""}).status_code, 403)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled(self):
+        self.assertEqual(self.get(self.admin).status_code, 404)
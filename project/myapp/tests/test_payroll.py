@@ -0,0 +1,67 @@
+from datetime import date, datetime
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..models import CarWashService, PartsListModel, Purchasemodel, Users
+from ..payroll import month_payroll
+
+
+class PayrollPartsCommission(TestCase):
+    """Sales merged into one purchase line are paid in the month each was made, once."""
+
+    def test_sales_in_two_months(self):
+        employee = Users.objects.create(
+            username="seller", name="Seller", email="seller@example.com", role="employee", password="x",
+            joining_date=date(2024, 1, 1), salary=10000,
+        )
+        customer = Users.objects.create(
+            username="buyer", name="Buyer", email="buyer@example.com", role="customer", password="x",
+        )
+        part = PartsListModel.objects.create(
+            parts_name="wiper", parts_prices=300, parts_manufacture_date=date(2024, 1, 1),
+            parts_expire_date=date(2030, 1, 1), description="Wiper blade", stock_quantity=10,
+        )
+        for sold_at, quantity in ((timezone.make_aware(datetime(2025, 3, 20, 12)), 2),
+                                  (timezone.make_aware(datetime(2025, 4, 5, 12)), 1)):
+            with mock.patch("myapp.models.now", return_value=sold_at):
+                Purchasemodel.add_purchase(part, employee, customer, quantity)
+        self.assertEqual(Purchasemodel.objects.get().quantity, 3)  # One merged line
+
+        def parts(year, month):
+            row = next(row for row in month_payroll(year, month) if row["employee_id"] == employee.pk)
+            return row["parts_sales"], row["parts_commission"]
+
+        self.assertEqual(parts(2025, 3), ("600.00", "30.00"))
+        self.assertEqual(parts(2025, 4), ("300.00", "15.00"))
+
+
+class PayrollServiceCommission(TestCase):
+    """Commission per completed service comes from PAYROLL_SERVICE_COMMISSION, types left out pay nothing."""
+
+    def test_rates_from_settings(self):
+        employee = Users.objects.create(
+            username="washer", name="Washer", email="washer@example.com", role="employee", password="x",
+            joining_date=date(2024, 1, 1), salary=10000,
+        )
+        customer = Users.objects.create(
+            username="driver", name="Driver", email="driver@example.com", role="customer", password="x",
+        )
+        completed = timezone.make_aware(datetime(2025, 3, 10, 12))
+        CarWashService.objects.bulk_create(
+            CarWashService(
+                service_type=service_type, employee=employee, customer=customer, status="completed",
+                final_price=100, vehicle_number="MH14fu1234", services_end_date=completed,
+            )
+            for service_type in ("full_carwash", "full_carwash", "only_polish")
+        )
+
+        def commission():
+            row = next(row for row in month_payroll(2025, 3) if row["employee_id"] == employee.pk)
+            return row["service_commission"]
+
+        self.assertEqual(commission(), "17.00")  # The defaults: 2 x 7 + 3
+        with override_settings(PAYROLL_SERVICE_COMMISSION={"full_carwash": 10.5}):
+            self.assertEqual(commission(), "21.00")
+
@@ -0,0 +1,44 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from .. import pricing
+from ..models import ServicePrice
+
+
+class PriceCatalogReload(TestCase):
+    """A process picks up catalog writes made by other processes, whose cache invalidation it never sees."""
+
+    def setUp(self):
+        cache.clear()
+        pricing._snapshot = None
+
+    def expire_check(self):
+        pricing.price_catalog().checked_at -= settings.PRICE_CATALOG_CHECK_SECONDS
+
+    def test_new_price_from_another_process(self):
+        self.assertEqual(pricing.price_catalog().price("full_carwash"), Decimal("70"))
+        # The on-commit invalidation never runs in a TestCase, as if another process had written the row
+        ServicePrice.objects.create(
+            service_type="full_carwash", label="Full Carwash", price=Decimal("80"),
+            effective_from=timezone.now() - timedelta(minutes=1),
+        )
+        self.assertEqual(pricing.price_catalog().price("full_carwash"), Decimal("70"))  # Until the next check
+        self.expire_check()
+        self.assertEqual(pricing.price_catalog().price("full_carwash"), Decimal("80"))
+
+    def test_edited_and_deleted_prices_from_another_process(self):
+        price = ServicePrice.objects.get(service_type="only_body")
+        pricing.price_catalog()
+        price.price = Decimal("35")
+        price.save()
+        self.expire_check()
+        self.assertEqual(pricing.price_catalog().price("only_body"), Decimal("35"))
+
+        price.delete()
+        self.expire_check()
+        self.assertIsNone(pricing.price_catalog().entry("only_body"))
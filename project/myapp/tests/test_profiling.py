@@ -0,0 +1,81 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ..middleware import ProfilingMiddleware
+from ..models import Users
+
+
+class RequestProfiling(TestCase):
+    """Admins get a cProfile capture of a flagged request when profiling is on, nobody gets one when it is off."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Users.objects.create(username="admin", name="Admin", email="admin@example.com", role="admin")
+        cls.employee = Users.objects.create(
+            username="emp", name="Employee", email="emp@example.com", role="employee",
+        )
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def client_for(self, user):
+        # The middleware reads the token itself, force_authenticate would not reach it
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+        return client
+
+    def captures(self):
+        return sorted(path.name for path in self.directory.iterdir())
+
+    @override_settings(PROFILING_ENABLED=False)
+    def test_disabled(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            ProfilingMiddleware(lambda request: HttpResponse())
+        with self.settings(PROFILING_DIR=str(self.directory)):
+            response = self.client_for(self.admin).get(reverse("admin_api"), headers={"X-Profile": "1"})
+            self.assertNotIn("X-Profile-Id", response)
+            self.assertEqual(self.client_for(self.admin).get(reverse("profiles")).status_code, 404)
+        self.assertEqual(self.captures(), [])
+
+    def test_capture_written(self):
+        with self.settings(PROFILING_ENABLED=True, PROFILING_DIR=str(self.directory)):
+            client = self.client_for(self.admin)
+            response = client.get(reverse("admin_api"), headers={"X-Profile": "1"})
+            self.assertEqual(response.status_code, 200)
+            capture_id = response["X-Profile-Id"]
+            self.assertEqual(self.captures(), [f"{capture_id}.json", f"{capture_id}.prof"])
+
+            summary = json.loads((self.directory / f"{capture_id}.json").read_text())
+            self.assertEqual((summary["method"], summary["path"], summary["status"]), ("GET", "/api/admin_api/", 200))
+            self.assertEqual(summary["user"], self.admin.email)
+            self.assertGreaterEqual(summary["sql_count"], 1)
+            self.assertIn("cumulative", summary["top_functions"])
+
+            listed = client.get(reverse("profiles")).json()
+            self.assertEqual([capture["id"] for capture in listed], [capture_id])
+            self.assertEqual(client.get(reverse("profiles"), {"id": capture_id, "type": "prof"}).status_code, 200)
+            self.assertEqual(client.get(reverse("profiles"), {"id": "../settings"}).status_code, 404)
+
+    def test_only_flagged_admin_requests(self):
+        with self.settings(PROFILING_ENABLED=True, PROFILING_DIR=str(self.directory)):
+            self.assertNotIn("X-Profile-Id", self.client_for(self.admin).get(reverse("admin_api")))
+            employee = self.client_for(self.employee)
+            self.assertNotIn("X-Profile-Id", employee.get(reverse("employee_api"), headers={"X-Profile": "1"}))
+            self.assertEqual(employee.get(reverse("profiles")).status_code, 403)
+        self.assertEqual(self.captures(), [])
+
+    def test_old_captures_pruned(self):
+        with self.settings(PROFILING_ENABLED=True, PROFILING_DIR=str(self.directory), PROFILING_MAX_CAPTURES=2):
+            client = self.client_for(self.admin)
+            ids = [client.get(reverse("admin_api"), {"profile": "1"})["X-Profile-Id"] for _ in range(3)]
+        self.assertEqual(self.captures(), sorted(f"{i}{suffix}" for i in ids[1:] for suffix in (".json", ".prof")))
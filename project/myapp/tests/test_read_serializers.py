@@ -0,0 +1,48 @@
+import random
+import time
+
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+
+from ..fast_serializers import part_rows, purchase_rows, service_rows, user_rows
+from ..models import CarWashService, PartsListModel, Purchasemodel, Users
+from ..serializer import CarWashServiceSerializer, PartsListSerializer, PurchaseSerializer, UserSee
+from .fixtures import ITERATIONS, VOLUMES, seed_database, write_report
+
+
+class ReadSerializerEquivalence(TestCase):
+    """The values()-based read serializers must render exactly what the DRF serializers do."""
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_database(VOLUMES, random.Random(1234))
+
+    def test_same_json_as_drf(self):
+        cases = [
+            ("users", user_rows, UserSee, Users.objects.all()),
+            ("services", service_rows, CarWashServiceSerializer, CarWashService.objects.all()),
+            ("parts", part_rows, PartsListSerializer, PartsListModel.objects.all()),
+            ("purchases", purchase_rows, PurchaseSerializer, Purchasemodel.objects.all()),
+        ]
+        renderer = JSONRenderer()
+        report = [f"Read serializers ({ITERATIONS} iterations)"]
+        for name, fast, serializer_class, queryset in cases:
+            drf_body = renderer.render(serializer_class(queryset, many=True).data)
+            fast_body = renderer.render(fast.data(queryset))
+            self.assertEqual(fast_body, drf_body, name)
+
+            timings = {}
+            for label, serialize in (
+                ("drf", lambda: serializer_class(queryset.all(), many=True).data),
+                ("values", lambda: fast.data(queryset.all())),
+            ):
+                start = time.perf_counter()
+                for _ in range(ITERATIONS):
+                    serialize()
+                timings[label] = (time.perf_counter() - start) / ITERATIONS
+            rows = queryset.count()
+            report.append(
+                f"{name:<12}{rows:>7} rows  drf {rows / timings['drf']:>10.0f} rows/s  "
+                f"values {rows / timings['values']:>10.0f} rows/s"
+            )
+        write_report("read_serializers.txt", report)
@@ -0,0 +1,80 @@
+from datetime import date
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ..caching import invalidate
+from ..middleware import ReplicaRoutingMiddleware
+from ..models import PartsListModel, Users
+from ..routers import replica_alias
+
+
+@skipUnless(replica_alias(), "No replica configured, run it with --settings=project.settings_replica")
+class ReplicaRouting(TestCase):
+    """List GETs read the replica, writes go to the primary, and a client that wrote reads the primary."""
+
+    databases = {"default", replica_alias() or "default"}  # Skipped without a replica
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.writer, cls.reader = (
+            Users.objects.create(username=name, name=name, email=f"{name}@example.com", role="admin")
+            for name in ("writer", "reader")
+        )
+        # The two test databases are not replicated, so each row shows which one served a read
+        for alias in ("default", replica_alias()):
+            cls.part(f"{alias}-part").save(using=alias)
+
+    @staticmethod
+    def part(name):
+        return PartsListModel(
+            parts_name=name, parts_prices=100, parts_manufacture_date=date(2024, 1, 1),
+            parts_expire_date=date(2030, 1, 1), description="Replica routing", stock_quantity=5,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def client_for(self, user):
+        # A fresh access token on every call, like a client that refreshes; the sticky reads follow the user
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+        return client
+
+    def part_names(self, client):
+        invalidate("parts")  # The list is cached, each read must reach a database
+        response = client.get(reverse("spear_parts_list"))
+        self.assertEqual(response.status_code, 200)
+        return {part["parts_name"] for part in response.json()}
+
+    def test_list_reads_from_the_replica(self):
+        self.assertEqual(self.part_names(self.client_for(self.reader)), {f"{replica_alias()}-part"})
+
+    def test_writes_go_to_the_primary(self):
+        response = self.client_for(self.writer).post(reverse("spear_parts_list"), {
+            "parts_name": "new-part", "parts_prices": 250, "parts_manufacture_date": "2024-01-01",
+            "parts_expire_date": "2030-01-01", "description": "Written", "stock_quantity": 3,
+        }, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(PartsListModel.objects.using("default").filter(parts_name="new-part").exists())
+        self.assertFalse(PartsListModel.objects.using(replica_alias()).filter(parts_name="new-part").exists())
+
+    def test_reads_stick_to_the_primary_after_a_write(self):
+        response = self.client_for(self.writer).patch(
+            reverse("spear_parts_list", args=[PartsListModel.objects.get(parts_name="default-part").pk]),
+            {"stock_quantity": 4}, format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        # Reads its own write, also with a refreshed token
+        self.assertEqual(self.part_names(self.client_for(self.writer)), {"default-part"})
+        self.assertEqual(self.part_names(self.client_for(self.reader)), {f"{replica_alias()}-part"})  # Others don't
+
+    def test_anonymous_clients_stick_by_address(self):
+        request = RequestFactory().get("/", REMOTE_ADDR="10.0.0.7")
+        self.assertEqual(ReplicaRoutingMiddleware.sticky_key(request), "replica:sticky:addr:10.0.0.7")
+        request = RequestFactory().get("/", REMOTE_ADDR="10.0.0.7", HTTP_AUTHORIZATION="Bearer not-a-token")
+        self.assertEqual(ReplicaRoutingMiddleware.sticky_key(request), "replica:sticky:addr:10.0.0.7")
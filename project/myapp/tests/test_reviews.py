@@ -0,0 +1,93 @@
+import threading
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..models import Reviewmodel, ReviewSummary, Users
+
+
+def summary_values():
+    summary = ReviewSummary.objects.get(pk=ReviewSummary.SUMMARY_ID)
+    return summary.count, summary.ratings_total, summary.histogram
+
+
+def aggregate_values():
+    ratings = list(Reviewmodel.objects.values_list("ratings", flat=True))
+    return len(ratings), sum(ratings), {str(r): ratings.count(r) for r in range(1, 6)}
+
+
+class ReviewSummaryRebuild(TestCase):
+    """rebuild() agrees with a full aggregate over the reviews, and record() rebuilds a missing row."""
+
+    def test_rebuild_matches_the_aggregate(self):
+        Reviewmodel.objects.bulk_create(Reviewmodel(ratings=i % 5 + 1, review=f"Review {i}") for i in range(23))
+        ReviewSummary.objects.all().delete()
+        ReviewSummary.rebuild()
+        self.assertEqual(summary_values(), aggregate_values())
+        self.assertEqual(ReviewSummary.objects.get().mean, round(sum(i % 5 + 1 for i in range(23)) / 23, 2))
+
+    def test_rebuild_of_no_reviews(self):
+        ReviewSummary.rebuild()
+        self.assertEqual(summary_values(), (0, 0, {str(r): 0 for r in range(1, 6)}))
+        self.assertIsNone(ReviewSummary.objects.get().mean)
+
+    def test_record_rebuilds_a_missing_row(self):
+        ReviewSummary.objects.all().delete()
+        Reviewmodel.objects.create(ratings=4, review="Good")
+        ReviewSummary.record(4)
+        self.assertEqual(summary_values(), (1, 4, {"1": 0, "2": 0, "3": 0, "4": 1, "5": 0}))
+
+    def test_record_is_one_relative_update(self):
+        # Never a read-modify-write: a summary read by another request before this one cannot be written back
+        ReviewSummary.rebuild()
+        stale = ReviewSummary.objects.get()
+        with CaptureQueriesContext(connection) as queries:
+            ReviewSummary.record(5)
+        self.assertEqual(len(queries), 1)
+        self.assertIn('"count" = ("myapp_reviewsummary"."count" + 1)', queries[0]["sql"])
+        ReviewSummary.record(2)
+        self.assertEqual(summary_values(), (2, 7, {"1": 0, "2": 1, "3": 0, "4": 0, "5": 1}))
+        self.assertEqual(stale.count, 0)
+
+
+class ConcurrentReviews(TransactionTestCase):
+    """Reviews posted at the same time each count once: the summary is updated in the database, not in Python."""
+
+    def setUp(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("Threads cannot write to the in-memory SQLite test database, set a TEST NAME file")
+
+    def test_concurrent_creates(self):
+        customer = Users.objects.create(username="cust", name="Customer", email="cust@example.com", role="customer")
+        ReviewSummary.rebuild()
+        errors = []
+        start = threading.Barrier(8)
+
+        def post(worker):
+            client = APIClient()
+            client.force_authenticate(customer)
+            start.wait()
+            try:
+                for i in range(5):
+                    response = client.post(
+                        reverse("review"), {"ratings": (worker + i) % 5 + 1, "review": f"{worker}-{i}"}, format="json",
+                    )
+                    if response.status_code != 201:
+                        errors.append(response.status_code)
+            except Exception as exc:
+                errors.append(repr(exc))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=post, args=(worker,)) for worker in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(summary_values(), aggregate_values())
+        self.assertEqual(summary_values()[0], 40)
@@ -0,0 +1,83 @@
+import json
+import time
+
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .. import slow_queries
+from ..models import Users
+from ..slow_queries import install_slow_query_log, log_slow_query
+
+
+def slow_sql(seconds):
+    """A statement that takes about the given time on the test database."""
+    if connection.vendor == "postgresql":
+        return f"SELECT pg_sleep({seconds})"
+    connection.ensure_connection()
+    connection.connection.create_function("sleep", 1, lambda s: time.sleep(s))
+    return f"SELECT sleep({seconds})"
+
+
+def entries(logs):
+    return [json.loads(record.getMessage()) for record in logs.records]
+
+
+@override_settings(SLOW_QUERY_MS=30)
+class SlowQueryLog(TestCase):
+    """Statements over SLOW_QUERY_MS are logged as JSON with their request and stack; faster ones are not."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Users.objects.create(username="admin", name="Admin", email="admin@example.com", role="admin")
+
+    def setUp(self):
+        slow_queries._explained.clear()
+
+    def run_sql(self, sql):
+        with connection.execute_wrapper(log_slow_query), connection.cursor() as cursor:
+            cursor.execute(sql)
+            cursor.fetchall()
+
+    def test_slow_query_logged(self):
+        sql = slow_sql(0.05)
+        with self.assertLogs("myapp.slow_queries", "WARNING") as logs:
+            self.run_sql(sql)
+        entry, = entries(logs)
+        self.assertEqual(entry["event"], "slow_query")
+        self.assertGreaterEqual(entry["ms"], 30)
+        self.assertEqual(entry["sql"], sql)
+        self.assertFalse(entry["failed"])
+        self.assertNotIn("explain", entry)
+        self.assertTrue(any(frame.startswith("myapp/tests/test_slow_queries.py") for frame in entry["stack"]))
+
+    def test_fast_query_not_logged(self):
+        with self.assertNoLogs("myapp.slow_queries"):
+            with connection.execute_wrapper(log_slow_query):
+                Users.objects.count()
+
+    @override_settings(SLOW_QUERY_EXPLAIN=True)
+    def test_plan_logged_once_per_shape(self):
+        sql = slow_sql(0.05)
+        with self.assertLogs("myapp.slow_queries", "WARNING") as logs:
+            self.run_sql(sql)
+            self.run_sql(sql)
+        first, second = entries(logs)
+        self.assertEqual(first["shape"], second["shape"])
+        self.assertIn("explain", first)
+        self.assertNotIn("explain", second)
+
+    @override_settings(SLOW_QUERY_MS=0.001)  # Every statement is slow
+    def test_request_context(self):
+        wrappers = list(connection.execute_wrappers)
+        self.addCleanup(setattr, connection, "execute_wrappers", wrappers)
+        self.addCleanup(connection_created.disconnect, install_slow_query_log, dispatch_uid="myapp_slow_query_log")
+
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        with self.assertLogs("myapp.slow_queries", "WARNING") as logs:
+            self.assertEqual(client.get(reverse("admin_api")).status_code, 200)
+        views = {(entry["url_name"], entry["view"], entry["method"]) for entry in entries(logs)}
+        self.assertIn(("admin_api", "AdminAPIView.get", "GET"), views)
@@ -0,0 +1,40 @@
+import random
+
+from django.test import AsyncClient, TestCase
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ..models import CarWashService
+from ..payroll import PAYROLL_FIELDS
+from .fixtures import VOLUMES, consume, seed_database
+
+
+class StreamingUnderAsgi(TestCase):
+    """Under ASGI the CSV downloads stream an async iterator, which Django sends as it is read instead of buffering."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.fixtures = seed_database(dict(VOLUMES, services=50), random.Random(1234))
+        cls.token = str(RefreshToken.for_user(cls.fixtures["admin"]).access_token)
+
+    async def test_export_streams_async(self):
+        client = AsyncClient()
+        for export_type in ("csv", "ndjson"):
+            response = await client.get(
+                reverse("carwash_service_export"), {"type": export_type},
+                headers={"Authorization": f"Bearer {self.token}"},
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.is_async)
+            lines = (await consume(response.streaming_content)).decode().splitlines()
+            header = 1 if export_type == "csv" else 0
+            self.assertEqual(len(lines) - header, await CarWashService.objects.acount())
+
+    async def test_payroll_streams_async(self):
+        response = await AsyncClient().get(
+            reverse("payroll"), {"month": "2025-01"}, headers={"Authorization": f"Bearer {self.token}"},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        header = (await consume(response.streaming_content)).decode().splitlines()[0]
+        self.assertEqual(header.split(","), PAYROLL_FIELDS)
@@ -0,0 +1,86 @@
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count, Max, Q, Sum
+from django.test import TestCase, override_settings
+
+from ..models import CarWashService, PartSale, Purchasemodel, Reviewmodel, ReviewSummary, Users
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])  # Hashing is not tested here
+class SyntheticData(TestCase):
+    """generate_synthetic_data at a small scale: consistent counters and sales, reproducible per seed."""
+
+    def generate(self, prefix, seed=7):
+        call_command(
+            "generate_synthetic_data", employees=5, customers=20, services=200, parts=6, purchases=80, reviews=30,
+            days=30, until=date(2025, 6, 30), seed=seed, batch_size=17, prefix=prefix, stdout=StringIO(),
+        )
+
+    def snapshot(self, prefix):
+        """The generated rows with their ids replaced by the account and part names, without the prefix."""
+        names = dict(Users.objects.filter(name__startswith=f"{prefix}-").values_list("pk", "name"))
+
+        def name(pk):
+            return names[pk].removeprefix(prefix)
+
+        services = [
+            (service_type, name(employee), name(customer), status, price, plate, start, end)
+            for service_type, employee, customer, status, price, plate, start, end in (
+                CarWashService.objects.filter(customer__in=names).order_by("id").values_list(
+                    "service_type", "employee", "customer", "status", "final_price", "vehicle_number",
+                    "services_start_date", "services_end_date",
+                )
+            )
+        ]
+        purchases = [
+            (part.removeprefix(prefix), name(employee), name(customer), quantity, total, date)
+            for part, employee, customer, quantity, total, date in (
+                Purchasemodel.objects.filter(customer__in=names).order_by("id").values_list(
+                    "parts__parts_name", "employee", "customer", "quantity", "total_price", "purchase_date",
+                )
+            )
+        ]
+        return services, purchases
+
+    def test_counters_are_consistent(self):
+        self.generate("t")
+        employees = Users.objects.filter(name__startswith="t-emp-").annotate(
+            in_progress=Count("CarWashService", filter=Q(CarWashService__status="in_progress")),
+            completed=Count("CarWashService", filter=Q(CarWashService__status="completed")),
+        )
+        self.assertEqual(len(employees), 5)
+        for employee in employees:
+            self.assertEqual(employee.services_inhand_count, employee.in_progress)
+            self.assertEqual(employee.services_finished, employee.completed)
+        self.assertEqual(sum(employee.completed + employee.in_progress for employee in employees), 200)
+
+        summary = ReviewSummary.objects.get()
+        ratings = list(Reviewmodel.objects.values_list("ratings", flat=True))
+        self.assertEqual((summary.count, summary.ratings_total), (30, sum(ratings)))
+
+    def test_purchases_match_their_sales(self):
+        self.generate("t")
+        self.assertEqual(PartSale.objects.count(), 80)
+        lines = Purchasemodel.objects.annotate(
+            sold=Sum("sales__quantity"), sold_total=Sum("sales__total_price"), last_sale=Max("sales__sold_at"),
+        )
+        self.assertTrue(lines)
+        for line in lines:
+            self.assertEqual(line.quantity, line.sold)
+            self.assertEqual(line.total_price, line.sold_total)
+            self.assertEqual(line.purchase_date, line.last_sale)
+
+    def test_same_seed_same_data(self):
+        self.generate("a")
+        self.generate("b")
+        self.generate("c", seed=8)
+        self.assertEqual(self.snapshot("a"), self.snapshot("b"))
+        self.assertNotEqual(self.snapshot("a"), self.snapshot("c"))
+
+    def test_prefix_reuse_refused(self):
+        self.generate("t")
+        with self.assertRaises(CommandError):
+            self.generate("t")
@@ -0,0 +1,77 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory
+
+from ..throttling import LoginIPThrottle
+
+
+class TokenBucketThrottling(TestCase):
+    """A bucket allows its burst, then a request per refilled token; concurrent requests get exactly the burst."""
+
+    class Throttle(LoginIPThrottle):
+        rate = "5/min"
+
+    def setUp(self):
+        cache.clear()
+        self.request = APIRequestFactory().post("/login/")
+
+    def test_exhausted_bucket_refills(self):
+        clock = [1000.0]
+        throttles = []
+
+        def allow():
+            throttle = self.Throttle()
+            throttle.timer = lambda: clock[0]
+            throttles.append(throttle)
+            return throttle.allow_request(self.request, None)
+
+        self.assertEqual([allow() for _ in range(6)], [True] * 5 + [False])
+        self.assertAlmostEqual(throttles[-1].wait(), 12.0)  # One token every 60 / 5 seconds
+        clock[0] += 12
+        self.assertEqual([allow(), allow()], [True, False])
+
+    def test_concurrent_requests_do_not_overspend(self):
+        results = []
+        start = threading.Barrier(20)
+        backend = type(caches["default"])  # Patched on the class, each thread has its own cache instance
+        incr = backend.incr
+
+        def slow_incr(*args, **kwargs):
+            value = incr(*args, **kwargs)
+            time.sleep(0.001)  # Widens the window between spending a token and giving a refused one back
+            return value
+
+        def allow():
+            start.wait()
+            results.append(self.Throttle().allow_request(self.request, None))
+
+        with mock.patch.object(backend, "incr", slow_incr):
+            threads = [threading.Thread(target=allow) for _ in range(20)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(results), 20)
+        self.assertEqual(results.count(True), 5)  # Never more than the burst, and contention refuses none of it
+
+    def test_refused_requests_spend_nothing(self):
+        clock = [1000.0]
+
+        def allow():
+            throttle = self.Throttle()
+            throttle.timer = lambda: clock[0]
+            return throttle.allow_request(self.request, None)
+
+        self.assertEqual([allow() for _ in range(5)], [True] * 5)
+        self.assertEqual([allow() for _ in range(10)], [False] * 10)  # Hammering does not push the refill back
+        clock[0] += 12
+        self.assertTrue(allow())
+
+    def test_remaining_is_reported(self):
+        throttle = self.Throttle()
+        throttle.allow_request(self.request, None)
+        self.assertEqual(self.request.rate_limit, (5, 4))
@@ -0,0 +1,54 @@
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..models import CarWashService, Users
+
+
+class VehicleHistory(TestCase):
+    """A plate finds its services whatever case it was stored or typed in, newest first off the index."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Users.objects.create(username="admin", name="Admin", email="admin@example.com", role="admin")
+        employee = Users.objects.create(username="emp", name="Employee", email="emp@example.com", role="employee")
+        customer = Users.objects.create(username="cust", name="Customer", email="cust@example.com", role="customer")
+        # bulk_create skips the field validators, like rows written before the plate format was enforced
+        cls.services = CarWashService.objects.bulk_create(
+            CarWashService(
+                service_type="full_carwash", employee=employee, customer=customer, status="completed",
+                final_price=100 + i, vehicle_number=plate,
+            )
+            for i, plate in enumerate(["KA01AB1234", "KA01ab1234", "ka01ab1234", "KA01AB9999", "KA01AB1234"])
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def history(self, plate, **params):
+        return self.client.get(reverse("vehicle_history"), {"vehicle_number": plate, **params})
+
+    def test_lookup_ignores_case_and_separators(self):
+        expected = [s.pk for s in reversed(self.services) if s.vehicle_number.upper() == "KA01AB1234"]
+        for typed in ("ka01ab1234", "KA01AB1234", "ka-01-ab-1234"):
+            response = self.history(typed)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data["vehicle_key"], "KA01AB1234")
+            self.assertEqual(response.data["visits"], 4)
+            self.assertEqual(response.data["total_spend"], 100 + 101 + 102 + 104)
+            self.assertEqual([row["id"] for row in response.data["results"]], expected)
+
+    def test_pages_newest_first(self):
+        first = self.history("ka01ab1234", page_size=3)
+        second = self.client.get(first.data["next"])
+        ids = [row["id"] for row in first.data["results"] + second.data["results"]]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertEqual(len(ids), 4)
+
+    def test_query_uses_the_history_index(self):
+        plan = CarWashService.objects.filter(vehicle_key="KA01AB1234").order_by("-id").explain()
+        self.assertIn("service_vehicle_history_idx", plan)
+
+    def test_invalid_plate(self):
+        self.assertEqual(self.history("KA01A1234").status_code, 400)
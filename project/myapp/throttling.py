@@ -0,0 +1,121 @@
+import hashlib
+
+from rest_framework.throttling import SimpleRateThrottle
+
+# Throttles for the AllowAny login and registration views, which hash a password on every call.
+# DRF checks throttles before the handler runs, and these only touch the cache, so a rejected
+# request costs neither a PBKDF2 round nor a query. Rates come from DEFAULT_THROTTLE_RATES.
+# The buckets live in the default cache, which is per process (LocMemCache) unless REDIS_URL is set:
+# without Redis every worker process keeps its own buckets and a client gets the rate once per worker.
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Token bucket over DRF's "N/period" rates: bursts of up to N requests, refilled at N per period.
+    Kept as the bucket's "theoretical arrival time" (GCRA): one integer per key, in microseconds, that every
+    allowed request pushes one refill interval further. The push is a single cache.incr(), which is atomic
+    in every cache backend, so concurrent requests can neither spend a token twice nor wait on each other.
+    The key expires when the bucket is full again, so a missing key means a full bucket.
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        interval = self.duration * 1_000_000 // self.num_requests  # Microseconds per token
+        now = int(self.timer() * 1_000_000)
+        arrival = self.spend(interval, now)
+        if arrival is None:
+            # The key kept expiring under us; let the request through rather than spin on the cache
+            self.tokens = self.num_requests - 1
+            self.report(request)
+            return True
+
+        ahead = arrival - now  # How far the spent tokens reach into the future
+        allowed = ahead <= self.duration * 1_000_000
+        if allowed:
+            self.cache.touch(self.key, -(-ahead // 1_000_000))  # Expire once every token has come back
+            self.tokens = min(self.num_requests - 1, (self.duration * 1_000_000 - ahead) // interval)
+        else:
+            self.give_back(interval)
+            self.tokens = 0
+            self.retry_after = (ahead - self.duration * 1_000_000) / 1_000_000
+        self.report(request)
+        return allowed
+
+    def spend(self, interval, now):
+        """Take a token: the new arrival time, or None if the key could not be kept long enough to count."""
+        for _ in range(3):
+            try:
+                return self.cache.incr(self.key, interval)
+            except ValueError:
+                # No key, the bucket is full: start it at now, spending this request's token
+                if self.cache.add(self.key, now + interval, -(-interval // 1_000_000)):
+                    return now + interval
+        return None
+
+    def give_back(self, interval):
+        # A refused request spends nothing
+        try:
+            self.cache.decr(self.key, interval)
+        except ValueError:
+            pass  # Expired meanwhile, the bucket is full anyway
+
+    def wait(self):
+        """Seconds until the next token, sent as Retry-After."""
+        return self.retry_after
+
+    def report(self, request):
+        # The tightest bucket is the one the client runs into first
+        remaining = int(self.tokens)
+        current = getattr(request, "rate_limit", None)
+        if current is None or remaining < current[1]:
+            request.rate_limit = (self.num_requests, remaining)
+
+
+class IPThrottle(TokenBucketThrottle):
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {"scope": self.scope, "ident": self.get_ident(request)}
+
+
+class EmailThrottle(TokenBucketThrottle):
+    """Buckets per target account, so spreading an attack over many addresses does not help."""
+
+    def get_cache_key(self, request, view):
+        email = request.data.get("email") if hasattr(request.data, "get") else None
+        if not isinstance(email, str) or not email.strip():
+            return None  # The serializer rejects the request before any hashing
+        ident = hashlib.sha1(email.strip().lower().encode()).hexdigest()
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+
+class LoginIPThrottle(IPThrottle):
+    scope = "login_ip"
+
+
+class LoginEmailThrottle(EmailThrottle):
+    scope = "login_email"
+
+
+class RegisterIPThrottle(IPThrottle):
+    scope = "register_ip"
+
+
+class RegisterEmailThrottle(EmailThrottle):
+    scope = "register_email"
+
+
+class RateLimitHeadersMixin:
+    """Reports the remaining quota of the tightest throttle bucket on every response."""
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        rate_limit = getattr(request, "rate_limit", None)
+        if rate_limit is not None:
+            response["X-RateLimit-Limit"] = str(rate_limit[0])
+            response["X-RateLimit-Remaining"] = str(rate_limit[1])
+        return response
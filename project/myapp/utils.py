@@ -1,4 +1,5 @@
-from . models import CarWashService
+from .archive import service_history
+from .pricing import CENTS, price_catalog
 
 def calculate_discount(customer):
     """
@@ -6,11 +7,21 @@ def calculate_discount(customer):
     """
     discount = customer.discount_remaining
     if discount == 0:
-        completed_services = CarWashService.objects.filter(
+        completed_services = service_history().filter(
             customer=customer, status="completed"
         ).count()
 
+    discount = earned_discount(customer, completed_services)
+    customer.save()
+
+    return discount
+
 
+def earned_discount(customer, completed_services):
+    """
+    Discount earned with completed_services completed services; sets the customer's
+    discount_remaining and free_services_used without saving.
+    """
     free_service_threshold = 50  # Every 50 services grants 1 free service
     free_services_earned = completed_services // free_service_threshold
 
@@ -33,8 +44,6 @@ def calculate_discount(customer):
     else:
         customer.discount_remaining = discount
 
-    customer.save()
-
     return discount
 
 
@@ -43,10 +52,10 @@ def calculate_final_price(service_type, discount):
     Calculate the final price based on service type and discount.
     """
 
-    base_price = CarWashService.SERVICE_PRICE.get(service_type, 0)
+    base_price = price_catalog().price(service_type)
     if discount == 100:
         discounted_price = 0
         
     else :
-        discounted_price = base_price - (base_price * discount / 100)
+        discounted_price = (base_price - (base_price * discount / 100)).quantize(CENTS)
     return discounted_price
@@ -1,7 +1,15 @@
 # Standard library imports # Django imports
+import re
+from datetime import date, datetime, time, timedelta
+
 from django.shortcuts import get_object_or_404, HttpResponse, redirect
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
 from django.contrib.auth import authenticate
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage, send_mail
+from django.db import router, transaction
+from django.db.models import Count, F, Max, Min, Sum
 
 # Third-party imports # Rest Framework imports
 from rest_framework import status
@@ -11,18 +19,37 @@ from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework.exceptions import AuthenticationFailed, ValidationError
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination
 
 # Project-level imports
-from project import settings
-from .utils import calculate_discount, calculate_final_price
+from django.conf import settings
+from .utils import calculate_discount, calculate_final_price, earned_discount
+from .http_cache import PublicCacheMixin
+from .metrics import registry as metrics_registry
+from .caching import get_or_compute, invalidate
+from .export import (
+    ASYNC_EXPORT_FORMATS, EXPORT_FORMATS, SERVICE_EXPORT_FIELDS, acsv_rows, aiterate, csv_rows, serves_async,
+)
+from .fast_serializers import part_rows, purchase_rows, service_rows, user_rows
+from .pricing import price_catalog
+from .dispatch import assign_employee
+from .idempotency import idempotent
+from .throttling import (
+    LoginEmailThrottle, LoginIPThrottle, RateLimitHeadersMixin, RegisterEmailThrottle, RegisterIPThrottle,
+)
+from .profiling import capture_path, list_captures
+from .archive import service_history
+from .payroll import PAYROLL_FIELDS, month_payroll
+from .analytics import BUCKETS, DEFAULT_SPAN, MAX_BUCKETS, bucket_starts, service_analytics
+from .mailer import MailQueueFull, mail_queue
 
 # Local app imports
-from .models import Users,CarWashService, Reviewmodel, PartsListModel, Purchasemodel
+from .models import Users,CarWashService, Reviewmodel, ReviewSummary, PartsListModel, Purchasemodel, ServicePrice
 from .serializer import (
             EmployeeRegistrationSerializer, EmployeeLoginSerializer, EmpAndAdminManage,UserSee, 
             CustomerRegisterSerializer, CustomerLoginSerializer,CustomerManage,
-            CarWashServiceSerializer, CarWashUpdate, ReviewSerializer,PartsListSerializer, PurchaseSerializer
+            CarWashServiceSerializer, CarWashUpdate, ReviewSerializer,PartsListSerializer, PurchaseSerializer,
+            ServicePriceSerializer, BulkCompleteSerializer
             )
 
 # For generating access and refresh tokens
@@ -36,8 +63,9 @@ def get_tokens_for_user(user):
 
 # Employeee and admin 
 # Signup for employees and admin
-class EmpRegisterView(APIView):
+class EmpRegisterView(RateLimitHeadersMixin, APIView):
     permission_classes = [AllowAny]  # Allow anyone to register
+    throttle_classes = [RegisterIPThrottle, RegisterEmailThrottle]
 
     def post(self, request):
         serializer = EmployeeRegistrationSerializer(data=request.data)  # Getting the data from user side
@@ -54,8 +82,9 @@ class EmpRegisterView(APIView):
 
 
 # Login for employees
-class EmployeeLoginView(APIView):
+class EmployeeLoginView(RateLimitHeadersMixin, APIView):
     permission_classes = [AllowAny]  # Allow anyone
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]
 
     def post(self, request):
         serializer = EmployeeLoginSerializer(data=request.data)  # Getting data from user
@@ -128,6 +157,7 @@ class LogoutView(APIView):
 #list of admins  
 class AdminAPIView(APIView):
     permission_classes = [IsAuthenticated]
+    replica_methods = ("GET",)
 
     def get(self, request):
         # Check if the current user is admin
@@ -152,13 +182,13 @@ class AdminAPIView(APIView):
             admin = Users.objects.filter(role="admin")
         
         # Serialize the employee data
-        serializer = UserSee(admin, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)    
+        return Response(user_rows.data(admin), status=status.HTTP_200_OK)    
 
 
 # CRUD for employees, accessible only by admin
 class EmployeeAPIView(APIView):
     permission_classes = [IsAuthenticated]
+    replica_methods = ("GET",)
 
     def get(self, request):
         # Check if the current user is admin
@@ -183,8 +213,7 @@ class EmployeeAPIView(APIView):
             employee = Users.objects.filter(role="employee")
         
         # Serialize the employee data
-        serializer = UserSee(employee, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(user_rows.data(employee), status=status.HTTP_200_OK)
 
     def post(self, request):
         if request.user.role != "admin":  # Check if the user is not an admin
@@ -212,6 +241,8 @@ class EmployeeAPIView(APIView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         serializer.save()
         emp=Users.objects.filter(last_working_day__isnull=False).update(is_active=False)
+        invalidate("users")  # Bulk update sends no signals, drop every cached user
+        invalidate("dispatch")  # Deactivated employees leave the auto-dispatch queues
         serializer.save()
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -259,8 +290,9 @@ class EmployeeAPIView(APIView):
 
 # Customer
 # Signup for customer
-class CustomerRegisterView(APIView):
+class CustomerRegisterView(RateLimitHeadersMixin, APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [RegisterIPThrottle, RegisterEmailThrottle]
     
     def post(self, request):
         serializer = CustomerRegisterSerializer(data=request.data)
@@ -281,8 +313,9 @@ class CustomerRegisterView(APIView):
         
 
 # Login for customer
-class CustomerLoginView(APIView):
+class CustomerLoginView(RateLimitHeadersMixin, APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]
 
     def post(self, request):
         serializer = CustomerLoginSerializer(data=request.data)
@@ -317,6 +350,7 @@ class CustomerLoginView(APIView):
 # Crud operation for Customer if user is Admin
 class CustomerAPI(APIView):
     permission_classes = [IsAuthenticated]  # Ensure that the user is authenticated
+    replica_methods = ("GET",)
    
     def get(self, request):
         if request.user.role!="admin":
@@ -338,8 +372,7 @@ class CustomerAPI(APIView):
             else:    
                 customer = Users.objects.filter(role="customer")
 
-            serializer = UserSee(customer, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            return Response(user_rows.data(customer), status=status.HTTP_200_OK)
         
         except Users.DoesNotExist:
             return Response(
@@ -423,8 +456,7 @@ class CustomerCrudAPI(APIView):
         try:
             cutomer_id=request.user.id
             customer = Users.objects.filter(id=cutomer_id,role="customer")
-            serializer = UserSee(customer, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            return Response(user_rows.data(customer), status=status.HTTP_200_OK)
         
         except Users.DoesNotExist:
             return Response(
@@ -453,10 +485,52 @@ class CustomerCrudAPI(APIView):
             return Response(serializer.errors,status=status.HTTP_400_BAD_REQUEST)
     
 
+COMPLETION_SUBJECT = "Your Car Wash Service is Completed!"
+
+
+def completion_message(service):
+    """Body of the mail telling the customer their service is completed."""
+    # Calculate base price inside the method
+    base_price = price_catalog().price(service.service_type)
+    discount = service.customer.discount_remaining
+
+    customer = service.customer
+    cus_name = customer.name
+    service_type = service.service_type
+    services_start_date = service.services_start_date
+    services_end_date = service.services_end_date
+    employee = service.employee
+    emp_name = employee.name
+    price_before_discount = base_price
+    applied_discount = discount,
+    final_price = service.final_price
+    
+
+    # Create the message
+    message = f"""
+        Hello {cus_name},
+
+        Your Car Wash service is completed successfully.
+        This is the details 
+        
+        Service Type: {service_type}
+        Employee Name : {emp_name} 
+        Employee_Email: {employee}
+        Base Price: ₹{price_before_discount}
+        Discount Applied: {applied_discount }%
+        Final Price: ${final_price}
+
+        
+        Thank you for using our services!
+        """
+    return message
+
+
 # Services
 # Making services record here
 class CarWashServiceView(APIView):
     permission_classes = [IsAuthenticated]
+    replica_methods = ("GET",)
     
     def get(self,request):
         if request.user.role!="admin":    
@@ -476,10 +550,10 @@ class CarWashServiceView(APIView):
                 )
         else:    
             Service = CarWashService.objects.all()
-        serializer = CarWashServiceSerializer(Service, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(service_rows.data(Service), status=status.HTTP_200_OK)
 
 
+    @idempotent
     def post(self, request):
         if request.user.role!="admin":
             return Response(
@@ -490,6 +564,7 @@ class CarWashServiceView(APIView):
         serializer = CarWashServiceSerializer(data=request.data)
         if serializer.is_valid():
 
+            auto_assign = serializer.validated_data.pop("auto_assign")
             customer = serializer.validated_data["customer"]
             service_type = serializer.validated_data["service_type"]
             vehicle_number = serializer.validated_data["vehicle_number"]
@@ -498,28 +573,42 @@ class CarWashServiceView(APIView):
             obj=CarWashService.objects.filter(customer_id=customer)
           
             existing_purchase = CarWashService.objects.filter(
-                service_type=service_type,vehicle_number=vehicle_number,status="in_progress"
+                service_type=service_type,
+                vehicle_key=CarWashService.normalize_vehicle_number(vehicle_number),
+                status="in_progress",
                 ).first()
         
             if obj and  existing_purchase:
                 return Response("this services for this vehical is already in progess")
             
-            discount = calculate_discount(customer)
-            final_price = calculate_final_price(service_type, discount)
+            with transaction.atomic():
+                if auto_assign:
+                    # Locks the picked employee until the new service is counted against them
+                    employee = assign_employee(service_type)
+                    if employee is None:
+                        return Response(
+                            {"detail": "No active employee is available to take this service."},
+                            status=status.HTTP_409_CONFLICT,
+                        )
+                    serializer.validated_data["employee"] = employee
+
+                discount = calculate_discount(customer)
+                final_price = calculate_final_price(service_type, discount)
 
-            service = serializer.save()
-            service.final_price = final_price
-            service = serializer.save()
+                service = serializer.save()
+                service.final_price = final_price
+                service = serializer.save()
 
-            # Reset discount after use (if applicable)
-            customer.discount_remaining = 0
-            customer.save()
+                # Reset discount after use (if applicable)
+                customer.discount_remaining = 0
+                customer.save()
 
             # Response data to be sent back
             response_data = {
                 "message": "Car wash service created successfully!",
                 "id": service.id,
-                "base_price": CarWashService.SERVICE_PRICE.get(service_type, 0),
+                "employee": service.employee_id,
+                "base_price": price_catalog().price(service_type),
                 "discount": f"{discount}% applied" if discount > 0 else "No discount applied",
                 "final_price": final_price,
             }
@@ -553,7 +642,7 @@ class CarWashServiceView(APIView):
                 # Check if a purchase with the same part , and customer already exists
 
         existing_purchase = CarWashService.objects.filter(
-                service_type=type,status=statuss,vehicle_number=vehicle_number
+                service_type=type,status=statuss,vehicle_key=carwash.vehicle_key
             ).first()
         
         if not (vh_nos and statuss and servi):
@@ -587,7 +676,7 @@ class CarWashServiceView(APIView):
                 return Response(serializer.data,status=status.HTTP_400_BAD_REQUEST)
             
             discount = calculate_discount(services.customer)
-            base_price = CarWashService.SERVICE_PRICE.get(request.data.get('service_type', services.service_type), 0)
+            base_price = price_catalog().price(request.data.get('service_type', services.service_type))
             email_status = self.send_email(services, base_price, discount,)
             
             response_data = {
@@ -608,43 +697,11 @@ class CarWashServiceView(APIView):
     def send_email(self, service, base_price, discount):
         # Extract customer email
         to_email = service.customer.email
-        # Calculate base price inside the method
-        base_price = CarWashService.SERVICE_PRICE.get(service.service_type, 0)
-        discount = service.customer.discount_remaining
-
-        customer = service.customer
-        cus_name = customer.name
-        service_type = service.service_type
-        services_start_date = service.services_start_date
-        services_end_date = service.services_end_date
-        employee = service.employee
-        emp_name = employee.name
-        price_before_discount = base_price
-        applied_discount = discount,
-        final_price = service.final_price
-        
-
-        # Create the message
-        message = f"""
-        Hello {cus_name},
-
-        Your Car Wash service is completed successfully.
-        This is the details 
-        
-        Service Type: {service_type}
-        Employee Name : {emp_name} 
-        Employee_Email: {employee}
-        Base Price: ₹{price_before_discount}
-        Discount Applied: {applied_discount }%
-        Final Price: ${final_price}
-
-        
-        Thank you for using our services!
-        """
+        message = completion_message(service)
         try:
         # Send the email
             send_mail(
-                subject="Your Car Wash Service is Completed!",
+                subject=COMPLETION_SUBJECT,
                 message=message,
                 from_email=settings.EMAIL_HOST_USER,
                 recipient_list=[to_email])
@@ -680,6 +737,7 @@ class CarWashServiceView(APIView):
 
 class EmpEfficency(APIView):
     permission_classes = [IsAuthenticated]
+    replica_methods = ("POST",)  # Read-only report despite the POST
 
     def post(self, request):
         if request.user.role != "admin":
@@ -705,7 +763,11 @@ class EmpEfficency(APIView):
             employee = Users.objects.get(name=name)
             
             # Filter the CarWashService objects for the given vehicle number, service type, and employee
-            services = CarWashService.objects.filter(vehicle_number=vehicle_number, service_type=service_type, employee=employee)
+            services = service_history().filter(
+                vehicle_key=CarWashService.normalize_vehicle_number(vehicle_number),
+                service_type=service_type,
+                employee=employee,
+            )
 
             # Check if any services match the filter
             if not services.exists():
@@ -732,9 +794,307 @@ class EmpEfficency(APIView):
         except Exception as e:
             return Response(f"Error: {str(e)}", status=status.HTTP_400_BAD_REQUEST)
 
+class VehicleHistoryPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-id'  # Walks the (vehicle_key, -id) index, newest first
+
+
+# Every service of one plate and what was spent on it, whatever case the plate was typed in
+class VehicleHistoryView(APIView):
+    permission_classes = [IsAuthenticated]
+    replica_methods = ("GET",)
+
+    def get(self, request):
+        if request.user.role not in ("admin", "employee"):
+            return Response(
+                {"detail": "Permission denied. (You are not admin or employee)"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        vehicle_key = CarWashService.normalize_vehicle_number(request.query_params.get("vehicle_number", ""))
+        if not re.fullmatch(r"[A-Z]{2}\d{2}[A-Z]{2}\d{4}", vehicle_key):
+            return Response(
+                {"vehicle_number": ["Vehicle number must be in the format 'XX00XX0000' (e.g.:-'MH14fu1234')."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        services = service_history().filter(vehicle_key=vehicle_key)
+        summary = services.aggregate(
+            visits=Count("id"),
+            total_spend=Sum("final_price"),
+            first_visit=Min("services_start_date"),
+            last_visit=Max("services_start_date"),
+        )
+        summary["total_spend"] = summary["total_spend"] or 0
+
+        paginator = VehicleHistoryPagination()
+        page = paginator.paginate_queryset(service_rows.rows(services), request, view=self)
+        response = paginator.get_paginated_response(service_rows.represent(page))
+        response.data = {"vehicle_key": vehicle_key, **summary, **response.data}
+        return response
+
+
+# Service price catalog: the prices in effect and the full schedule, new prices take effect from effective_from
+class ServicePriceView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if request.user.role != "admin":
+            return Response(
+                {"detail": "Permission denied. (You are not admin)"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        schedule = ServicePrice.objects.order_by("service_type", "effective_from")
+        return Response({
+            "current": price_catalog().current(),
+            "schedule": ServicePriceSerializer(schedule, many=True).data,
+        }, status=status.HTTP_200_OK)
+
+    def post(self, request):
+        if request.user.role != "admin":
+            return Response(
+                {"detail": "Permission denied. (You are not admin)"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        serializer = ServicePriceSerializer(data=request.data)
+        if serializer.is_valid():
+            serializer.save()
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+# End of shift: complete many in-progress services in one call
+class CarWashServiceBulkComplete(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if request.user.role != "admin":
+            return Response(
+                {"detail": "Permission denied. (You are not admin)"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        serializer = BulkCompleteSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        ids = list(dict.fromkeys(serializer.validated_data["ids"]))
+
+        with transaction.atomic():
+            services = list(
+                CarWashService.objects.select_for_update(of=("self",))
+                .select_related("customer", "employee")
+                .filter(id__in=ids)
+                .order_by("id")
+            )
+            completing = [service for service in services if service.status == "in_progress"]
+            already_completed = [service.id for service in services if service.status != "in_progress"]
+            if completing:
+                CarWashService.complete_many(completing)
+
+                # calculate_discount() for every customer at once; like there, a pending discount is kept
+                customers = {service.customer_id: service.customer for service in completing}
+                recount = [customer for customer in customers.values() if customer.discount_remaining == 0]
+                completed_counts = dict(
+                    service_history().filter(customer__in=recount, status="completed")
+                    .values_list("customer_id")
+                    .annotate(Count("id"))
+                )
+                for customer in recount:
+                    earned_discount(customer, completed_counts.get(customer.id, 0))
+                Users.objects.bulk_update(recount, ["discount_remaining", "free_services_used"])
+                for service in completing:
+                    service.customer = customers[service.customer_id]
+
+        email_status = self.send_emails(completing)
+        found = {service.id for service in services}
+        return Response(
+            {
+                "message": "Car wash services completed successfully!",
+                "completed": [
+                    {
+                        "id": service.id,
+                        "service_type": service.service_type,
+                        "services_start_date": service.services_start_date,
+                        "services_end_date": service.services_end_date,
+                        "final_price": service.final_price,
+                    }
+                    for service in completing
+                ],
+                "already_completed": already_completed,
+                "not_found": [pk for pk in ids if pk not in found],
+                "email_status": email_status,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    def send_emails(self, services):
+        # After commit; the sending happens on the mail queue's thread, over one SMTP connection
+        messages = [
+            EmailMessage(COMPLETION_SUBJECT, completion_message(service), settings.EMAIL_HOST_USER,
+                         [service.customer.email])
+            for service in services if service.customer.email and service.employee_id is not None
+        ]
+        if not messages:
+            return "No emails to send."
+        try:
+            mail_queue().submit(messages)
+        except MailQueueFull:
+            return f"Email queue is full, {len(messages)} emails not sent"
+        return f"{len(messages)} emails queued"
+
+
+# Streaming export of service history (CSV or NDJSON) for accounting
+class CarWashServiceExport(APIView):
+    permission_classes = [IsAuthenticated]
+    replica_methods = ("GET",)
+    chunk_size = 2000  # Rows fetched per round trip from the server-side cursor
+
+    def get(self, request):
+        if request.user.role != "admin":
+            return Response(
+                {"detail": "Permission denied. (You are not admin)"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        # "format" is taken by DRF's content negotiation, so the file type is "type"
+        export_type = request.query_params.get("type", "csv")
+        if export_type not in EXPORT_FORMATS:
+            return Response(
+                {"type": [f"Must be one of: {', '.join(EXPORT_FORMATS)}."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            start = request.query_params.get("start")
+            end = request.query_params.get("end")
+            # Compare against aware midnights, so the range stays index-friendly (no DATE() on the column)
+            start_at = timezone.make_aware(datetime.combine(date.fromisoformat(start), time.min)) if start else None
+            end_at = (
+                timezone.make_aware(datetime.combine(date.fromisoformat(end) + timedelta(days=1), time.min))
+                if end else None
+            )
+        except ValueError:
+            return Response(
+                {"detail": "start and end must be dates in YYYY-MM-DD format."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        # Resolve the database now: the rows are read after the view has returned
+        services = service_history(start_at, using=router.db_for_read(CarWashService))
+        if start_at:
+            services = services.filter(services_start_date__gte=start_at)
+        if end_at:
+            services = services.filter(services_start_date__lt=end_at)
+
+        service_status = request.query_params.get("status")
+        if service_status:
+            if service_status not in dict(CarWashService.STATUS):
+                return Response(
+                    {"status": [f"Must be one of: {', '.join(dict(CarWashService.STATUS))}."]},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            services = services.filter(status=service_status)
+
+        rows = services.order_by("id").values(*SERVICE_EXPORT_FIELDS)
+        write_rows, content_type = EXPORT_FORMATS[export_type]
+        if serves_async(request):
+            # Fetched a chunk at a time as the client reads, instead of buffered whole by Django
+            lines = ASYNC_EXPORT_FORMATS[export_type](rows.aiterator(chunk_size=self.chunk_size), SERVICE_EXPORT_FIELDS)
+        else:
+            lines = write_rows(rows.iterator(chunk_size=self.chunk_size), SERVICE_EXPORT_FIELDS)
+        response = StreamingHttpResponse(lines, content_type=content_type)
+        filename = f"services_{start or 'all'}_{end or 'now'}.{export_type}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+# Completed-service throughput, revenue and durations per hour, day or week and service type
+class ServiceAnalyticsView(APIView):
+    permission_classes = [IsAuthenticated]
+    replica_methods = ("GET",)
+
+    def get(self, request):
+        if request.user.role != "admin":
+            return Response(
+                {"detail": "Permission denied. (You are not admin)"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        bucket = request.query_params.get("bucket", "day")
+        if bucket not in BUCKETS:
+            return Response(
+                {"bucket": [f"Must be one of: {', '.join(BUCKETS)}."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            start = request.query_params.get("start")
+            end = request.query_params.get("end")
+            # Both dates are inclusive, as in the export
+            end_at = (
+                timezone.make_aware(datetime.combine(date.fromisoformat(end) + timedelta(days=1), time.min))
+                if end else timezone.now()
+            )
+            start_at = (
+                timezone.make_aware(datetime.combine(date.fromisoformat(start), time.min))
+                if start else end_at - DEFAULT_SPAN[bucket]
+            )
+        except ValueError:
+            return Response(
+                {"detail": "start and end must be dates in YYYY-MM-DD format."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if start_at >= end_at:
+            return Response({"detail": "start must be before end."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(bucket_starts(bucket, start_at, end_at)) > MAX_BUCKETS:
+            return Response(
+                {"detail": f"At most {MAX_BUCKETS} buckets per request, use a larger bucket."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        buckets = service_analytics(bucket, start_at, end_at, using=router.db_for_read(CarWashService))
+        return Response({
+            "bucket": bucket,
+            "start": start_at,
+            "end": end_at,
+            "buckets": buckets,
+        }, status=status.HTTP_200_OK)
+
+
+# Monthly payroll as CSV: pro-rated salary, service commission by type and parts commission per employee
+class PayrollView(APIView):
+    permission_classes = [IsAuthenticated]
+    replica_methods = ("GET",)
+
+    def get(self, request):
+        if request.user.role != "admin":
+            return Response(
+                {"detail": "Permission denied. (You are not admin)"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        month = request.query_params.get("month")
+        if month:
+            try:
+                first_day = datetime.strptime(month, "%Y-%m").date()
+            except ValueError:
+                return Response({"detail": "month must be in YYYY-MM format."}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            # Payroll is run after the month closes, default to the last one
+            first_day = (timezone.localdate().replace(day=1) - timedelta(days=1)).replace(day=1)
+
+        rows = month_payroll(first_day.year, first_day.month, using=router.db_for_read(Users))
+        # Written out a row at a time; under ASGI only an async iterator is sent as it is produced
+        lines = acsv_rows(aiterate(rows), PAYROLL_FIELDS) if serves_async(request) else csv_rows(rows, PAYROLL_FIELDS)
+        response = StreamingHttpResponse(lines, content_type="text/csv")
+        response["Content-Disposition"] = f'attachment; filename="payroll_{first_day:%Y-%m}.csv"'
+        return response
+
+
 # Sales count
 class ServicesCountAPIView(APIView):
     permission_classes=[IsAuthenticated]  # Ensure that the user is authenticated
+    replica_methods = ("POST",)  # Read-only report despite the POST
 
     def post(self, request):
         if request.user.role!="admin":
@@ -745,23 +1105,26 @@ class ServicesCountAPIView(APIView):
         period = request.data.get("period", "today") # Weekly Sale
         try:
             services = CarWashService.count_services_by_period(period) 
-            count_today = services.count()
+            # One read serves the count, the earnings and the listing
+            rows = list(service_rows.rows(services))
+            count_today = len(rows)
 
-            total_earnings = sum(service.final_price  if service.final_price is not None else 0 for service in services)
-            serializer=CarWashServiceSerializer(services,many=True)
+            total_earnings = sum(row["final_price"] if row["final_price"] is not None else 0 for row in rows)
         except ValueError as e:
             raise ValidationError(str(e))   # Will return a 400 error with the message
         # Return the count and period in the response
         response_data = {
             'count': count_today,
             "total_earnings":total_earnings,
-            'services': serializer.data,
+            'services': service_rows.represent(rows),
         }
         return Response(response_data)
     
 # About_Us
-class AboutUs(APIView):
+class AboutUs(PublicCacheMixin, APIView):
     permission_classes=[AllowAny]
+    cache_group = "about_us"
+    cache_max_age = 3600
     
     def get(self,request):
         return HttpResponse("Carsss is a leading car wash company dedicated to providing top-notch vehicle cleaning services. With a focus on quality, convenience, and customer satisfaction, \n we have \n Full Carwash: \n Inside Vacuum: \n Only Body: \n Full with Polish: \n Only Polish: ")
@@ -787,10 +1150,11 @@ class SocialLinks(APIView):
                 status=status.HTTP_400_BAD_REQUEST
                 )
 
-class ReviewPagination(PageNumberPagination):
+class ReviewPagination(CursorPagination):
     page_size = 2 # Number of reviews per page
     page_size_query_param = 'page_size'  # Allow the client to specify page size
     max_page_size = 3  # Limit the maximum page size
+    ordering = '-id'  # Newest first, stable pages without a COUNT(*)
 
 
 class ReviewAPI(APIView):
@@ -799,7 +1163,9 @@ class ReviewAPI(APIView):
     def post(self,request):
         serializer = ReviewSerializer(data=request.data)
         if serializer.is_valid():
-            review= serializer.save()
+            with transaction.atomic():
+                review= serializer.save()
+                ReviewSummary.record(review.ratings)  # Keep the rating summary in step
             response_data ={"message": "review and rating created successfully!", 
                          "review": review.review,
                          "ratings":review.ratings}
@@ -809,8 +1175,10 @@ class ReviewAPI(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
 
-class GiveReviews(APIView):
+class GiveReviews(PublicCacheMixin, APIView):
     permission_classes= [AllowAny]
+    cache_group = "reviews"
+    replica_methods = ("GET",)
 
     def get(self, request):     
         reviews = Reviewmodel.objects.all()
@@ -819,10 +1187,30 @@ class GiveReviews(APIView):
 	    # Serialize the paginated data
         serializer = ReviewSerializer(paginated_reviews, many=True)
         return paginator.get_paginated_response(serializer.data)  # Return paginated response
+
+
+# Rating count, mean and histogram for the public review widget
+class ReviewSummaryView(PublicCacheMixin, APIView):
+    permission_classes= [AllowAny]
+    cache_group = "reviews"
+    replica_methods = ("GET",)
+
+    def get(self, request):
+        summary = get_or_compute(
+            "reviews", "summary",
+            lambda: ReviewSummary.objects.filter(pk=ReviewSummary.SUMMARY_ID).first(),
+        ) or ReviewSummary()
+        response_data = {
+            "count": summary.count,
+            "mean": summary.mean,
+            "histogram": summary.histogram,
+        }
+        return Response(response_data, status=status.HTTP_200_OK)
     
 
 class SpearPartsList(APIView):
     permission_classes = [IsAuthenticated]    
+    replica_methods = ("GET",)
 
     def get(self,request):
         if request.user.role!="admin":
@@ -833,16 +1221,21 @@ class SpearPartsList(APIView):
         PartsList_id = request.query_params.get("id", None)
         if PartsList_id :
             PartsList = PartsListModel.objects.filter(id=PartsList_id)
-                        # If no matching user is found, return a 404 Not Found response
-            if not PartsList.exists() or None:
-                return Response(
-                    {"detail": f"PartsList with id {PartsList_id} not found."},
-                    status=status.HTTP_404_NOT_FOUND,
-                )
         else:    
             PartsList = PartsListModel.objects.all()
-        serializer = PartsListSerializer(PartsList, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+
+        # Catalog rarely changes, serve it from the reference cache (dropped on any part write)
+        data = get_or_compute(
+            "parts", f"list:{PartsList_id or 'all'}",
+            lambda: part_rows.data(PartsList),
+        )
+        if PartsList_id and not data:
+            # If no matching part is found, return a 404 Not Found response
+            return Response(
+                {"detail": f"PartsList with id {PartsList_id} not found."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response(data, status=status.HTTP_200_OK)
     
     def post(self,request):
         if request.user.role!="admin":
@@ -911,6 +1304,7 @@ class SpearPartsList(APIView):
 class Purchase(APIView):
 
     permission_classes=[IsAuthenticated]
+    replica_methods = ("GET",)
     def get(self,request):
         if request.user.role not in["admin","employee"]:
             return Response(
@@ -919,7 +1313,7 @@ class Purchase(APIView):
             )
         Purchase_id = request.query_params.get("id",None)
         if Purchase_id :
-            Purchase=Purchasemodel.objects.filter(Purchase_id=id)
+            Purchase=Purchasemodel.objects.filter(id=Purchase_id)
             if not Purchase.exists() or None:
                 return Response(
                     {"detail": f"Admin with ID {Purchase_id} not found."},
@@ -927,9 +1321,9 @@ class Purchase(APIView):
                 )
         else:   
             Purchase = Purchasemodel.objects.all()
-            Serializer = PurchaseSerializer(Purchase,many=True)
-        return Response(Serializer.data,status=status.HTTP_200_OK)
+        return Response(purchase_rows.data(Purchase),status=status.HTTP_200_OK)
 
+    @idempotent
     def post(self, request):
         if request.user.role not in["admin","employee"]:
             return Response(
@@ -937,48 +1331,35 @@ class Purchase(APIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        # Validate parts and quantity before proceeding
-        parts_id = request.data.get('parts')
-        quantity = request.data.get('quantity')
-        employee_id = request.data.get('employee')
-        customer_id = request.data.get('customer')
-
-        part = get_object_or_404(PartsListModel, id=parts_id)
-        employee = get_object_or_404(Users, id=employee_id)
-        customer = get_object_or_404(Users, id=customer_id)
-
-        if part.stock_quantity < quantity:
-            return Response(
-                {"error": "Not enough stock available for this part."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        # Validate parts, people and quantity before proceeding
+        serializer = PurchaseSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        # Check if a purchase with the same part, employee, and customer already exists
-        existing_purchase = Purchasemodel.objects.filter(
-            parts=part, employee=employee, customer=customer
-        ).first()
+        part = serializer.validated_data["parts"]
+        employee = serializer.validated_data["employee"]
+        customer = serializer.validated_data["customer"]
+        quantity = serializer.validated_data["quantity"]
 
-        if not existing_purchase:
-            purchase = serializer.save() # Save the purchase record
-            # Deduct the stock quantity
+        with transaction.atomic():
+            # Deduct the stock only if enough is available, in the same statement
+            in_stock = PartsListModel.objects.filter(
+                pk=part.pk, stock_quantity__gte=quantity
+            ).update(stock_quantity=F("stock_quantity") - quantity)
 
-        # If a record exists, update the quantity and total price
-        existing_purchase.quantity += quantity  # Add the new quantity to the existing quantity
-        existing_purchase.total_price = existing_purchase.parts.parts_prices * existing_purchase.quantity  # Update total price
-        existing_purchase.save()  # Save the updated record
+            if not in_stock:
+                return Response(
+                    {"error": "Not enough stock available for this part."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
 
-        # Deduct the stock quantity based on the new total purchase
-        part.stock_quantity -= quantity
-        part.save()
+            # Create the purchase line or merge it into the existing one
+            purchase = Purchasemodel.add_purchase(part, employee, customer, quantity)
+            transaction.on_commit(lambda: invalidate("parts"))  # Stock changed without a save signal
 
-        # Create the purchase record
-        serializer = PurchaseSerializer(data=request.data)
-        if not serializer.is_valid():
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
- 
         response_data = {
                 "message": "Purchase created successfully!",
-                "serializer": serializer.data
+                "serializer": PurchaseSerializer(purchase).data
             }
         return Response(response_data, status=status.HTTP_201_CREATED)
     
@@ -994,4 +1375,50 @@ class Purchase(APIView):
                 return Response({"message":"part deleted successfully"},status=status.HTTP_204_NO_CONTENT)
         except Purchasemodel.DoesNotExist:
             return Response(
-                {"message":"parchased record not found "},status=status.HTTP_400_BAD_REQUEST)  
\ No newline at end of file
+                {"message":"parchased record not found "},status=status.HTTP_400_BAD_REQUEST)
+
+
+# Prometheus scrape target for the per-route metrics collected by RequestMetricsMiddleware.
+# Scrapers send the shared secret in X-Metrics-Token; admins can also read it with their own token.
+class MetricsView(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        if not settings.METRICS_ENABLED:
+            return Response({"detail": "Metrics are disabled."}, status=status.HTTP_404_NOT_FOUND)
+        scrape_token = request.headers.get("X-Metrics-Token", "")
+        scraper = bool(settings.METRICS_TOKEN) and constant_time_compare(scrape_token, settings.METRICS_TOKEN)
+        if not scraper and getattr(request.user, "role", None) != "admin":
+            return Response(
+                {"detail": "Permission denied. (Send X-Metrics-Token or an admin token)"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        return HttpResponse(metrics_registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+# Request profiles taken by ProfilingMiddleware: the list, one summary (?id=) or its .prof file (&type=prof)
+class ProfileCapturesView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if request.user.role != "admin":
+            return Response(
+                {"detail": "Permission denied. (You are not admin)"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        if not settings.PROFILING_ENABLED:
+            return Response({"detail": "Profiling is disabled."}, status=status.HTTP_404_NOT_FOUND)
+
+        capture_id = request.query_params.get("id")
+        if not capture_id:
+            return Response(list_captures(), status=status.HTTP_200_OK)
+
+        if request.query_params.get("type") == "prof":
+            path = capture_path(capture_id, ".prof")
+            if path is not None:
+                return FileResponse(path.open("rb"), as_attachment=True, filename=path.name)
+        else:
+            path = capture_path(capture_id, ".json")
+            if path is not None:
+                return HttpResponse(path.read_bytes(), content_type="application/json")
+        return Response({"detail": f"Capture {capture_id} not found."}, status=status.HTTP_404_NOT_FOUND)
@@ -48,6 +48,8 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    'myapp.middleware.RequestMetricsMiddleware',
+    'myapp.middleware.SlowQueryLogMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -55,6 +57,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'myapp.middleware.ReplicaRoutingMiddleware',
+    'myapp.middleware.ProfilingMiddleware',  # Last, it calls the view itself for profiled requests
 ]
 
 ROOT_URLCONF = 'project.urls'
@@ -149,6 +153,20 @@ DATABASES = {
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Optional read replica for the reporting endpoints and list GETs (set REPORTING_DATABASE_HOST to enable)
+REPORTING_DATABASE_ALIAS = 'reporting'
+if os.getenv('REPORTING_DATABASE_HOST'):
+    DATABASES[REPORTING_DATABASE_ALIAS] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('REPORTING_DATABASE_NAME', DATABASES['default']['NAME']),
+        'HOST': os.getenv('REPORTING_DATABASE_HOST'),
+        'PORT': os.getenv('REPORTING_DATABASE_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['myapp.routers.ReplicaRouter']
+REPLICA_STICKY_SECONDS = 10  # Clients read from the primary for this long after a write
+
 from datetime import timedelta
 ...
 
@@ -158,15 +176,85 @@ SIMPLE_JWT = {
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'myapp.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
+    # Token buckets for the login and registration views (myapp/throttling.py)
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': os.getenv('LOGIN_IP_RATE', '30/min'),
+        'login_email': os.getenv('LOGIN_EMAIL_RATE', '5/min'),
+        'register_ip': os.getenv('REGISTER_IP_RATE', '10/hour'),
+        'register_email': os.getenv('REGISTER_EMAIL_RATE', '3/hour'),
+    },
+    # Proxies in front of the app; 0 throttles on REMOTE_ADDR and ignores a client-sent X-Forwarded-For
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 0)),
 }
 
+# Cache for hot reference reads (myapp/caching.py) and public responses; set REDIS_URL to share it between processes
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'carrrs',
+    }
+}
+if os.getenv('REDIS_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('REDIS_URL'),
+    }
+
+# Completed services older than this are moved to the archive table by the archive_services command
+SERVICE_ARCHIVE_AFTER_DAYS = int(os.getenv('SERVICE_ARCHIVE_AFTER_DAYS', 90))
+
+# Hours of service events kept for the live board to replay; prune_service_events deletes older ones, and a
+# client reconnecting from a pruned cursor gets a fresh snapshot instead
+SERVICE_EVENT_RETENTION_HOURS = int(os.getenv('SERVICE_EVENT_RETENTION_HOURS', 24))
+
+# Seconds between the checks of each process' price snapshot against the catalog in the database
+PRICE_CATALOG_CHECK_SECONDS = int(os.getenv('PRICE_CATALOG_CHECK_SECONDS', 5))
+
+# Serve the read-only list endpoints from native async views (only useful when running under ASGI)
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', 'False') == 'True'
+
+# Serve the login endpoints from async views that hash passwords in a bounded thread pool (ASGI only);
+# logins beyond the workers plus the queue get 503 instead of slowing every other request down
+ASYNC_LOGIN_VIEWS = os.getenv('ASYNC_LOGIN_VIEWS', 'False') == 'True'
+PASSWORD_HASHING_WORKERS = int(os.getenv('PASSWORD_HASHING_WORKERS', min(4, os.cpu_count() or 1)))
+PASSWORD_HASHING_QUEUE = int(os.getenv('PASSWORD_HASHING_QUEUE', 16))
+
+# Per-route request and SQL metrics served at api/metrics/ (Prometheus text format)
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'False') == 'True'
+# Shared secret the scraper sends in the X-Metrics-Token header; without it only admins can read the metrics
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Log statements slower than this many milliseconds as JSON lines on the myapp.slow_queries logger (0 = off),
+# with SLOW_QUERY_EXPLAIN also the plan of each new query shape
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 0))
+SLOW_QUERY_EXPLAIN = os.getenv('SLOW_QUERY_EXPLAIN', 'False') == 'True'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_queries': {'class': 'logging.StreamHandler', 'formatter': 'message'},
+    },
+    'loggers': {
+        'myapp.slow_queries': {'handlers': ['slow_queries'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
+# Admins can profile single requests with "X-Profile: 1" or "?profile=1"; captures are listed at api/profiles/
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False') == 'True'
+PROFILING_DIR = os.getenv('PROFILING_DIR', str(BASE_DIR / 'profiles'))
+PROFILING_MAX_CAPTURES = int(os.getenv('PROFILING_MAX_CAPTURES', 50))
+
 
 
 
@@ -209,4 +297,27 @@ EMAIL_HOST = os.getenv('EMAIL_HOST')
 EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS')
 EMAIL_PORT = os.getenv('EMAIL_PORT')
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
-EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
\ No newline at end of file
+EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
+# Completion mails of bulk endpoints are sent by one background thread; batches beyond this many waiting are refused
+COMPLETION_EMAIL_QUEUE = int(os.getenv('COMPLETION_EMAIL_QUEUE', 100))
+
+# Seconds a stored Idempotency-Key response is replayed; prune_idempotency_keys deletes the expired ones
+IDEMPOTENCY_KEY_TTL = int(os.getenv('IDEMPOTENCY_KEY_TTL', 24 * 3600))
+
+# Auto-dispatch: each process rebuilds its candidate order from the employee rows at least this often, so it
+# catches up even when the "dispatch" version lives in a per-process cache (LocMemCache, no REDIS_URL)
+DISPATCH_BOARD_SECONDS = int(os.getenv('DISPATCH_BOARD_SECONDS', 60))
+# Average durations come from the services completed in the last DISPATCH_SPEED_WINDOW_DAYS and are
+# re-aggregated every DISPATCH_SPEEDS_SECONDS; in between they are updated from the completions seen
+DISPATCH_SPEED_WINDOW_DAYS = int(os.getenv('DISPATCH_SPEED_WINDOW_DAYS', 30))
+DISPATCH_SPEEDS_SECONDS = int(os.getenv('DISPATCH_SPEEDS_SECONDS', 3600))
+
+# Payroll commission: rupees per completed service by service type, and the share of the parts sales
+PAYROLL_SERVICE_COMMISSION = {
+    'full_carwash': float(os.getenv('COMMISSION_FULL_CARWASH', 7)),
+    'inside_vacuum': float(os.getenv('COMMISSION_INSIDE_VACUUM', 4)),
+    'only_body': float(os.getenv('COMMISSION_ONLY_BODY', 3)),
+    'full_with_polish': float(os.getenv('COMMISSION_FULL_WITH_POLISH', 12)),
+    'only_polish': float(os.getenv('COMMISSION_ONLY_POLISH', 3)),
+}
+PAYROLL_PARTS_COMMISSION_RATE = float(os.getenv('PAYROLL_PARTS_COMMISSION_RATE', 0.05))
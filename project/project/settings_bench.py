@@ -0,0 +1,28 @@
+"""
+Settings for the endpoint benchmark suite in myapp/tests/.
+
+Runs the app against SQLite so the suite needs no database server:
+    python manage.py test myapp --settings=project.settings_bench
+"""
+
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'bench.sqlite3',
+        # A file rather than the in-memory default, so tests can write from several threads at once
+        'TEST': {'NAME': BASE_DIR / 'test_bench.sqlite3'},
+    }
+}
+
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+# A catalog check landing in a timed call would make its query count depend on timing
+PRICE_CATALOG_CHECK_SECONDS = 3600
+
+# Every route is called many times from one address, keep the login throttles out of the measurements
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,  # noqa: F405
+    'DEFAULT_THROTTLE_RATES': {scope: '1000000/min' for scope in REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']},  # noqa: F405
+}
@@ -0,0 +1,18 @@
+"""
+Benchmark settings plus a read replica, to exercise the replica routing on two SQLite files:
+    python manage.py test myapp.tests.test_replica --settings=project.settings_replica
+
+Nothing copies the primary into the replica file (nor the two test databases into each other), which
+keeps the routing visible: a read served by the replica does not see rows written to the primary.
+For a manual run, migrate both (migrate --database=reporting) or copy bench.sqlite3 over the replica.
+"""
+
+from .settings_bench import *  # noqa: F401,F403
+
+DATABASES = {
+    **DATABASES,  # noqa: F405
+    REPORTING_DATABASE_ALIAS: {  # noqa: F405
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'bench_replica.sqlite3',  # noqa: F405
+    },
+}